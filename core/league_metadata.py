@@ -27,7 +27,8 @@ class LeagueMetadata:
         self.league = None
         self.teams = []
         self.last_refresh_time = None
-    
+        self.snapshot_version = 0
+
     def connect_to_league(self) -> bool:
         """
         Подключение к лиге ESPN и получение метаданных команд.
@@ -43,6 +44,8 @@ class LeagueMetadata:
                 swid=self.swid
             )
             self.teams = self.league.teams
+            # Новая версия снимка данных - кэши, привязанные к старой версии, становятся неактуальными
+            self.snapshot_version += 1
             return True
         except Exception as e:
             print(f"Ошибка подключения к лиге: {e}")
@@ -69,7 +72,17 @@ class LeagueMetadata:
             datetime объект с временем последнего обновления или None
         """
         return self.last_refresh_time
-    
+
+    def get_snapshot_version(self) -> int:
+        """
+        Получает версию текущего снимка данных лиги.
+        Версия увеличивается при каждом успешном подключении/обновлении.
+
+        Returns:
+            Номер версии снимка данных
+        """
+        return self.snapshot_version
+
     def get_teams(self) -> List:
         """
         Получает список всех команд лиги.
@@ -301,6 +314,49 @@ class LeagueMetadata:
         
         return all_players_stats
     
+    def get_all_players_stats_for_periods(self, periods: List[str], stats_type: str = 'total', exclude_ir: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Получает статистику всех игроков сразу за несколько периодов за один обход составов.
+        Для каждого периода результат совпадает с get_all_players_stats(period, stats_type, exclude_ir).
+        
+        Args:
+            periods: Список периодов статистики (см. get_all_players_stats)
+            stats_type: Тип статистики - 'total' (общая) или 'avg' (средняя за игру)
+            exclude_ir: Если True, исключает игроков в IR слоте из результатов
+        
+        Returns:
+            Словарь {period: [{'name', 'position', 'team_id', 'team_name', 'stats'}, ...]}
+        """
+        if not self.teams:
+            self.get_teams()
+        
+        players_by_period = {period: [] for period in periods}
+        
+        for team in self.teams:
+            roster = self.get_team_roster(team.team_id)
+            
+            for player in roster:
+                # Пропускаем IR игроков, если exclude_ir=True
+                if exclude_ir:
+                    lineup_slot = getattr(player, 'lineupSlot', '')
+                    slot_position = getattr(player, 'slot_position', '')
+                    if lineup_slot == 'IR' or slot_position == 'IR':
+                        continue
+                
+                for period in players_by_period:
+                    stats = self.get_player_stats(player, period, stats_type)
+                    
+                    if stats:
+                        players_by_period[period].append({
+                            'name': player.name,
+                            'position': getattr(player, 'position', 'N/A'),
+                            'team_id': team.team_id,
+                            'team_name': team.team_name,
+                            'stats': stats
+                        })
+        
+        return players_by_period
+    
     def get_matchups_for_week(self, week: int) -> List[Dict[str, Any]]:
         """
         Получает все матчапы за указанную неделю с базовой информацией.
@@ -344,6 +400,36 @@ class LeagueMetadata:
         
         return matchups
     
+    def get_matchup_scoring_periods(self, week: int, default_length: int = 7) -> List[int]:
+        """
+        Получает ID игровых дней (scoring periods) матчапа.
+        Для текущей недели будущие дни еще не известны ESPN API, поэтому период
+        достраивается до default_length дней от первого дня матчапа.
+        
+        Args:
+            week: Номер недели матчапа
+            default_length: Длина матчапа в днях по умолчанию
+        
+        Returns:
+            Отсортированный список ID игровых дней
+        """
+        if not self.league:
+            if not self.connect_to_league():
+                return []
+        
+        matchup_ids = getattr(self.league, 'matchup_ids', {}) or {}
+        known = sorted(int(sp) for sp in matchup_ids.get(week, []))
+        
+        if week != self.league.currentMatchupPeriod:
+            return known
+        
+        today = getattr(self.league, 'scoringPeriodId', None)
+        start = known[0] if known else today
+        if start is None:
+            return known
+        end = max(start + default_length - 1, known[-1] if known else start)
+        return list(range(start, end + 1))
+    
     def get_matchup_box_score(self, week: int, team_id: int) -> Optional[Dict[str, Any]]:
         """
         Получает Box Score команды за указанную неделю (матчап).
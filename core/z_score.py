@@ -44,6 +44,20 @@ def calculate_z_scores(league_metadata, period: str, exclude_ir: bool = False) -
     # Получаем avg статистику всех игроков
     all_players = league_metadata.get_all_players_stats(period, 'avg', exclude_ir=exclude_ir)
     
+    return calculate_z_scores_from_stats(all_players)
+
+
+def calculate_z_scores_from_stats(all_players: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Рассчитывает Z-scores по уже полученной avg статистике игроков.
+    Позволяет переиспользовать один обход составов для нескольких расчетов.
+    
+    Args:
+        all_players: Результат league_metadata.get_all_players_stats(period, 'avg', ...)
+    
+    Returns:
+        Словарь в формате calculate_z_scores
+    """
     if not all_players:
         return {'players': [], 'league_metrics': {}}
     
@@ -243,3 +257,47 @@ def calculate_z_scores(league_metadata, period: str, exclude_ir: bool = False) -
         'league_metrics': league_metrics
     }
 
+
+def calculate_player_z_scores(stats: Dict[str, Any], league_metrics: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Рассчитывает Z-scores одного игрока по уже рассчитанным метрикам лиги
+    (например, для свободных агентов, которые не участвуют в расчете метрик).
+    Нечисловые результаты (inf/nan) заменяются на 0.
+    
+    Args:
+        stats: avg статистика игрока
+        league_metrics: Метрики лиги из calculate_z_scores
+    
+    Returns:
+        Словарь {category: z_score}
+    """
+    z_scores = {}
+    
+    # Счетные категории
+    for cat in COUNTING_CATEGORIES:
+        if cat in stats and cat in league_metrics:
+            std = league_metrics[cat]['std']
+            z_scores[cat] = (stats[cat] - league_metrics[cat]['mean']) / std if std > 0 else 0
+    
+    # Процентные категории (через impact)
+    percentage_sources = {
+        'FG%': ('FG%', 'FGA'),
+        'FT%': ('FT%', 'FTA'),
+        '3PT%': ('3PT%', '3PA')
+    }
+    for cat, (pct_key, attempts_key) in percentage_sources.items():
+        if pct_key in stats and attempts_key in stats and cat in league_metrics:
+            impact = (stats[pct_key] - league_metrics[cat]['weighted_avg']) * stats[attempts_key]
+            impact_std = league_metrics[cat]['impact_std']
+            z_scores[cat] = (impact - league_metrics[cat]['impact_mean']) / impact_std if impact_std > 0 else 0
+    
+    if 'AST' in stats and 'TO' in stats and 'A/TO' in league_metrics:
+        impact = stats['AST'] - stats['TO'] * league_metrics['A/TO']['weighted_avg']
+        impact_std = league_metrics['A/TO']['impact_std']
+        z_scores['A/TO'] = (impact - league_metrics['A/TO']['impact_mean']) / impact_std if impact_std > 0 else 0
+    
+    for cat, z_score in z_scores.items():
+        if not math.isfinite(z_score):
+            z_scores[cat] = 0.0
+    
+    return z_scores
@@ -18,6 +18,8 @@ sys.path.insert(0, os.path.join(project_root, 'core'))
 from config import get_cors_origins
 from routers import teams, analytics, simulation, players, trades, dashboard, balance, lineup, prompt
 from dependencies import get_league_meta
+from utils.parallel import shutdown_pool, start_pool
+from utils.post_refresh import run_post_refresh_pipeline
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -51,6 +53,10 @@ async def background_refresh_task():
                 if success:
                     last_refresh = league_meta.get_last_refresh_time()
                     logger.info(f"Данные лиги успешно обновлены. Время: {last_refresh}")
+                    
+                    # Этапы после обновления (готовые дашборды команд) - в отдельном потоке
+                    report = await asyncio.to_thread(run_post_refresh_pipeline, league_meta)
+                    logger.info(f"Этапы после обновления выполнены: {report}")
                 else:
                     logger.warning("Ошибка при автоматическом обновлении данных лиги")
                 
@@ -69,8 +75,10 @@ async def background_refresh_task():
 async def lifespan(app: FastAPI):
     """
     Управление жизненным циклом приложения.
-    Запускает фоновую задачу автообновления при старте.
+    Запускает общий пул процессов для тяжелых расчетов и фоновую задачу автообновления при старте.
     """
+    pool_size = start_pool()
+    logger.info(f"Пул процессов для расчетов: {pool_size}")
     logger.info("Запуск фоновой задачи автообновления данных (первое обновление через 5 минут)...")
     task = asyncio.create_task(background_refresh_task())
     yield
@@ -80,6 +88,7 @@ async def lifespan(app: FastAPI):
         await task
     except asyncio.CancelledError:
         pass
+    shutdown_pool()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -1,8 +1,20 @@
 """
 Pydantic модели для API запросов.
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
+from utils.parallel import DEFAULT_MAX_WORKERS
+from utils.season_simulation import MAX_SEASONS
+
+
+# Верхние границы параметров поиска трейдов (ограничивают время и ресурсы одного запроса)
+MAX_SEARCH_EVALUATIONS = 2000
+MAX_SEARCH_TIME_BUDGET = 60.0
+MAX_BEAM_WIDTH = 500  # Стоимость расширения луча растет квадратично
+
+# Верхние границы размера пакетных запросов (количество трейдов и сценариев составов)
+MAX_BATCH_TRADES = 100
+MAX_BATCH_SCENARIOS = 100
 
 
 class TradeAnalysisRequest(BaseModel):
@@ -17,6 +29,23 @@ class TradeAnalysisRequest(BaseModel):
     simulation_mode: str = "all"  # "all", "exclude_ir" или "top_n"
     top_n_players: int = 13
     custom_team_players: Optional[Dict[int, List[str]]] = None
+    playoff_odds: bool = False  # Монте-Карло симуляция шансов на плей-офф до и после трейда
+    playoff_seasons: int = Field(5000, ge=0, le=MAX_SEASONS)
+    playoff_seed: int = 0
+
+
+class BatchTradeAnalysisRequest(BaseModel):
+    """Модель для пакетного анализа вариантов трейдов с общими period и simulation_mode."""
+    trades: List[TradeAnalysisRequest] = Field(..., max_length=MAX_BATCH_TRADES)
+
+
+class TradeSessionUpdate(BaseModel):
+    """Модель изменения трейда в сессии конструктора трейдов."""
+    add_give: List[str] = []  # Игроки, которых добавляю в отдаваемые
+    remove_give: List[str] = []
+    add_receive: List[str] = []  # Игроки, которых добавляю в получаемые
+    remove_receive: List[str] = []
+    punt_categories: Optional[List[str]] = None  # None - без изменений
 
 
 class TeamTrade(BaseModel):
@@ -36,6 +65,46 @@ class MultiTeamTradeRequest(BaseModel):
     custom_team_players: Optional[Dict[int, List[str]]] = None
 
 
+class BatchSimulationRequest(BaseModel):
+    """Модель для пакетной симуляции сценариев составов."""
+    scenarios: List[Dict[int, List[str]]] = Field(..., max_length=MAX_BATCH_SCENARIOS)  # Каждый сценарий: {team_id: [имена игроков]}
+    mode: str = "team_stats_avg"  # "team_stats_avg" или "z_scores"
+    period: str = "2026_total"
+    simulation_mode: str = "all"  # "all", "exclude_ir" или "top_n"
+    top_n_players: int = 13
 
 
+class TradeSearchRequest(BaseModel):
+    """Модель для поиска выгодных трейдов по всей лиге."""
+    my_team_id: int
+    period: str = "2026_total"
+    punt_categories: List[str] = []
+    simulation_mode: str = "all"  # "all", "exclude_ir" или "top_n"
+    top_n_players: int = 13
+    metric: str = "z_total"  # "z_total", "all_play_rank" или "category_ranks"
+    rank_mode: str = "team_stats_avg"  # режим симуляции для all_play_rank: "team_stats_avg" или "z_scores"
+    package_sizes: List[str] = ["1x1", "2x1", "2x2"]  # "отдаю x получаю"
+    partner_team_ids: Optional[List[int]] = None  # None - все команды лиги
+    max_partner_loss: float = 1.0  # Допустимое ухудшение total Z партнера
+    top_k: int = 10
+    max_evaluations: int = Field(400, ge=0, le=MAX_SEARCH_EVALUATIONS)  # Лимит точных оценок на всю лигу
+    time_budget: float = Field(10.0, ge=0, le=MAX_SEARCH_TIME_BUDGET)  # Секунды
+    workers: int = Field(0, ge=0, le=DEFAULT_MAX_WORKERS)  # Количество процессов (0 - автоматически)
+
 
+class ThreeTeamTradeSearchRequest(BaseModel):
+    """Модель для поиска трехсторонних трейдов (цикл: я -> B -> C -> я)."""
+    my_team_id: int
+    period: str = "2026_total"
+    punt_categories: List[str] = []
+    simulation_mode: str = "all"  # "all", "exclude_ir" или "top_n"
+    top_n_players: int = 13
+    metric: str = "z_total"  # "z_total", "all_play_rank" или "category_ranks"
+    rank_mode: str = "team_stats_avg"  # режим симуляции для all_play_rank: "team_stats_avg" или "z_scores"
+    partner_team_ids: Optional[List[int]] = None  # None - все команды лиги
+    max_partner_loss: float = 1.0  # Допустимое ухудшение total Z каждого партнера
+    beam_width: int = Field(200, ge=0, le=MAX_BEAM_WIDTH)  # Количество пар (отдаю, получаю) в луче
+    top_k: int = 10
+    max_evaluations: int = Field(300, ge=0, le=MAX_SEARCH_EVALUATIONS)  # Лимит точных оценок финалистов
+    time_budget: float = Field(10.0, ge=0, le=MAX_SEARCH_TIME_BUDGET)  # Секунды
+    workers: int = Field(0, ge=0, le=DEFAULT_MAX_WORKERS)  # Количество процессов (0 - автоматически)
@@ -4,24 +4,126 @@
 
 from fastapi import APIRouter, Depends
 from dependencies import get_league_meta
-from core.z_score import calculate_z_scores
 from core.config import CATEGORIES
 import sys
 import os
 backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, backend_dir)
-from utils.lineup_optimizer import optimize_lineup
+from utils.lineup_data import get_available_lineup_players, get_week_matchup_stats, get_z_scores_by_name
+from utils.lineup_optimizer import optimize_lineup, plan_weekly_lineup
 from typing import List, Optional
+from datetime import datetime
 
 router = APIRouter(prefix="/api/lineup", tags=["lineup"])
 
 
+def _parse_punts(punt_categories: str) -> List[str]:
+    """Парсит пант-категории из строки через запятую."""
+    if not punt_categories:
+        return []
+    return [cat.strip() for cat in punt_categories.split(',') if cat.strip()]
+
+
+def _load_lineup_inputs(league_meta, team_id: int, period: str, exclude_ir: bool, punt_categories: str):
+    """
+    Собирает данные для оптимизации состава: доступных игроков команды с Z-scores,
+    статистику команды и соперника в текущем матчапе.
+    
+    Returns:
+        tuple: ({'players', 'roster', 'team_stats', 'opponent_stats', 'punt_list', 'matchup_info'}, текст ошибки или None)
+    """
+    # Получаем команду
+    team = league_meta.get_team_by_id(team_id)
+    if not team:
+        return None, "Team not found"
+    
+    # Доступные игроки (без IR и травмированных OUT) с Z-scores
+    z_scores_by_name = get_z_scores_by_name(league_meta, period, exclude_ir=exclude_ir)
+    team_players_data, team_roster = get_available_lineup_players(league_meta, team_id, z_scores_by_name)
+    if not team_players_data:
+        return None, "No available players"
+    
+    # Статистика команды и соперника в текущем матчапе
+    current_week = league_meta.league.currentMatchupPeriod
+    week_stats = get_week_matchup_stats(league_meta, current_week)
+    if not week_stats or team_id not in week_stats:
+        return None, "No current matchup found"
+    matchup = week_stats[team_id]
+    
+    return {
+        'players': team_players_data,
+        'roster': team_roster,
+        'team_stats': matchup['stats'],
+        'opponent_stats': matchup['opponent_stats'],
+        'punt_list': _parse_punts(punt_categories),
+        'matchup_info': {
+            'opponent_name': matchup['opponent_name'],
+            'opponent_id': matchup['opponent_id'],
+            'week': current_week
+        }
+    }, None
+
+
+@router.get("/league-optimize")
+def optimize_league_lineups(
+    period: str = "2026_total",
+    exclude_ir: bool = False,
+    punt_categories: str = "",  # Список через запятую
+    league_meta=Depends(get_league_meta)
+):
+    """
+    Оптимизирует составы всех команд лиги за один проход:
+    Z-scores и статистика матчапов текущей недели считаются один раз для всех команд.
+    
+    Returns:
+        {
+            'week': int,
+            'teams': [{'team_id', 'team_name', 'opponent_id', 'opponent_name',
+                       'can_fit_all', 'start_lineup': {slot: имя}, 'bench': [имена], 'start_value'}]
+        }
+    """
+    current_week = league_meta.league.currentMatchupPeriod
+    week_stats = get_week_matchup_stats(league_meta, current_week)
+    if not week_stats:
+        return {"error": "No current matchup found"}
+    
+    z_scores_by_name = get_z_scores_by_name(league_meta, period, exclude_ir=exclude_ir)
+    punt_list = _parse_punts(punt_categories)
+    
+    teams = []
+    for team in league_meta.get_teams():
+        matchup = week_stats.get(team.team_id)
+        if not matchup:
+            continue
+        players, _ = get_available_lineup_players(league_meta, team.team_id, z_scores_by_name)
+        result = optimize_lineup(
+            players, matchup['stats'], matchup['opponent_stats'], punt_list, include_details=False
+        )
+        teams.append({
+            'team_id': team.team_id,
+            'team_name': team.team_name,
+            'opponent_id': matchup['opponent_id'],
+            'opponent_name': matchup['opponent_name'],
+            'can_fit_all': result['can_fit_all'],
+            'start_lineup': {slot: player['name'] for slot, player in result['start_lineup'].items()},
+            'bench': [player['name'] for player in result['bench']],
+            'start_value': result['start_value']
+        })
+    
+    return {
+        'week': current_week,
+        'period': period,
+        'teams': teams
+    }
+
+
 @router.get("/{team_id}/optimize")
 def optimize_team_lineup(
     team_id: int,
     period: str = "2026_total",
     exclude_ir: bool = False,
     punt_categories: str = "",  # Список через запятую
+    details: bool = True,
     league_meta=Depends(get_league_meta)
 ):
     """
@@ -32,6 +134,7 @@ def optimize_team_lineup(
         period: Период статистики
         exclude_ir: Исключить IR игроков
         punt_categories: Список пант-категорий через запятую (например, "FT%,FG%")
+        details: Добавить детализацию бонуса за матчап по категориям
     
     Returns:
         {
@@ -41,103 +144,76 @@ def optimize_team_lineup(
             'analysis': {...}
         }
     """
-    # Получаем команду
-    team = league_meta.get_team_by_id(team_id)
-    if not team:
-        return {"error": "Team not found"}
-    
-    # Получаем ростер
-    roster = league_meta.get_team_roster(team_id)
-    
-    # Фильтруем игроков: исключаем IR и травмированных OUT
-    available_players = []
-    for player in roster:
-        # Исключаем IR
-        lineup_slot = getattr(player, 'lineupSlot', '')
-        if lineup_slot == 'IR':
-            continue
-        
-        # Исключаем травмированных OUT
-        injury_status = getattr(player, 'injuryStatus', 'ACTIVE')
-        is_injured = getattr(player, 'injured', False)
-        if is_injured and injury_status == 'OUT':
-            continue
-        
-        available_players.append(player)
-    
-    if not available_players:
-        return {"error": "No available players"}
-    
-    # Получаем Z-scores для всех игроков
-    z_data = calculate_z_scores(league_meta, period, exclude_ir=exclude_ir)
-    
-    # Получаем статистику игроков команды
-    team_players_data = []
-    for player in available_players:
-        player_name = player.name
-        
-        # Ищем игрока в данных Z-scores
-        player_z_data = None
-        for p in z_data['players']:
-            if p['name'] == player_name:
-                player_z_data = p
-                break
-        
-        if not player_z_data:
-            continue
-        
-        # Получаем eligibleSlots и position
-        eligible_slots = getattr(player, 'eligibleSlots', [])
-        position = getattr(player, 'position', '')
-        
-        team_players_data.append({
-            'name': player_name,
-            'position': position,
-            'eligibleSlots': eligible_slots,
-            'z_scores': player_z_data.get('z_scores', {})
-        })
-    
-    # Получаем статистику команды и соперника
-    current_week = league_meta.league.currentMatchupPeriod
-    matchup_box = league_meta.get_matchup_box_score(current_week, team_id)
-    
-    if not matchup_box:
-        return {"error": "No current matchup found"}
-    
-    opponent_id = matchup_box['opponent_id']
-    
-    # Получаем сводку матчапа
-    matchup_summary = league_meta.get_matchup_summary(current_week, team_id, opponent_id)
-    if not matchup_summary:
-        return {"error": "Could not get matchup summary"}
-    
-    # Определяем статистику команды и соперника
-    if matchup_summary['team1_id'] == team_id:
-        team_stats = matchup_summary['team1_stats_filtered']
-        opponent_stats = matchup_summary['team2_stats_filtered']
-    else:
-        team_stats = matchup_summary['team2_stats_filtered']
-        opponent_stats = matchup_summary['team1_stats_filtered']
-    
-    # Парсим пант-категории
-    punt_list = []
-    if punt_categories:
-        punt_list = [cat.strip() for cat in punt_categories.split(',') if cat.strip()]
+    inputs, error = _load_lineup_inputs(league_meta, team_id, period, exclude_ir, punt_categories)
+    if error:
+        return {"error": error}
     
     # Оптимизируем состав
     result = optimize_lineup(
-        team_players_data,
-        team_stats,
-        opponent_stats,
-        punt_list
+        inputs['players'],
+        inputs['team_stats'],
+        inputs['opponent_stats'],
+        inputs['punt_list'],
+        include_details=details
     )
     
     # Добавляем информацию о матчапе
-    result['matchup_info'] = {
-        'opponent_name': matchup_box['opponent_name'],
-        'opponent_id': opponent_id,
-        'week': current_week
-    }
+    result['matchup_info'] = inputs['matchup_info']
     
     return result
 
+
+@router.get("/{team_id}/weekly-plan")
+def plan_team_week(
+    team_id: int,
+    period: str = "2026_total",
+    exclude_ir: bool = False,
+    punt_categories: str = "",  # Список через запятую
+    include_past_days: bool = False,
+    league_meta=Depends(get_league_meta)
+):
+    """
+    Планирует стартовый состав на каждый игровой день текущего матчапа
+    по расписанию игр NBA (сетка день × слот).
+    
+    Args:
+        team_id: ID команды
+        period: Период статистики
+        exclude_ir: Исключить IR игроков
+        punt_categories: Список пант-категорий через запятую
+        include_past_days: Включить уже прошедшие дни матчапа
+    """
+    inputs, error = _load_lineup_inputs(league_meta, team_id, period, exclude_ir, punt_categories)
+    if error:
+        return {"error": error}
+    
+    week = inputs['matchup_info']['week']
+    today = getattr(league_meta.league, 'scoringPeriodId', None)
+    scoring_periods = league_meta.get_matchup_scoring_periods(week)
+    if not include_past_days:
+        scoring_periods = [sp for sp in scoring_periods if today is None or sp >= today]
+    if not scoring_periods:
+        return {"error": "No scoring periods left in current matchup"}
+    
+    # Игровые дни каждого игрока из его расписания (player.schedule)
+    for player_data, player in zip(inputs['players'], inputs['roster']):
+        schedule = getattr(player, 'schedule', None) or {}
+        player_data['games'] = {}
+        for scoring_period in scoring_periods:
+            game = schedule.get(str(scoring_period))
+            if not game:
+                continue
+            game_date = game.get('date')
+            player_data['games'][scoring_period] = game_date.date().isoformat() if isinstance(game_date, datetime) else None
+    
+    result = plan_weekly_lineup(
+        inputs['players'],
+        scoring_periods,
+        inputs['team_stats'],
+        inputs['opponent_stats'],
+        inputs['punt_list']
+    )
+    result['matchup_info'] = inputs['matchup_info']
+    result['today'] = today
+    
+    return result
@@ -1,14 +1,22 @@
 """
 Роутер для работы с игроками.
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from dependencies import get_league_meta
-from core.z_score import calculate_z_scores, COUNTING_CATEGORIES, PERCENTAGE_CATEGORIES
+from core.z_score import calculate_z_scores, calculate_player_z_scores, COUNTING_CATEGORIES, PERCENTAGE_CATEGORIES
 from core.config import CATEGORIES
+from utils.free_agents import optimize_add_drop
+from utils.streaming import plan_streaming_adds
 import math
 
 router = APIRouter(prefix="/api", tags=["players"])
 
+# Верхние границы параметров подбора свободных агентов (размер пула и количество точных пересчетов)
+MAX_FREE_AGENT_POOL_SIZE = 1000
+MAX_FREE_AGENT_EVALUATIONS = 2000
+# Верхняя граница лимита подписаний в плане стриминга
+MAX_STREAMING_ADDS = 14
+
 
 @router.get("/free-agents")
 def get_free_agents(
@@ -36,69 +44,8 @@ def get_free_agents(
         if not stats:
             continue
         
-        # Рассчитываем Z-scores для этого игрока
-        z_scores = {}
-        
-        # Счетные категории
-        for cat in COUNTING_CATEGORIES:
-            if cat in stats and cat in data['league_metrics']:
-                value = stats[cat]
-                mean = data['league_metrics'][cat]['mean']
-                std = data['league_metrics'][cat]['std']
-                z_score = (value - mean) / std if std > 0 else 0
-                # Проверка на inf/nan
-                if not math.isfinite(z_score):
-                    z_score = 0.0
-                z_scores[cat] = z_score
-        
-        # Процентные категории
-        if 'FG%' in stats and 'FGA' in stats and 'FG%' in data['league_metrics']:
-            fg_pct = stats['FG%']
-            fga = stats['FGA']
-            fg_avg = data['league_metrics']['FG%']['weighted_avg']
-            impact = (fg_pct - fg_avg) * fga
-            impact_mean = data['league_metrics']['FG%']['impact_mean']
-            impact_std = data['league_metrics']['FG%']['impact_std']
-            z_score = (impact - impact_mean) / impact_std if impact_std > 0 else 0
-            if not math.isfinite(z_score):
-                z_score = 0.0
-            z_scores['FG%'] = z_score
-        
-        if 'FT%' in stats and 'FTA' in stats and 'FT%' in data['league_metrics']:
-            ft_pct = stats['FT%']
-            fta = stats['FTA']
-            ft_avg = data['league_metrics']['FT%']['weighted_avg']
-            impact = (ft_pct - ft_avg) * fta
-            impact_mean = data['league_metrics']['FT%']['impact_mean']
-            impact_std = data['league_metrics']['FT%']['impact_std']
-            z_score = (impact - impact_mean) / impact_std if impact_std > 0 else 0
-            if not math.isfinite(z_score):
-                z_score = 0.0
-            z_scores['FT%'] = z_score
-        
-        if '3PT%' in stats and '3PA' in stats and '3PT%' in data['league_metrics']:
-            three_pct = stats['3PT%']
-            three_pa = stats['3PA']
-            three_avg = data['league_metrics']['3PT%']['weighted_avg']
-            impact = (three_pct - three_avg) * three_pa
-            impact_mean = data['league_metrics']['3PT%']['impact_mean']
-            impact_std = data['league_metrics']['3PT%']['impact_std']
-            z_score = (impact - impact_mean) / impact_std if impact_std > 0 else 0
-            if not math.isfinite(z_score):
-                z_score = 0.0
-            z_scores['3PT%'] = z_score
-        
-        if 'AST' in stats and 'TO' in stats and 'A/TO' in data['league_metrics']:
-            ast = stats['AST']
-            to = stats['TO']
-            a_to_avg = data['league_metrics']['A/TO']['weighted_avg']
-            impact = ast - to * a_to_avg
-            impact_mean = data['league_metrics']['A/TO']['impact_mean']
-            impact_std = data['league_metrics']['A/TO']['impact_std']
-            z_score = (impact - impact_mean) / impact_std if impact_std > 0 else 0
-            if not math.isfinite(z_score):
-                z_score = 0.0
-            z_scores['A/TO'] = z_score
+        # Рассчитываем Z-scores для этого игрока по метрикам лиги
+        z_scores = calculate_player_z_scores(stats, data['league_metrics'])
         
         # Проверяем все значения в stats на inf/nan
         clean_stats = {}
@@ -124,6 +71,54 @@ def get_free_agents(
     }
 
 
+@router.get("/free-agents/optimize")
+def optimize_free_agents(
+    team_id: int,
+    period: str = "2026_total",
+    punt_categories: str = "",  # Список через запятую
+    simulation_mode: str = "all",
+    top_n_players: int = 13,
+    metric: str = "z_total",
+    rank_mode: str = "team_stats_avg",
+    top_k: int = 10,
+    pool_size: int = Query(500, ge=0, le=MAX_FREE_AGENT_POOL_SIZE),
+    max_evaluations: int = Query(200, ge=0, le=MAX_FREE_AGENT_EVALUATIONS),
+    league_meta=Depends(get_league_meta)
+):
+    """
+    Лучшие замены "отчислить своего игрока - подписать свободного агента"
+    с изменениями по категориям и месту в симуляции "все против всех".
+    """
+    punt_list = [cat.strip() for cat in punt_categories.split(',') if cat.strip()]
+    result, error = optimize_add_drop(
+        league_meta, team_id, period, punt_list, simulation_mode, top_n_players,
+        metric, rank_mode, top_k, pool_size, max_evaluations
+    )
+    if error:
+        return {"error": error}
+    return result
+
+
+@router.get("/free-agents/streaming")
+def plan_free_agent_streaming(
+    team_id: int,
+    period: str = "2026_total",
+    punt_categories: str = "",  # Список через запятую
+    max_adds: int = Query(3, ge=0, le=MAX_STREAMING_ADDS),
+    pool_size: int = Query(200, ge=0, le=MAX_FREE_AGENT_POOL_SIZE),
+    league_meta=Depends(get_league_meta)
+):
+    """
+    План стриминга свободных агентов на оставшиеся дни текущего матчапа:
+    последовательность замен в пределах лимита подписаний с прогнозом стартов и категорий.
+    """
+    punt_list = [cat.strip() for cat in punt_categories.split(',') if cat.strip()]
+    result, error = plan_streaming_adds(league_meta, team_id, period, punt_list, max_adds, pool_size)
+    if error:
+        return {"error": error}
+    return result
+
+
 @router.get("/all-players")
 def get_all_players(
     period: str = "2026_total",
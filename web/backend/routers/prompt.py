@@ -6,10 +6,13 @@ from dependencies import get_league_meta
 from core.z_score import calculate_z_scores
 from core.config import CATEGORIES, LEAGUE_ID, YEAR
 from utils.calculations import calculate_team_raw_stats, select_top_n_players
+from utils.schedule import schedule_store
+from utils.dashboard import DashboardContext
+from utils.season_results import season_results
+from utils.standings import get_standings
 from typing import Optional
 import json
 import math
-from pathlib import Path
 from datetime import datetime
 
 router = APIRouter(prefix="/api", tags=["prompt"])
@@ -120,21 +123,20 @@ def generate_prompt(
         # 2. Информация о командах
         teams = league_meta.get_teams()
         teams_data = []
+        current_week_results = season_results.get_week(league_meta, current_week)
+        current_week_teams = current_week_results['teams'] if current_week_results else {}
+        standings = get_standings(league_meta)['by_team']
         for team in teams:
-            wins = getattr(team, 'wins', 0)
-            losses = getattr(team, 'losses', 0)
-            ties = getattr(team, 'ties', 0)
-            total_games = wins + losses + ties
-            win_rate = (wins + 0.5 * ties) / total_games if total_games > 0 else 0
+            standing = standings[team.team_id]
             
             # Получаем текущий матчап
             current_matchup = None
-            matchup_box = league_meta.get_matchup_box_score(current_week, team.team_id)
-            if matchup_box:
+            matchup_entry = current_week_teams.get(team.team_id)
+            if matchup_entry and matchup_entry['has_lineup']:
                 current_matchup = {
                     "week": current_week,
-                    "opponent_id": matchup_box['opponent_id'],
-                    "opponent_name": matchup_box['opponent_name']
+                    "opponent_id": matchup_entry['opponent_id'],
+                    "opponent_name": matchup_entry['opponent_name']
                 }
             
             matchup_data = None
@@ -158,19 +160,18 @@ def generate_prompt(
             teams_data.append({
                 "id": team.team_id,
                 "n": team.team_name,  # name
-                "w": wins,
-                "l": losses,
-                "t": ties,
-                "wr": round(win_rate, 3),  # win_rate
+                "w": standing['wins'],
+                "l": standing['losses'],
+                "t": standing['ties'],
+                "wr": standing['win_pct'],  # win_rate
                 "rs": len(roster),  # roster_size
                 "hp": healthy_players_count,  # healthy_players_count
-                "m": matchup_data  # current_matchup
+                "m": matchup_data,  # current_matchup
+                "pos": standing['rank']  # position
             })
         
-        # Сортируем команды по винрейту для определения позиции
-        teams_data.sort(key=lambda x: (x['wr'], x['w']), reverse=True)
-        for idx, team in enumerate(teams_data):
-            team['pos'] = idx + 1  # position
+        # Сортируем команды по месту в турнирной таблице
+        teams_data.sort(key=lambda x: x['pos'])
         
         # 3. Информация об игроках (все)
         exclude_ir = (simulation_mode == "exclude_ir")
@@ -328,69 +329,31 @@ def generate_prompt(
         # 5. История матчапов основной команды (если выбрана)
         matchup_history = []
         if main_team_id:
-            for week in range(1, current_week):
-                matchup_box = league_meta.get_matchup_box_score(week, main_team_id)
-                if not matchup_box:
-                    continue
-                
-                opponent_id = matchup_box['opponent_id']
-                matchup_summary = league_meta.get_matchup_summary(week, main_team_id, opponent_id)
-                if not matchup_summary:
-                    continue
-                
-                if matchup_summary['team1_id'] == main_team_id:
-                    my_wins = matchup_summary['team1_wins']
-                    opponent_wins = matchup_summary['team2_wins']
-                    ties = matchup_summary['ties']
-                else:
-                    my_wins = matchup_summary['team2_wins']
-                    opponent_wins = matchup_summary['team1_wins']
-                    ties = matchup_summary['ties']
-                
-                result = 'W' if my_wins > opponent_wins else ('L' if opponent_wins > my_wins else 'T')
-                
+            for matchup in season_results.get_team_history(league_meta, main_team_id):
                 matchup_history.append({
-                    "w": week,  # week
-                    "oid": opponent_id,  # opponent_id
-                    "on": matchup_box['opponent_name'],  # opponent_name
-                    "mw": my_wins,  # my_wins
-                    "ow": opponent_wins,  # opponent_wins
-                    "t": ties,  # ties
-                    "r": result  # result
+                    "w": matchup['week'],  # week
+                    "oid": matchup['opponent_id'],  # opponent_id
+                    "on": matchup['opponent_name'],  # opponent_name
+                    "mw": matchup['wins'],  # my_wins
+                    "ow": matchup['opponent_wins'],  # opponent_wins
+                    "t": matchup['ties'],  # ties
+                    "r": matchup['result']  # result
                 })
         
         # 6. Будущие матчапы из расписания
         upcoming_matchups = []
-        schedule_path = Path(__file__).parent.parent / "shedule.json"
-        if schedule_path.exists():
-            try:
-                with open(schedule_path, 'r', encoding='utf-8') as f:
-                    schedule = json.load(f)
-                
-                # Создаем маппинг названий к ID
-                team_name_to_id = {team.team_name: team.team_id for team in teams}
-                
-                for week_data in schedule:
-                    week_num = week_data['week']
-                    if week_num >= current_week:
-                        for matchup_str in week_data['matchups']:
-                            parts = matchup_str.split(' vs ')
-                            if len(parts) == 2:
-                                team1_name = parts[0].strip()
-                                team2_name = parts[1].strip()
-                                team1_id = team_name_to_id.get(team1_name)
-                                team2_id = team_name_to_id.get(team2_name)
-                                
-                                if team1_id and team2_id:
-                                    upcoming_matchups.append({
-                                        "w": week_num,  # week
-                                        "t1": team1_id,  # team1_id
-                                        "t1n": team1_name,  # team1_name
-                                        "t2": team2_id,  # team2_id
-                                        "t2n": team2_name  # team2_name
-                                    })
-            except Exception as e:
-                pass  # Игнорируем ошибки загрузки расписания
+        schedule, schedule_error = schedule_store.resolve(league_meta)
+        if not schedule_error:
+            for week_num in schedule['weeks']:
+                if week_num >= current_week:
+                    for matchup in schedule['matchups'][week_num]:
+                        upcoming_matchups.append({
+                            "w": week_num,  # week
+                            "t1": matchup['team1_id'],  # team1_id
+                            "t1n": matchup['team1'],  # team1_name
+                            "t2": matchup['team2_id'],  # team2_id
+                            "t2n": matchup['team2']  # team2_name
+                        })
         
         # 7. Топ-50 свободных агентов
         free_agents_list = league_meta.get_free_agents(size=50)
@@ -605,43 +568,29 @@ def generate_prompt(
         # 9. Рейтинг команд по категориям (для всех команд)
         category_rankings = {}
         
-        # Генерируем рейтинги категорий для всех команд
-        # Используем первую команду для вызова функции, так как она возвращает данные по всем командам
+        # Места всех команд по категориям - из кэшируемой матрицы мест
+        # (для выбора составов в режиме top_n используется основная команда или первая в списке)
         try:
-            from routers.dashboard import get_category_rankings
-            # Используем первую команду из списка, если основная не выбрана
             team_id_for_rankings = main_team_id if main_team_id else teams_data[0]['id'] if teams_data else None
             
             if team_id_for_rankings:
-                rankings_data = get_category_rankings(
-                    team_id=team_id_for_rankings,
-                    period=period,
-                    simulation_mode=simulation_mode,
-                    top_n_players=top_n_players,
-                    custom_team_players=custom_team_players_str,
-                    league_meta=league_meta
-                )
+                matrix = DashboardContext(
+                    league_meta, team_id_for_rankings, period, simulation_mode, top_n_players, custom_team_players_str
+                ).rank_matrix()
                 
-                if 'category_teams' in rankings_data:
-                    # Создаем маппинг team_id -> team_name для быстрого доступа
-                    team_id_to_name = {team['id']: team['n'] for team in teams_data}
-                    
-                    # Упрощаем формат рейтингов категорий - ID, название и значение
-                    category_rankings_raw = rankings_data['category_teams']
-                    for cat, teams_list in category_rankings_raw.items():
-                        # Формат: [[rank, team_id, team_name, value], ...] - компактный но с названиями
+                if matrix:
+                    # Формат: [[rank, team_id, team_name, value], ...] - компактный но с названиями
+                    for col, cat in enumerate(matrix['categories']):
                         simplified_teams = []
-                        for team_data in teams_list:
-                            team_id = team_data.get('team_id', 0)
-                            team_name = team_id_to_name.get(team_id, 'Unknown')
-                            value = team_data.get('value', 0.0)
+                        for pos, idx in enumerate(matrix['order'][cat], 1):
+                            value = matrix['values'][idx][col]
                             if isinstance(value, float) and not math.isfinite(value):
                                 value = 0.0
                             simplified_teams.append([
-                                team_data.get('rank', 0),  # rank
-                                team_id,  # team_id
-                                team_name,  # team_name
-                                round(value, 2) if isinstance(value, (int, float)) else value  # value
+                                pos,  # rank
+                                matrix['team_ids'][idx],  # team_id
+                                matrix['names'][idx],  # team_name
+                                round(value, 2)  # value
                             ])
                         category_rankings[cat] = simplified_teams
         except Exception as e:
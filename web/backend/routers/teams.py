@@ -1,9 +1,11 @@
 """
 Роутер для работы с командами и лигой.
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends
 from dependencies import get_league_meta
 from core.z_score import calculate_z_scores
+from utils.post_refresh import run_post_refresh_pipeline
+from utils.standings import get_standings
 import math
 
 router = APIRouter(prefix="/api", tags=["teams"])
@@ -16,11 +18,26 @@ def get_teams(league_meta=Depends(get_league_meta)):
     return [{"team_id": t.team_id, "team_name": t.team_name} for t in teams]
 
 
+@router.get("/standings")
+def get_league_standings(league_meta=Depends(get_league_meta)):
+    """
+    Получает турнирную таблицу лиги: место, рекорд, винрейт,
+    отставание от лидера и ключи тай-брейка каждой команды.
+    """
+    standings = get_standings(league_meta)
+    return {
+        'source': standings['source'],
+        'teams': standings['teams']
+    }
+
+
 @router.post("/refresh-league")
-def refresh_league(league_meta=Depends(get_league_meta)):
+def refresh_league(background_tasks: BackgroundTasks, league_meta=Depends(get_league_meta)):
     """
     Обновляет данные лиги из ESPN API.
     Перезагружает информацию о командах, игроках и их статусах (включая травмы).
+    После успешного обновления в фоне выполняются этапы utils.post_refresh
+    (готовые дашборды команд).
     
     Returns:
         Словарь с результатом обновления:
@@ -32,6 +49,7 @@ def refresh_league(league_meta=Depends(get_league_meta)):
     try:
         success = league_meta.refresh_league()
         if success:
+            background_tasks.add_task(run_post_refresh_pipeline, league_meta)
             return {
                 "success": True,
                 "message": "Данные лиги успешно обновлены"
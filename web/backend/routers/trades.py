@@ -3,17 +3,26 @@
 """
 from fastapi import APIRouter, Depends
 from dependencies import get_league_meta
-from models import TradeAnalysisRequest, MultiTeamTradeRequest
-from core.z_score import calculate_z_scores
+from models import (
+    TradeAnalysisRequest,
+    BatchTradeAnalysisRequest,
+    TradeSessionUpdate,
+    MultiTeamTradeRequest,
+    TradeSearchRequest,
+    ThreeTeamTradeSearchRequest
+)
 from core.config import CATEGORIES
 from utils.calculations import (
     calculate_total_z,
     calculate_category_z,
     calculate_raw_stats,
-    calculate_simulation_ranks,
-    calculate_category_rankings,
     select_top_n_players
 )
+from utils.trade_cache import canonical_custom_rosters, trade_analysis_key, trade_result_cache
+from utils.season_simulation import simulate_playoff_odds
+from utils.trade_context import TradeEvaluationContext
+from utils.trade_sessions import apply_session_update, trade_session_store
+from utils.trade_search import build_swap_matrix, build_trade_context, search_three_team_trades, search_trades
 import math
 
 router = APIRouter(prefix="/api", tags=["trades"])
@@ -25,25 +34,161 @@ def analyze_trade(
     league_meta=Depends(get_league_meta)
 ):
     """Анализирует трейд между двумя командами."""
-    # Определяем exclude_ir на основе simulation_mode
-    exclude_ir = (request.simulation_mode == "exclude_ir")
-    
-    # Получаем Z-scores всех игроков
-    data = calculate_z_scores(league_meta, request.period, exclude_ir=exclude_ir)
-    
-    if not data['players']:
-        return {"error": "No data found"}
+    errors = []
     
-    # Получаем полные данные игроков со статистикой
-    all_players_with_stats = league_meta.get_all_players_stats(request.period, 'avg', exclude_ir=exclude_ir)
+    def compute():
+        # Базовое состояние лиги считается один раз,
+        # ДО трейда используем custom_team_players (если задан)
+        context, error = build_trade_context(
+            league_meta, request.period, request.simulation_mode, request.top_n_players, request.custom_team_players
+        )
+        if error:
+            errors.append(error)
+            return None
+        
+        return _analyze_trade_in_context(request, context, league_meta)
     
-    # Создаем словари для быстрого поиска
-    stats_by_name = {p['name']: p['stats'] for p in all_players_with_stats}
-    z_scores_by_name = {p['name']: p['z_scores'] for p in data['players']}
+    # Одинаковые трейды берутся из кэша до обновления данных лиги (ошибки загрузки данных не кэшируются)
+    analysis = trade_result_cache.get_or_compute(league_meta, trade_analysis_key(league_meta, request), compute)
+    return analysis if analysis is not None else {"error": errors[0]}
+
+
+@router.get("/trade-analysis/cache-stats")
+def get_trade_cache_stats():
+    """Статистика кэша анализа трейдов (попадания, промахи, размер)."""
+    return trade_result_cache.stats()
+
+
+@router.post("/trade-analysis/batch")
+def analyze_trades_batch(
+    request: BatchTradeAnalysisRequest,
+    league_meta=Depends(get_league_meta)
+):
+    """
+    Анализирует несколько вариантов трейдов за один проход.
+    Z-scores, статистика и базовые симуляции считаются один раз для всех трейдов,
+    уже посчитанные трейды берутся из кэша.
+    """
+    if not request.trades:
+        return {"results": []}
+    
+    first = request.trades[0]
+    for trade in request.trades[1:]:
+        if (trade.period, trade.simulation_mode, trade.top_n_players) != (first.period, first.simulation_mode, first.top_n_players):
+            return {"error": "All trades must use the same period, simulation_mode and top_n_players"}
+    
+    missing = object()
+    version = league_meta.get_snapshot_version()
+    keys = [trade_analysis_key(league_meta, trade) for trade in request.trades]
+    results = [trade_result_cache.get(league_meta, key, missing) for key in keys]
+    
+    # custom_team_players влияет только на состояние ДО трейда в режиме top_n:
+    # для каждого отличающегося набора строим отдельное базовое состояние на тех же данных
+    contexts = {}
+    for idx, trade in enumerate(request.trades):
+        if results[idx] is not missing:
+            continue
+        custom_key = canonical_custom_rosters(trade.custom_team_players, trade.simulation_mode)
+        if custom_key not in contexts:
+            if contexts:
+                base_players = next(iter(contexts.values())).players
+                contexts[custom_key] = TradeEvaluationContext(
+                    league_meta, base_players, trade.simulation_mode, trade.top_n_players, trade.custom_team_players
+                )
+            else:
+                context, error = build_trade_context(
+                    league_meta, trade.period, trade.simulation_mode, trade.top_n_players, trade.custom_team_players
+                )
+                if error:
+                    return {"error": error}
+                contexts[custom_key] = context
+        results[idx] = _analyze_trade_in_context(trade, contexts[custom_key], league_meta)
+        trade_result_cache.set(league_meta, keys[idx], results[idx], version)
     
-    # Добавляем stats к каждому игроку
-    for player in data['players']:
-        player['stats'] = stats_by_name.get(player['name'], {})
+    return {"results": results}
+
+
+@router.post("/trade-sessions")
+def create_trade_session(
+    request: TradeAnalysisRequest,
+    league_meta=Depends(get_league_meta)
+):
+    """
+    Создает сессию конструктора трейдов: базовое состояние лиги считается один раз,
+    дальнейшие изменения трейда пересчитывают только две команды.
+    """
+    session_id, session, error = trade_session_store.create(league_meta, request)
+    if error:
+        return {"error": error}
+    return _trade_session_response(session_id, session, league_meta)
+
+
+@router.get("/trade-sessions/stats")
+def get_trade_session_stats():
+    """Статистика хранилища сессий трейдов."""
+    return trade_session_store.stats()
+
+
+@router.get("/trade-sessions/{session_id}")
+def get_trade_session(
+    session_id: str,
+    league_meta=Depends(get_league_meta)
+):
+    """Текущий вариант трейда сессии и его анализ."""
+    session, error = trade_session_store.get(league_meta, session_id)
+    if error:
+        return {"error": error}
+    return _trade_session_response(session_id, session, league_meta)
+
+
+@router.patch("/trade-sessions/{session_id}")
+def update_trade_session(
+    session_id: str,
+    update: TradeSessionUpdate,
+    league_meta=Depends(get_league_meta)
+):
+    """Добавляет/убирает игроков трейда или меняет пант-категории и возвращает обновленный анализ."""
+    session, error = trade_session_store.get(league_meta, session_id)
+    if error:
+        return {"error": error}
+    error = apply_session_update(session, update)
+    if error:
+        return {"error": error}
+    return _trade_session_response(session_id, session, league_meta)
+
+
+@router.delete("/trade-sessions/{session_id}")
+def delete_trade_session(session_id: str):
+    """Удаляет сессию конструктора трейдов."""
+    if not trade_session_store.delete(session_id):
+        return {"error": "Trade session not found"}
+    return {"deleted": session_id}
+
+
+def _trade_session_response(session_id: str, session, league_meta):
+    """Ответ сессии: текущий вариант трейда и его анализ (из кэша или на контексте сессии)."""
+    request = session['request']
+    analysis = trade_result_cache.get_or_compute(
+        league_meta,
+        trade_analysis_key(league_meta, request),
+        lambda: _analyze_trade_in_context(request, session['context'], league_meta)
+    )
+    return {
+        "session_id": session_id,
+        "trade": {
+            "my_team_id": request.my_team_id,
+            "their_team_id": request.their_team_id,
+            "i_give": request.i_give,
+            "i_receive": request.i_receive,
+            "punt_categories": request.punt_categories
+        },
+        "analysis": analysis
+    }
+
+
+def _analyze_trade_in_context(request: TradeAnalysisRequest, context: TradeEvaluationContext, league_meta):
+    """Анализ одного трейда на готовом контексте лиги (формат ответа /trade-analysis)."""
+    z_scores_by_name = context.z_scores_by_name
     
     # Хелпер выбора состава в соответствии с режимом симуляции
     def select_roster(team_players, team_id, allow_custom=True):
@@ -62,8 +207,8 @@ def analyze_trade(
         return team_players
     
     # Фильтруем игроков по командам (полный состав до применения top_n/custom)
-    my_team_players_full = [p for p in data['players'] if p['team_id'] == request.my_team_id]
-    their_team_players_full = [p for p in data['players'] if p['team_id'] == request.their_team_id]
+    my_team_players_full = [p for p in context.players if p['team_id'] == request.my_team_id]
+    their_team_players_full = [p for p in context.players if p['team_id'] == request.their_team_id]
     
     # Применяем режим симуляции: ДО трейда учитываем custom_team_players, ПОСЛЕ — только авто top_n
     my_team_players = select_roster(my_team_players_full, request.my_team_id, allow_custom=True)
@@ -204,49 +349,18 @@ def analyze_trade(
     my_trade_name = my_team_name
     their_trade_name = their_team_name
     
-    # Создаем списки игроков ДО и ПОСЛЕ трейда
-    # ДО трейда: все игроки как есть
-    all_players_before = data['players'].copy()
-    
-    # ПОСЛЕ трейда: меняем игроков в моей и их команде
-    all_players_after = []
-    for player in data['players']:
-        player_copy = player.copy()
-        
-        # Если это игрок, которого я отдаю - переводим в их команду
-        if player['team_id'] == request.my_team_id and player['name'] in request.i_give:
-            player_copy['team_id'] = request.their_team_id
-            player_copy['team_name'] = their_team_name
-            all_players_after.append(player_copy)
-        # Если это игрок, которого я получаю - переводим в мою команду
-        elif player['team_id'] == request.their_team_id and player['name'] in request.i_receive:
-            player_copy['team_id'] = request.my_team_id
-            player_copy['team_name'] = my_team_name
-            all_players_after.append(player_copy)
-        # Все остальные игроки остаются как есть
-        else:
-            all_players_after.append(player_copy)
-    
-    # Рассчитываем места для обоих режимов ДО и ПОСЛЕ трейда
+    # После трейда пересчитываются только затронутые команды.
     # ДО трейда: используем custom_team_players (если задан)
     # ПОСЛЕ трейда: НЕ используем custom_team_players, всегда пересчитываем топ-13 автоматически
-    # Пант-категории не влияют на симуляции - используем пустой список
-    ranks_before_z = calculate_simulation_ranks(
-        all_players_before, 'z_scores', league_meta, request.period, request.simulation_mode, [],
-        request.top_n_players, request.custom_team_players
-    )
-    ranks_after_z = calculate_simulation_ranks(
-        all_players_after, 'z_scores', league_meta, request.period, request.simulation_mode, [],
-        request.top_n_players, None  # После трейда не используем custom_team_players
-    )
-    ranks_before_avg = calculate_simulation_ranks(
-        all_players_before, 'team_stats_avg', league_meta, request.period, request.simulation_mode, [],
-        request.top_n_players, request.custom_team_players
-    )
-    ranks_after_avg = calculate_simulation_ranks(
-        all_players_after, 'team_stats_avg', league_meta, request.period, request.simulation_mode, [],
-        request.top_n_players, None  # После трейда не используем custom_team_players
-    )
+    # Пант-категории не влияют на симуляции
+    transfers = {name: (request.my_team_id, request.their_team_id) for name in request.i_give}
+    transfers.update({name: (request.their_team_id, request.my_team_id) for name in request.i_receive})
+    state_after = context.apply_trade(transfers, custom_team_players=None)
+    
+    ranks_before_z = context.before['ranks']['z_scores']
+    ranks_after_z = state_after['ranks']['z_scores']
+    ranks_before_avg = context.before['ranks']['team_stats_avg']
+    ranks_after_avg = state_after['ranks']['team_stats_avg']
     
     # Формируем данные о местах для ответа
     simulation_ranks = {
@@ -277,26 +391,11 @@ def analyze_trade(
     }
     
     # Рассчитываем позиции по категориям ДО и ПОСЛЕ трейда
-    # ДО трейда: используем custom_team_players (если задан)
-    # ПОСЛЕ трейда: НЕ используем custom_team_players, всегда пересчитываем топ-13 автоматически
-    # Пант-категории не влияют на симуляции - используем пустой список
-    category_rankings_before = calculate_category_rankings(
-        all_players_before, request.my_team_id, league_meta, request.period, request.simulation_mode, [],
-        request.top_n_players, request.custom_team_players
-    )
-    category_rankings_after = calculate_category_rankings(
-        all_players_after, request.my_team_id, league_meta, request.period, request.simulation_mode, [],
-        request.top_n_players, None  # После трейда не используем custom_team_players
-    )
+    category_rankings_before = context.category_ranks(context.before, request.my_team_id)
+    category_rankings_after = context.category_ranks(state_after, request.my_team_id)
     
-    their_category_rankings_before = calculate_category_rankings(
-        all_players_before, request.their_team_id, league_meta, request.period, request.simulation_mode, [],
-        request.top_n_players, request.custom_team_players
-    )
-    their_category_rankings_after = calculate_category_rankings(
-        all_players_after, request.their_team_id, league_meta, request.period, request.simulation_mode, [],
-        request.top_n_players, None  # После трейда не используем custom_team_players
-    )
+    their_category_rankings_before = context.category_ranks(context.before, request.their_team_id)
+    their_category_rankings_after = context.category_ranks(state_after, request.their_team_id)
     
     # Формируем данные о позициях по категориям
     my_category_rankings = {}
@@ -323,7 +422,7 @@ def analyze_trade(
                     'delta': after_rank - before_rank
                 }
     
-    return {
+    result = {
         "my_team": {
             "name": my_team_name,
             "before_z": round(my_before_z, 2),
@@ -362,6 +461,28 @@ def analyze_trade(
             "their_team": their_category_rankings
         }
     }
+    
+    if request.playoff_odds:
+        result["playoff_odds"] = _trade_playoff_odds(request, context, state_after, league_meta)
+    
+    return result
+
+
+def _trade_playoff_odds(request: TradeAnalysisRequest, context: TradeEvaluationContext, state_after, league_meta):
+    """Шансы на плей-офф и ожидаемое место до и после трейда (Монте-Карло по оставшемуся расписанию)."""
+    rosters_before = {team_id: context.selected_players(context.before, team_id) for team_id, _ in context.teams}
+    rosters_after = {team_id: context.selected_players(state_after, team_id) for team_id, _ in context.teams}
+    odds, error = simulate_playoff_odds(
+        league_meta, rosters_before, rosters_after,
+        seasons=request.playoff_seasons, seed=request.playoff_seed
+    )
+    if error:
+        return {"error": error}
+    
+    teams_by_id = {team['team_id']: team for team in odds['teams']}
+    odds["my_team"] = teams_by_id.get(request.my_team_id)
+    odds["their_team"] = teams_by_id.get(request.their_team_id)
+    return odds
 
 
 @router.post("/multi-team-trade-analysis")
@@ -373,9 +494,6 @@ def analyze_multi_team_trade(
     Анализ мультикомандного трейда.
     Поддерживает любое количество команд, участвующих в трейде.
     """
-    # Учитываем режим симуляции для исключения игроков из IR
-    exclude_ir = (getattr(request, "simulation_mode", "") == "exclude_ir")
-    
     # Валидация
     validation_errors = []
     
@@ -413,39 +531,32 @@ def analyze_multi_team_trade(
             "validation_errors": validation_errors
         }
     
-    # Создаем маппинг: player_name -> new_team_id
-    player_movements = {}
+    # Индекс перемещений: игрок -> команда, которая его получает
+    receiving_team_by_player = {}
     for trade in request.trades:
-        for player_name in trade.give:
-            # Находим, какая команда получает этого игрока
-            receiving_team = None
-            for other_trade in request.trades:
-                if player_name in other_trade.receive:
-                    receiving_team = other_trade.team_id
-                    break
-            if receiving_team:
-                player_movements[player_name] = receiving_team
-    
-    # Получаем Z-scores всех игроков
-    data = calculate_z_scores(league_meta, request.period, exclude_ir=exclude_ir)
-    
-    if not data['players']:
-        return {"error": "No data found"}
-    
-    # Получаем полные данные игроков со статистикой
-    all_players_with_stats = league_meta.get_all_players_stats(request.period, 'avg', exclude_ir=exclude_ir)
-    stats_by_name = {p['name']: p['stats'] for p in all_players_with_stats}
-    z_scores_by_name = {p['name']: p['z_scores'] for p in data['players']}
-    
-    # Добавляем stats к каждому игроку
-    for player in data['players']:
-        player['stats'] = stats_by_name.get(player['name'], {})
+        for player_name in trade.receive:
+            receiving_team_by_player.setdefault(player_name, trade.team_id)
+    player_movements = {
+        player_name: receiving_team_by_player[player_name]
+        for trade in request.trades
+        for player_name in trade.give
+        if player_name in receiving_team_by_player
+    }
+    
+    # Общий контекст лиги: Z-scores, статистика и базовые симуляции считаются один раз
+    context, error = build_trade_context(
+        league_meta, request.period, request.simulation_mode, request.top_n_players, request.custom_team_players
+    )
+    if error:
+        return {"error": error}
+    z_scores_by_name = context.z_scores_by_name
+    players_by_team = context.before['players_by_team']
     
     def select_roster(team_players, team_id, allow_custom=True):
         if request.simulation_mode == "top_n":
             custom_map = request.custom_team_players if allow_custom else None
             if custom_map and team_id in custom_map:
-                selected_names = custom_map[team_id]
+                selected_names = set(custom_map[team_id])
                 team_players = [p for p in team_players if p['name'] in selected_names]
             else:
                 team_players = select_top_n_players(
@@ -456,19 +567,17 @@ def analyze_multi_team_trade(
                 )
         return team_players
     
-    # Получаем названия команд
-    all_teams = league_meta.get_teams()
-    team_names = {team.team_id: team.team_name for team in all_teams}
-    
     # Рассчитываем для каждой команды
     teams_results = []
     
     for trade in request.trades:
         team_id = trade.team_id
-        team_name = team_names.get(team_id, f"Team {team_id}")
+        team_name = context.team_names.get(team_id, f"Team {team_id}")
+        give_set = set(trade.give)
+        receive_set = set(trade.receive)
         
         # Игроки команды ДО трейда (полный состав)
-        team_players_before_full = [p for p in data['players'] if p['team_id'] == team_id]
+        team_players_before_full = players_by_team.get(team_id, [])
         team_players_before = select_roster(team_players_before_full, team_id, allow_custom=True)
         
         # Рассчитываем ДО
@@ -477,8 +586,8 @@ def analyze_multi_team_trade(
         before_raw = calculate_raw_stats(team_players_before, request.punt_categories)
         
         # Формируем состав ПОСЛЕ трейда на полном составе, затем применяем режим симуляции
-        team_players_after_full = [p for p in team_players_before_full if p['name'] not in trade.give]
-        players_received = [p for p in data['players'] if p['name'] in trade.receive]
+        team_players_after_full = [p for p in team_players_before_full if p['name'] not in give_set]
+        players_received = [p for p in context.players if p['name'] in receive_set]
         team_players_after_full.extend(players_received)
         team_players_after = select_roster(team_players_after_full, team_id, allow_custom=False)
         
@@ -488,8 +597,8 @@ def analyze_multi_team_trade(
         after_raw = calculate_raw_stats(team_players_after, request.punt_categories)
         
         # Режим "только трейд": сравниваем только пакет отдаваемых и получаемых игроков (с учетом top_n/custom ДО трейда)
-        trade_players_given = [p for p in team_players_before if p['name'] in trade.give]
-        trade_players_received = [p for p in select_roster(players_received, team_id, allow_custom=True) if p['name'] in trade.receive]
+        trade_players_given = [p for p in team_players_before if p['name'] in give_set]
+        trade_players_received = [p for p in select_roster(players_received, team_id, allow_custom=True) if p['name'] in receive_set]
         
         trade_before_z = calculate_total_z(trade_players_given, request.punt_categories)
         trade_after_z = calculate_total_z(trade_players_received, request.punt_categories)
@@ -558,40 +667,23 @@ def analyze_multi_team_trade(
             "players_received": trade.receive
         })
     
-    # Симуляция мест (аналогично analyze_trade)
-    # Создаем списки игроков ДО и ПОСЛЕ трейда
-    all_players_before = []
-    for player in data['players']:
-        all_players_before.append(player.copy())
-    
-    all_players_after = []
-    for player in data['players']:
-        player_copy = player.copy()
-        # Применяем перемещения
-        if player['name'] in player_movements:
-            player_copy['team_id'] = player_movements[player['name']]
-            player_copy['team_name'] = team_names.get(player_movements[player['name']], f"Team {player_movements[player['name']]}")
-        all_players_after.append(player_copy)
-    
+    # Симуляция мест и позиции по категориям: после трейда пересчитываются
+    # только команды-участники и их пары в матрице исходов.
     # ДО трейда: используем custom_team_players (если задан)
     # ПОСЛЕ трейда: НЕ используем custom_team_players, всегда пересчитываем топ-13 автоматически
-    # Пант-категории не влияют на симуляции - используем пустой список
-    ranks_before_z = calculate_simulation_ranks(
-        all_players_before, 'z_scores', league_meta, request.period, request.simulation_mode, [],
-        request.top_n_players, request.custom_team_players
-    )
-    ranks_after_z = calculate_simulation_ranks(
-        all_players_after, 'z_scores', league_meta, request.period, request.simulation_mode, [],
-        request.top_n_players, None  # После трейда не используем custom_team_players
-    )
-    ranks_before_avg = calculate_simulation_ranks(
-        all_players_before, 'team_stats_avg', league_meta, request.period, request.simulation_mode, [],
-        request.top_n_players, request.custom_team_players
-    )
-    ranks_after_avg = calculate_simulation_ranks(
-        all_players_after, 'team_stats_avg', league_meta, request.period, request.simulation_mode, [],
-        request.top_n_players, None  # После трейда не используем custom_team_players
-    )
+    # Пант-категории не влияют на симуляции
+    current_team_by_player = {p['name']: p['team_id'] for p in context.players}
+    transfers = {
+        player_name: (current_team_by_player[player_name], new_team_id)
+        for player_name, new_team_id in player_movements.items()
+        if player_name in current_team_by_player
+    }
+    state_after = context.apply_trade(transfers, custom_team_players=None)
+    
+    ranks_before_z = context.before['ranks']['z_scores']
+    ranks_after_z = state_after['ranks']['z_scores']
+    ranks_before_avg = context.before['ranks']['team_stats_avg']
+    ranks_after_avg = state_after['ranks']['team_stats_avg']
     
     # Формируем данные о местах для каждой команды
     simulation_ranks = {
@@ -616,17 +708,8 @@ def analyze_multi_team_trade(
     category_rankings = {}
     for trade in request.trades:
         team_id = trade.team_id
-        # ДО трейда: используем custom_team_players (если задан)
-        # ПОСЛЕ трейда: НЕ используем custom_team_players, всегда пересчитываем топ-13 автоматически
-        # Пант-категории не влияют на симуляции - используем пустой список
-        category_rankings_before = calculate_category_rankings(
-            all_players_before, team_id, league_meta, request.period, request.simulation_mode, [],
-            request.top_n_players, request.custom_team_players
-        )
-        category_rankings_after = calculate_category_rankings(
-            all_players_after, team_id, league_meta, request.period, request.simulation_mode, [],
-            request.top_n_players, None  # После трейда не используем custom_team_players
-        )
+        category_rankings_before = context.category_ranks(context.before, team_id)
+        category_rankings_after = context.category_ranks(state_after, team_id)
         
         # Формируем данные о позициях по категориям
         team_category_rankings = {}
@@ -653,3 +736,82 @@ def analyze_multi_team_trade(
         }
     }
 
+
+@router.post("/trade-search")
+def search_league_trades(
+    request: TradeSearchRequest,
+    league_meta=Depends(get_league_meta)
+):
+    """Ищет выгодные трейды 1-на-1, 2-на-1 и 2-на-2 со всеми командами лиги."""
+    result, error = search_trades(
+        league_meta,
+        request.my_team_id,
+        period=request.period,
+        punt_categories=request.punt_categories,
+        simulation_mode=request.simulation_mode,
+        top_n_players=request.top_n_players,
+        metric=request.metric,
+        rank_mode=request.rank_mode,
+        package_sizes=request.package_sizes,
+        partner_team_ids=request.partner_team_ids,
+        max_partner_loss=request.max_partner_loss,
+        top_k=request.top_k,
+        max_evaluations=request.max_evaluations,
+        time_budget=request.time_budget,
+        workers=request.workers
+    )
+    if error:
+        return {"error": error}
+    return result
+
+
+@router.post("/trade-search/three-team")
+def search_three_team_league_trades(
+    request: ThreeTeamTradeSearchRequest,
+    league_meta=Depends(get_league_meta)
+):
+    """Ищет трехсторонние трейды-циклы (я -> B -> C -> я) лучевым поиском."""
+    result, error = search_three_team_trades(
+        league_meta,
+        request.my_team_id,
+        period=request.period,
+        punt_categories=request.punt_categories,
+        simulation_mode=request.simulation_mode,
+        top_n_players=request.top_n_players,
+        metric=request.metric,
+        rank_mode=request.rank_mode,
+        partner_team_ids=request.partner_team_ids,
+        max_partner_loss=request.max_partner_loss,
+        beam_width=request.beam_width,
+        top_k=request.top_k,
+        max_evaluations=request.max_evaluations,
+        time_budget=request.time_budget,
+        workers=request.workers
+    )
+    if error:
+        return {"error": error}
+    return result
+
+
+@router.get("/trade-swap-matrix")
+def get_trade_swap_matrix(
+    my_team_id: int,
+    their_team_id: int,
+    period: str = "2026_total",
+    punt_categories: str = "",  # Список через запятую
+    simulation_mode: str = "all",
+    top_n_players: int = 13,
+    rank_mode: str = "team_stats_avg",
+    league_meta=Depends(get_league_meta)
+):
+    """
+    Матрица обменов 1-на-1 между двумя командами (мои игроки × их игроки)
+    для тепловой карты обменов.
+    """
+    punt_list = [cat.strip() for cat in punt_categories.split(',') if cat.strip()]
+    result, error = build_swap_matrix(
+        league_meta, my_team_id, their_team_id, period, punt_list, simulation_mode, top_n_players, rank_mode
+    )
+    if error:
+        return {"error": error}
+    return result
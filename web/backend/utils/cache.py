@@ -0,0 +1,120 @@
+"""
+Кэш результатов расчетов, привязанный к снимку данных лиги.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+import threading
+
+
+class SnapshotCache:
+    """
+    Ограниченный LRU-кэш, который сбрасывается при смене версии снимка данных лиги.
+    Версия снимка берется из league_meta.get_snapshot_version() и меняется после каждого обновления.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        """
+        Args:
+            maxsize: Максимальное количество записей в кэше
+        """
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _sync_version(self, league_meta) -> None:
+        """Сбрасывает кэш, если данные лиги были обновлены. Вызывается под блокировкой."""
+        version = league_meta.get_snapshot_version()
+        if version != self._version:
+            self._data.clear()
+            self._version = version
+
+    def get(self, league_meta, key: Hashable, default=None) -> Any:
+        """
+        Получает значение из кэша.
+
+        Args:
+            league_meta: Экземпляр LeagueMetadata (для проверки версии снимка)
+            key: Ключ записи
+            default: Значение по умолчанию, если записи нет
+
+        Returns:
+            Значение из кэша или default
+        """
+        with self._lock:
+            self._sync_version(league_meta)
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, league_meta, key: Hashable, value: Any, version: Optional[int] = None) -> None:
+        """
+        Сохраняет значение в кэш, вытесняя самые старые записи при переполнении.
+
+        Args:
+            league_meta: Экземпляр LeagueMetadata (для проверки версии снимка)
+            key: Ключ записи
+            value: Значение
+            version: Версия снимка, по которой рассчитано значение. Если данные лиги
+                     с тех пор обновились, значение устарело и не сохраняется
+        """
+        with self._lock:
+            self._sync_version(league_meta)
+            if version is not None and version != self._version:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, league_meta, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Возвращает значение из кэша или рассчитывает и сохраняет его.
+        Расчет выполняется вне блокировки, чтобы не блокировать другие запросы;
+        если данные лиги обновились во время расчета, результат возвращается, но не сохраняется.
+        Результат None означает неудачный расчет (например, ошибку запроса к ESPN) и тоже
+        не сохраняется, чтобы следующий запрос повторил расчет.
+
+        Args:
+            league_meta: Экземпляр LeagueMetadata
+            key: Ключ записи
+            compute: Функция без аргументов для расчета значения (None - ошибка)
+
+        Returns:
+            Значение из кэша или результат compute()
+        """
+        missing = object()
+        version = league_meta.get_snapshot_version()
+        value = self.get(league_meta, key, missing)
+        if value is not missing:
+            return value
+        value = compute()
+        if value is not None:
+            self.set(league_meta, key, value, version)
+        return value
+
+    def clear(self) -> None:
+        """Полностью очищает кэш."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Получает статистику использования кэша.
+
+        Returns:
+            Словарь {'size': int, 'maxsize': int, 'hits': int, 'misses': int, 'snapshot_version': int}
+        """
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'snapshot_version': self._version
+            }
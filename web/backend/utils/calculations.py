@@ -201,370 +201,6 @@ def calculate_team_raw_stats(team_players):
     return raw_stats
 
 
-def calculate_simulation_ranks(all_players_list, mode_type, league_meta, period, simulation_mode, punt_categories, top_n_players=13, custom_team_players=None):
-    """
-    Рассчитывает симуляцию для всех команд и возвращает места в рейтинге.
-    Использует тот же метод, что и /api/simulation - симуляцию "все против всех".
-    
-    Args:
-        all_players_list: Список всех игроков лиги (с учетом или без учета трейда)
-        mode_type: 'z_scores' или 'team_stats_avg'
-        league_meta: Экземпляр LeagueMetadata
-        period: Период для расчета
-        simulation_mode: 'all', 'exclude_ir' или 'top_n'
-        punt_categories: Список категорий для исключения (punt)
-        top_n_players: Количество игроков для режима 'top_n' (по умолчанию 13)
-        custom_team_players: Словарь {team_id: [список имен игроков]} для ручного выбора игроков
-    
-    Returns:
-        dict: Словарь {team_id: rank} где rank - место в рейтинге (1 = первое место)
-    """
-    from core.z_score import calculate_z_scores
-    
-    # Определяем exclude_ir на основе simulation_mode
-    exclude_ir = (simulation_mode == "exclude_ir")
-    
-    # Получаем все команды
-    teams = league_meta.get_teams()
-    team_stats = {}
-    
-    if mode_type == 'z_scores':
-        # Режим по Z-score
-        # Группируем игроков по командам
-        players_by_team = {}
-        for player in all_players_list:
-            team_id = player['team_id']
-            if team_id not in players_by_team:
-                players_by_team[team_id] = []
-            players_by_team[team_id].append(player)
-        
-        # Если режим "top_n", применяем логику выбора топ-N игроков
-        if simulation_mode == "top_n":
-            z_scores_by_name = {p['name']: p['z_scores'] for p in all_players_list if 'z_scores' in p}
-            
-            # Применяем логику выбора топ-N для каждой команды
-            for team in teams:
-                if team.team_id in players_by_team:
-                    team_players = players_by_team[team.team_id]
-                    
-                    # Для custom_team_players используем выбранных игроков или топ-N
-                    if custom_team_players and team.team_id in custom_team_players:
-                        # Фильтруем только выбранных игроков
-                        selected_names = custom_team_players[team.team_id]
-                        team_players = [p for p in team_players if p['name'] in selected_names]
-                    else:
-                        # Выбираем топ-N игроков
-                        team_players = select_top_n_players(
-                            team_players, 
-                            top_n_players, 
-                            punt_categories=punt_categories, 
-                            z_scores_data=z_scores_by_name
-                        )
-                    
-                    players_by_team[team.team_id] = team_players
-        
-        # Рассчитываем Z-scores для каждой команды
-        for team in teams:
-            if team.team_id in players_by_team:
-                team_players = players_by_team[team.team_id]
-                cat_totals = {cat: 0 for cat in CATEGORIES}
-                for player in team_players:
-                    for cat in CATEGORIES:
-                        if cat not in punt_categories:
-                            z_val = player['z_scores'].get(cat, 0)
-                            if math.isfinite(z_val):
-                                cat_totals[cat] += z_val
-                
-                team_stats[team.team_id] = {
-                    'name': team.team_name,
-                    'stats': cat_totals
-                }
-    
-    elif mode_type == 'team_stats_avg':
-        # Режим по статистике команд (avg)
-        # Получаем статистику всех игроков за период
-        all_players_week_stats = league_meta.get_all_players_stats(period, 'avg', exclude_ir=exclude_ir)
-        
-        # Создаем словарь для быстрого поиска stats по имени
-        stats_by_name = {p['name']: p['stats'] for p in all_players_week_stats}
-        
-        # Группируем игроков по командам (с учетом перемещений из all_players_list)
-        players_by_team = {}
-        for player in all_players_list:
-            team_id = player['team_id']
-            if team_id not in players_by_team:
-                players_by_team[team_id] = []
-            # Получаем stats для этого игрока
-            player_stats = stats_by_name.get(player['name'], {})
-            players_by_team[team_id].append({
-                'name': player['name'],
-                'stats': player_stats
-            })
-        
-        # Если режим "top_n", применяем логику выбора топ-N игроков
-        if simulation_mode == "top_n":
-            # Получаем Z-scores для всех игроков (для сортировки)
-            z_data = calculate_z_scores(league_meta, period, exclude_ir=False)
-            z_scores_by_name = {p['name']: p['z_scores'] for p in z_data['players']}
-            
-            # Применяем логику выбора топ-N для каждой команды
-            for team in teams:
-                if team.team_id in players_by_team:
-                    team_players = players_by_team[team.team_id]
-                    
-                    # Для custom_team_players используем выбранных игроков или топ-N
-                    if custom_team_players and team.team_id in custom_team_players:
-                        # Фильтруем только выбранных игроков
-                        selected_names = custom_team_players[team.team_id]
-                        team_players = [p for p in team_players if p['name'] in selected_names]
-                    else:
-                        # Выбираем топ-N игроков
-                        team_players = select_top_n_players(
-                            team_players, 
-                            top_n_players, 
-                            punt_categories=punt_categories, 
-                            z_scores_data=z_scores_by_name
-                        )
-                    
-                    players_by_team[team.team_id] = team_players
-        
-        # Рассчитываем статистику команды (как в /api/simulation)
-        for team in teams:
-            if team.team_id in players_by_team:
-                team_players = players_by_team[team.team_id]
-                team_raw_stats = calculate_raw_stats(team_players, punt_categories)
-                
-                # Преобразуем в формат для сравнения (только нужные категории)
-                filtered_stats = {}
-                for cat in CATEGORIES:
-                    if cat not in punt_categories:
-                        if cat in team_raw_stats:
-                            filtered_stats[cat] = team_raw_stats[cat]
-                        else:
-                            filtered_stats[cat] = 0.0
-                
-                team_stats[team.team_id] = {
-                    'name': team.team_name,
-                    'stats': filtered_stats
-                }
-            else:
-                # Команда без игроков
-                team_stats[team.team_id] = {
-                    'name': team.team_name,
-                    'stats': {cat: 0.0 for cat in CATEGORIES}
-                }
-    
-    if not team_stats:
-        return {}
-    
-    # Симуляция "все против всех"
-    team_ids = list(team_stats.keys())
-    simulation_results = {tid: {'wins': 0, 'losses': 0, 'ties': 0} for tid in team_ids}
-    
-    for i in range(len(team_ids)):
-        id1 = team_ids[i]
-        stats1 = team_stats[id1]['stats']
-        
-        for j in range(i + 1, len(team_ids)):
-            id2 = team_ids[j]
-            stats2 = team_stats[id2]['stats']
-            
-            # Сравнение двух команд
-            wins1 = 0
-            wins2 = 0
-            
-            for cat in CATEGORIES:
-                if cat not in punt_categories:
-                    val1 = stats1.get(cat, 0.0)
-                    val2 = stats2.get(cat, 0.0)
-                    
-                    # TO (Turnovers) - чем меньше, тем лучше
-                    if cat == 'TO':
-                        if val1 < val2: wins1 += 1
-                        elif val2 < val1: wins2 += 1
-                    else:
-                        if val1 > val2: wins1 += 1
-                        elif val2 > val1: wins2 += 1
-            
-            # Обновляем результаты
-            if wins1 > wins2:
-                simulation_results[id1]['wins'] += 1
-                simulation_results[id2]['losses'] += 1
-            elif wins2 > wins1:
-                simulation_results[id2]['wins'] += 1
-                simulation_results[id1]['losses'] += 1
-            else:
-                simulation_results[id1]['ties'] += 1
-                simulation_results[id2]['ties'] += 1
-    
-    # Формируем итоговый список с винрейтом
-    final_results = []
-    for team_id, result in simulation_results.items():
-        wins = result['wins']
-        losses = result['losses']
-        ties = result['ties']
-        total_games = wins + losses + ties
-        
-        win_rate = (wins + 0.5 * ties) / total_games if total_games > 0 else 0
-        
-        final_results.append({
-            'team_id': team_id,
-            'name': team_stats[team_id]['name'],
-            'wins': wins,
-            'losses': losses,
-            'ties': ties,
-            'win_rate': win_rate
-        })
-    
-    # Сортируем по винрейту
-    final_results.sort(key=lambda x: x['win_rate'], reverse=True)
-    
-    # Создаем словарь {team_id: rank}
-    ranks = {}
-    for rank, team_result in enumerate(final_results, 1):
-        ranks[team_result['team_id']] = rank
-    
-    return ranks
-
-
-def calculate_category_rankings(all_players_list, team_id, league_meta, period, simulation_mode, punt_categories, top_n_players=13, custom_team_players=None):
-    """
-    Рассчитывает позиции команды по категориям в лиге.
-    Аналогично логике из /api/dashboard/{team_id}/category-rankings.
-    
-    Args:
-        all_players_list: Список всех игроков лиги (с учетом или без учета трейда)
-        team_id: ID команды для которой рассчитываем позиции
-        league_meta: Экземпляр LeagueMetadata
-        period: Период для расчета
-        simulation_mode: 'all', 'exclude_ir' или 'top_n'
-        punt_categories: Список категорий для исключения (punt)
-        top_n_players: Количество игроков для режима 'top_n' (по умолчанию 13)
-        custom_team_players: Словарь {team_id: [список имен игроков]} для ручного выбора игроков
-    
-    Returns:
-        dict: Словарь {category: rank} где rank - позиция в лиге (1 = первое место)
-    """
-    # Определяем exclude_ir на основе simulation_mode
-    exclude_ir = (simulation_mode == "exclude_ir")
-    
-    # Получаем статистику всех игроков за период
-    all_players_week_stats = league_meta.get_all_players_stats(period, 'avg', exclude_ir=exclude_ir)
-    
-    # Создаем словарь для быстрого поиска stats по имени
-    stats_by_name = {p['name']: p['stats'] for p in all_players_week_stats}
-    
-    # Группируем игроков по командам (с учетом перемещений из all_players_list)
-    players_by_team = {}
-    for player in all_players_list:
-        team_id_player = player['team_id']
-        if team_id_player not in players_by_team:
-            players_by_team[team_id_player] = []
-        # Получаем stats для этого игрока
-        player_stats = stats_by_name.get(player['name'], {})
-        players_by_team[team_id_player].append({
-            'name': player['name'],
-            'stats': player_stats
-        })
-    
-    # Если режим "top_n", применяем логику выбора топ-N игроков
-    if simulation_mode == "top_n":
-        from core.z_score import calculate_z_scores
-        # Получаем Z-scores для всех игроков (для сортировки)
-        z_data = calculate_z_scores(league_meta, period, exclude_ir=False)
-        z_scores_by_name = {p['name']: p['z_scores'] for p in z_data['players']}
-        
-        # Получаем все команды
-        teams = league_meta.get_teams()
-        
-        # Применяем логику выбора топ-N для каждой команды
-        for team_obj in teams:
-            if team_obj.team_id in players_by_team:
-                team_players = players_by_team[team_obj.team_id]
-                
-                # Для custom_team_players используем выбранных игроков или топ-N
-                if custom_team_players and team_obj.team_id in custom_team_players:
-                    # Фильтруем только выбранных игроков
-                    selected_names = custom_team_players[team_obj.team_id]
-                    team_players = [p for p in team_players if p['name'] in selected_names]
-                else:
-                    # Выбираем топ-N игроков
-                    team_players = select_top_n_players(
-                        team_players, 
-                        top_n_players, 
-                        punt_categories=punt_categories, 
-                        z_scores_data=z_scores_by_name
-                    )
-                
-                players_by_team[team_obj.team_id] = team_players
-    
-    # Получаем все команды
-    teams = league_meta.get_teams()
-    
-    # Рассчитываем статистику для каждой команды
-    team_stats = {}
-    for team_obj in teams:
-        if team_obj.team_id in players_by_team:
-            team_players = players_by_team[team_obj.team_id]
-            team_raw_stats = calculate_team_raw_stats(team_players)
-            
-            # Фильтруем только нужные категории
-            filtered_stats = {}
-            for cat in CATEGORIES:
-                if cat not in punt_categories:
-                    if cat in team_raw_stats:
-                        filtered_stats[cat] = team_raw_stats[cat]
-                    else:
-                        filtered_stats[cat] = 0.0
-            
-            team_stats[team_obj.team_id] = {
-                'name': team_obj.team_name,
-                'stats': filtered_stats
-            }
-        else:
-            # Команда без игроков
-            team_stats[team_obj.team_id] = {
-                'name': team_obj.team_name,
-                'stats': {cat: 0.0 for cat in CATEGORIES if cat not in punt_categories}
-            }
-    
-    if team_id not in team_stats:
-        return {}
-    
-    my_team_stats = team_stats[team_id]['stats']
-    category_rankings = {}
-    
-    # Рассчитываем позицию по каждой категории
-    for cat in CATEGORIES:
-        if cat in punt_categories:
-            continue
-            
-        # Собираем значения всех команд по этой категории
-        category_values = []
-        for tid, team_data in team_stats.items():
-            value = team_data['stats'].get(cat, 0.0)
-            category_values.append({
-                'team_id': tid,
-                'value': value
-            })
-        
-        # Сортируем по убыванию (больше = лучше)
-        category_values.sort(key=lambda x: x['value'], reverse=True)
-        
-        # Находим позицию нашей команды
-        my_value = my_team_stats.get(cat, 0.0)
-        rank = 1
-        for team_data in category_values:
-            if team_data['team_id'] == team_id:
-                break
-            if team_data['value'] > my_value:
-                rank += 1
-        
-        category_rankings[cat] = rank
-    
-    return category_rankings
-
-
 def select_top_n_players(team_players: list, n: int, punt_categories: list = None, z_scores_data: dict = None) -> list:
     """
     Выбирает топ-N игроков команды по total Z-score.
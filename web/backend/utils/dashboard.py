@@ -0,0 +1,580 @@
+"""
+Виджеты дашборда команды, рассчитываемые из общего контекста запроса.
+Статистика игроков, Z-scores и статистика команд загружаются лениво и не более
+одного раза на запрос, результаты матчапов недель читаются из таблицы результатов сезона,
+поэтому составной дашборд обходится одним проходом по составам.
+"""
+from core.config import CATEGORIES
+from core.z_score import calculate_z_scores_from_stats
+from utils.calculations import calculate_team_raw_stats, select_top_n_players
+from utils.rank_matrix import get_rank_matrix
+from utils.schedule import get_completed_records, schedule_store
+from utils.season_results import season_results
+from utils.simulation import encode_matchup, run_round_robin
+from utils.standings import get_team_standing
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import math
+
+
+def _parse_custom_players(custom_team_players: Optional[str]) -> Optional[List[str]]:
+    """Парсит выбранных игроков из строки через запятую."""
+    if not custom_team_players:
+        return None
+    return [name.strip() for name in custom_team_players.split(',') if name.strip()]
+
+
+class DashboardContext:
+    """
+    Общие данные одного запроса дашборда.
+    Каждый источник (avg статистика игроков, Z-scores, статистика команд)
+    рассчитывается при первом обращении и переиспользуется всеми виджетами.
+    """
+    
+    def __init__(
+        self,
+        league_meta,
+        team_id: int,
+        period: str = "2026_total",
+        simulation_mode: str = "all",
+        top_n_players: int = 13,
+        custom_team_players: Optional[str] = None
+    ):
+        """
+        Args:
+            league_meta: Экземпляр LeagueMetadata
+            team_id: ID команды
+            period: Период статистики
+            simulation_mode: 'all', 'exclude_ir' или 'top_n'
+            top_n_players: Количество игроков для режима 'top_n'
+            custom_team_players: Выбранные игроки команды через запятую (для режима 'top_n')
+        """
+        self.league_meta = league_meta
+        self.team_id = team_id
+        self.period = period
+        self.simulation_mode = simulation_mode
+        self.top_n_players = top_n_players
+        self.custom_players_list = _parse_custom_players(custom_team_players)
+        self.exclude_ir = (simulation_mode == "exclude_ir")
+        self.team = league_meta.get_team_by_id(team_id)
+        self.current_week = league_meta.league.currentMatchupPeriod
+        self._players = {}
+        self._z_data = {}
+        self._team_stats = None
+    
+    def for_team(self, team_id: int) -> 'DashboardContext':
+        """
+        Контекст другой команды с теми же параметрами, использующий уже загруженные
+        данные лиги (avg статистику и Z-scores игроков, статистику команд).
+        Выбранные игроки (custom_team_players) относятся к исходной команде и не переносятся.
+        """
+        ctx = DashboardContext(self.league_meta, team_id, self.period, self.simulation_mode, self.top_n_players)
+        ctx._players = self._players
+        ctx._z_data = self._z_data
+        if not self.custom_players_list:
+            ctx._team_stats = self._team_stats
+        return ctx
+    
+    def players(self, exclude_ir: bool) -> List[Dict[str, Any]]:
+        """avg статистика всех игроков лиги (get_all_players_stats)."""
+        if exclude_ir not in self._players:
+            self._players[exclude_ir] = self.league_meta.get_all_players_stats(self.period, 'avg', exclude_ir=exclude_ir)
+        return self._players[exclude_ir]
+    
+    def z_data(self, exclude_ir: bool) -> Dict[str, Any]:
+        """Z-scores всех игроков лиги (как calculate_z_scores) по уже загруженной статистике."""
+        if exclude_ir not in self._z_data:
+            self._z_data[exclude_ir] = calculate_z_scores_from_stats(self.players(exclude_ir))
+        return self._z_data[exclude_ir]
+    
+    def week_table(self, week: int) -> Optional[Dict[int, Dict[str, Any]]]:
+        """Таблица команд недели из таблицы результатов сезона (формат load_week_table)."""
+        results = season_results.get_week(self.league_meta, week)
+        return results['teams'] if results else None
+    
+    def team_stats(self) -> Dict[int, Dict[str, Any]]:
+        """
+        Статистика всех команд по категориям с учетом simulation_mode
+        (в режиме 'top_n' - топ-N игроков или выбранные игроки для запрошенной команды).
+        
+        Returns:
+            dict: {team_id: {'name': str, 'stats': {category: value}}}
+        """
+        if self._team_stats is not None:
+            return self._team_stats
+        
+        players_by_team = {}
+        for player in self.players(self.exclude_ir):
+            players_by_team.setdefault(player['team_id'], []).append(player)
+        
+        teams = self.league_meta.get_teams()
+        
+        if self.simulation_mode == "top_n":
+            # Z-scores для сортировки (режим top_n использует всех игроков, включая IR)
+            z_scores_by_name = {p['name']: p['z_scores'] for p in self.z_data(False)['players']}
+            for team_obj in teams:
+                if team_obj.team_id not in players_by_team:
+                    continue
+                team_players = players_by_team[team_obj.team_id]
+                if team_obj.team_id == self.team_id and self.custom_players_list:
+                    team_players = [p for p in team_players if p['name'] in self.custom_players_list]
+                else:
+                    team_players = select_top_n_players(
+                        team_players,
+                        self.top_n_players,
+                        punt_categories=[],
+                        z_scores_data=z_scores_by_name
+                    )
+                players_by_team[team_obj.team_id] = team_players
+        
+        team_stats = {}
+        for team_obj in teams:
+            if team_obj.team_id in players_by_team:
+                team_raw_stats = calculate_team_raw_stats(players_by_team[team_obj.team_id])
+                stats = {cat: team_raw_stats.get(cat, 0.0) for cat in CATEGORIES}
+            else:
+                # Команда без игроков
+                stats = {cat: 0.0 for cat in CATEGORIES}
+            team_stats[team_obj.team_id] = {'name': team_obj.team_name, 'stats': stats}
+        
+        self._team_stats = team_stats
+        return team_stats
+    
+    def roster_key(self) -> Tuple:
+        """Ключ конфигурации составов: от нее зависит статистика команд (team_stats)."""
+        if self.simulation_mode != "top_n":
+            return (self.period, self.simulation_mode)
+        custom = (self.team_id, tuple(self.custom_players_list)) if self.custom_players_list else None
+        return (self.period, self.simulation_mode, self.top_n_players, custom)
+    
+    def rank_matrix(self) -> Optional[Dict[str, Any]]:
+        """
+        Матрица мест всех команд по категориям (utils.rank_matrix), кэшируется до обновления данных лиги.
+        None, если статистики игроков нет.
+        """
+        def compute():
+            if not self.players(self.exclude_ir):
+                return None
+            return self.team_stats()
+        
+        return get_rank_matrix(self.league_meta, ('dashboard',) + self.roster_key(), compute)
+
+
+def build_overview(ctx: DashboardContext) -> Dict[str, Any]:
+    """
+    Основной виджет дашборда: информация о команде, текущий матчап,
+    топ-3 игрока по Z-score и травмированные игроки.
+    """
+    if not ctx.team:
+        return {"error": "Team not found"}
+    
+    roster = ctx.league_meta.get_team_roster(ctx.team_id)
+    team_players = [p for p in ctx.z_data(ctx.exclude_ir)['players'] if p['team_id'] == ctx.team_id]
+    
+    # Общий Z-score команды и топ-3 игрока
+    total_z_score = 0
+    players_with_totals = []
+    for player in team_players:
+        total = sum(z for z in player['z_scores'].values() if math.isfinite(z))
+        total_z_score += total
+        players_with_totals.append({
+            'name': player['name'],
+            'position': player['position'],
+            'total_z': total,
+            'z_scores': player['z_scores']
+        })
+    
+    players_with_totals.sort(key=lambda x: x['total_z'], reverse=True)
+    top_players = players_with_totals[:3]
+    
+    # Текущий матчап
+    current_matchup = None
+    table = ctx.week_table(ctx.current_week)
+    entry = table.get(ctx.team_id) if table else None
+    if entry and entry['has_lineup']:
+        current_matchup = {
+            'week': ctx.current_week,
+            'opponent_name': entry['opponent_name'],
+            'opponent_id': entry['opponent_id']
+        }
+    
+    # Позиция в лиге из турнирной таблицы
+    standing = get_team_standing(ctx.league_meta, ctx.team_id)
+    
+    # Травмированные игроки
+    injured_players = []
+    for player in roster:
+        injury_status = getattr(player, 'injuryStatus', 'ACTIVE')
+        is_injured = getattr(player, 'injured', False)
+        
+        if is_injured or injury_status not in ['ACTIVE', None]:
+            injured_players.append({
+                'name': player.name,
+                'position': getattr(player, 'position', 'N/A'),
+                'injury_status': injury_status,
+                'in_ir': getattr(player, 'lineupSlot', '') == 'IR'
+            })
+    
+    return {
+        "team_id": ctx.team_id,
+        "team_name": ctx.team.team_name,
+        "league_position": standing['rank'] if standing else None,
+        "roster_size": len(roster),
+        "total_z_score": round(total_z_score, 2),
+        "current_matchup": current_matchup,
+        "top_players": top_players,
+        "injured_players": injured_players,
+        "period": ctx.period
+    }
+
+
+def build_matchup_details(ctx: DashboardContext, week: Optional[int] = None) -> Dict[str, Any]:
+    """Сравнение статистики команды и соперника по всем категориям в матчапе недели (по умолчанию текущей)."""
+    if week is None:
+        week = ctx.current_week
+    
+    matchup, error = season_results.get_team_week(ctx.league_meta, week, ctx.team_id)
+    if error:
+        return {"error": error}
+    
+    categories_data = [
+        {
+            'category': cat,
+            'my_value': matchup['stats'].get(cat, 0.0),
+            'opponent_value': matchup['opponent_stats'].get(cat, 0.0),
+            'winner': matchup['category_results'][cat]
+        }
+        for cat in CATEGORIES
+    ]
+    
+    return {
+        'week': week,
+        'my_team': {
+            'id': ctx.team_id,
+            'name': matchup['team_name'],
+            'wins': matchup['wins']
+        },
+        'opponent': {
+            'id': matchup['opponent_id'],
+            'name': matchup['opponent_name'],
+            'wins': matchup['opponent_wins']
+        },
+        'score': matchup['score'],
+        'categories': categories_data
+    }
+
+
+def build_matchup_history(ctx: DashboardContext) -> Dict[str, Any]:
+    """История матчапов команды за завершенные недели (от новых к старым)."""
+    matchup_history = [
+        {
+            'week': matchup['week'],
+            'opponent_id': matchup['opponent_id'],
+            'opponent_name': matchup['opponent_name'],
+            'my_wins': matchup['wins'],
+            'opponent_wins': matchup['opponent_wins'],
+            'ties': matchup['ties'],
+            'score': matchup['score'],
+            'result': matchup['result']
+        }
+        for matchup in reversed(season_results.get_team_history(ctx.league_meta, ctx.team_id))
+    ]
+    
+    return {
+        'team_id': ctx.team_id,
+        'matchups': matchup_history
+    }
+
+
+def build_head_to_head(ctx: DashboardContext, opponent_id: int) -> Dict[str, Any]:
+    """Личные встречи команды с соперником за завершенные недели (от новых к старым)."""
+    opponent = ctx.league_meta.get_team_by_id(opponent_id)
+    if not ctx.team or not opponent:
+        return {"error": "Team not found"}
+    
+    head_to_head = season_results.get_head_to_head(ctx.league_meta, ctx.team_id, opponent_id)
+    matchups = [
+        {
+            'week': matchup['week'],
+            'my_wins': matchup['wins'],
+            'opponent_wins': matchup['opponent_wins'],
+            'ties': matchup['ties'],
+            'score': matchup['score'],
+            'result': matchup['result'],
+            'categories': matchup['category_results']
+        }
+        for matchup in reversed(head_to_head['matchups'])
+    ]
+    
+    return {
+        'team_id': ctx.team_id,
+        'team_name': ctx.team.team_name,
+        'opponent_id': opponent_id,
+        'opponent_name': opponent.team_name,
+        'record': {
+            'wins': head_to_head['wins'],
+            'losses': head_to_head['losses'],
+            'ties': head_to_head['ties']
+        },
+        'category_record': {
+            'wins': head_to_head['category_wins'],
+            'losses': head_to_head['category_losses'],
+            'ties': head_to_head['category_ties']
+        },
+        'matchups': matchups
+    }
+
+
+def build_category_rankings(ctx: DashboardContext) -> Dict[str, Any]:
+    """Рейтинг команды по категориям на основе avg статистики: топ-3 сильных категорий и полный рейтинг."""
+    if not ctx.team:
+        return {"error": "Team not found"}
+    
+    matrix = ctx.rank_matrix()
+    if matrix is None:
+        return {"error": "No data found"}
+    
+    row = matrix['index'].get(ctx.team_id)
+    if row is None:
+        return {"error": "Team not found in stats"}
+    
+    # Место и значение команды по каждой категории - строка матрицы
+    all_rankings = [
+        {
+            'category': cat,
+            'rank': matrix['ranks'][row][col],
+            'value': round(matrix['values'][row][col], 2)
+        }
+        for col, cat in enumerate(matrix['categories'])
+    ]
+    
+    # Команды лиги по каждой категории (по убыванию значения)
+    category_teams_data = {
+        cat: [
+            {
+                'rank': pos,
+                'team_id': matrix['team_ids'][idx],
+                'team_name': matrix['names'][idx],
+                'value': round(matrix['values'][idx][col], 2)
+            }
+            for pos, idx in enumerate(matrix['order'][cat], 1)
+        ]
+        for col, cat in enumerate(matrix['categories'])
+    }
+    
+    # Топ-3 категории: лучшие позиции, при равных рангах - большее значение
+    all_rankings_sorted = sorted(all_rankings, key=lambda x: (x['rank'], -x['value']))
+    
+    return {
+        'team_id': ctx.team_id,
+        'team_name': matrix['names'][row],
+        'top_categories': all_rankings_sorted[:3],
+        'all_rankings': all_rankings,
+        'category_teams': category_teams_data  # Топ команд по каждой категории
+    }
+
+
+def build_position_history(ctx: DashboardContext) -> Dict[str, Any]:
+    """Позиция команды по неделям в симуляции "все против всех" по статистике недели."""
+    if not ctx.team:
+        return {"error": "Team not found"}
+    
+    position_history = []
+    
+    for week in range(1, ctx.current_week + 1):
+        try:
+            table = ctx.week_table(week)
+            if not table:
+                continue
+            
+            team_stats = {
+                tid: {'name': entry['team_name'], 'stats': entry['stats']}
+                for tid, entry in table.items()
+                if entry['stats'] is not None
+            }
+            if ctx.team_id not in team_stats:
+                # Если нет данных для этой недели, пропускаем
+                continue
+            
+            result = run_round_robin(team_stats)
+            final_results = []
+            for idx, tid in enumerate(result['team_ids']):
+                wins = result['wins'][idx]
+                losses = result['losses'][idx]
+                ties = result['ties'][idx]
+                total_games = wins + losses + ties
+                win_rate = (wins + 0.5 * ties) / total_games if total_games > 0 else 0
+                final_results.append({'team_id': tid, 'wins': wins, 'win_rate': win_rate})
+            
+            # Сортируем по винрейту
+            final_results.sort(key=lambda x: (x['win_rate'], x['wins']), reverse=True)
+            
+            position = next(
+                (idx + 1 for idx, team_result in enumerate(final_results) if team_result['team_id'] == ctx.team_id),
+                None
+            )
+            if position is not None:
+                position_history.append({
+                    'week': week,
+                    'position': position
+                })
+        except Exception as e:
+            # Если ошибка для конкретной недели, пропускаем её
+            print(f"Error calculating position for week {week}: {e}")
+            continue
+    
+    return {
+        'team_id': ctx.team_id,
+        'team_name': ctx.team.team_name,
+        'position_history': position_history
+    }
+
+
+def build_season_projection(ctx: DashboardContext) -> Dict[str, Any]:
+    """
+    Прогноз итогового места команды: реальные результаты прошедших недель
+    и симуляция оставшихся матчапов расписания по статистике команд.
+    """
+    if not ctx.team:
+        return {"error": "Team not found"}
+    
+    schedule, error = schedule_store.resolve(ctx.league_meta)
+    if error:
+        return {"error": error}
+    
+    team_stats = ctx.team_stats()
+    current_week = ctx.current_week
+    
+    # Рекорды за прошедшие недели по реальным результатам (кэшируются до обновления данных лиги)
+    completed_records = get_completed_records(ctx.league_meta, [week for week in schedule['weeks'] if week < current_week])
+    team_records = {
+        tid: dict(completed_records.get(tid, {'wins': 0, 'losses': 0, 'ties': 0}))
+        for tid in team_stats.keys()
+    }
+    
+    # Для текущей и будущих недель используем симуляцию
+    for week_num in schedule['weeks']:
+        if week_num < current_week:
+            continue
+        for matchup in schedule['matchups'][week_num]:
+            team1_id = matchup['team1_id']
+            team2_id = matchup['team2_id']
+            if team1_id not in team_stats or team2_id not in team_stats:
+                continue
+            
+            _, wins1, wins2 = encode_matchup(team_stats[team1_id]['stats'], team_stats[team2_id]['stats'])
+            if wins1 > wins2:
+                team_records[team1_id]['wins'] += 1
+                team_records[team2_id]['losses'] += 1
+            elif wins2 > wins1:
+                team_records[team1_id]['losses'] += 1
+                team_records[team2_id]['wins'] += 1
+            else:
+                team_records[team1_id]['ties'] += 1
+                team_records[team2_id]['ties'] += 1
+    
+    final_standings = []
+    for tid, record in team_records.items():
+        total_games = record['wins'] + record['losses'] + record['ties']
+        final_standings.append({
+            'team_id': tid,
+            'team_name': team_stats[tid]['name'],
+            'wins': record['wins'],
+            'losses': record['losses'],
+            'ties': record['ties'],
+            'win_rate': (record['wins'] + 0.5 * record['ties']) / total_games if total_games > 0 else 0
+        })
+    
+    # Сортируем по винрейту (убывание), затем по победам
+    final_standings.sort(key=lambda x: (x['win_rate'], x['wins']), reverse=True)
+    
+    projected_position = next(
+        (idx + 1 for idx, standing in enumerate(final_standings) if standing['team_id'] == ctx.team_id),
+        None
+    )
+    if projected_position is None:
+        return {"error": "Team not found in projections"}
+    
+    team_record = team_records[ctx.team_id]
+    total_games = team_record['wins'] + team_record['losses'] + team_record['ties']
+    
+    standing = get_team_standing(ctx.league_meta, ctx.team_id)
+    
+    return {
+        'team_id': ctx.team_id,
+        'team_name': ctx.team.team_name,
+        'current_position': standing['rank'] if standing else None,
+        'projected_position': projected_position,
+        'projected_record': {
+            'wins': team_record['wins'],
+            'losses': team_record['losses'],
+            'ties': team_record['ties'],
+            'win_rate': round((team_record['wins'] + 0.5 * team_record['ties']) / total_games * 100, 1)
+            if total_games > 0 else 0
+        },
+        'total_teams': len(final_standings),
+        'full_standings': [
+            {
+                'position': idx + 1,
+                'team_id': standing['team_id'],
+                'team_name': standing['team_name'],
+                'wins': standing['wins'],
+                'losses': standing['losses'],
+                'ties': standing['ties'],
+                'win_rate': round(standing['win_rate'] * 100, 1)
+            }
+            for idx, standing in enumerate(final_standings)
+        ]
+    }
+
+
+def build_team_balance(ctx: DashboardContext) -> Dict[str, Any]:
+    """Данные радар-графика баланса команды: сумма Z-scores игроков по категориям."""
+    data = ctx.z_data(ctx.exclude_ir)
+    if not data['players']:
+        return {"error": "No data found"}
+    
+    team_players = [p for p in data['players'] if p['team_id'] == ctx.team_id]
+    
+    if ctx.simulation_mode == "top_n":
+        if ctx.custom_players_list:
+            team_players = [p for p in team_players if p['name'] in ctx.custom_players_list]
+        else:
+            z_scores_by_name = {p['name']: p['z_scores'] for p in data['players']}
+            team_players = select_top_n_players(
+                team_players,
+                ctx.top_n_players,
+                punt_categories=[],
+                z_scores_data=z_scores_by_name
+            )
+    
+    if not team_players:
+        return {"error": "Team not found"}
+    
+    team_name = ctx.team.team_name if ctx.team else f"Team {ctx.team_id}"
+    
+    # Суммируем Z-scores по категориям (все категории, без исключений)
+    category_totals = {cat: 0 for cat in CATEGORIES}
+    for player in team_players:
+        for cat in CATEGORIES:
+            z_val = player['z_scores'].get(cat, 0)
+            if math.isfinite(z_val):
+                category_totals[cat] += z_val
+    
+    return {
+        "team_id": ctx.team_id,
+        "team_name": team_name,
+        "period": ctx.period,
+        "data": [{'category': cat, 'value': round(category_totals[cat], 2)} for cat in CATEGORIES]
+    }
+
+
+# Виджеты составного дашборда в порядке отображения
+DASHBOARD_SECTIONS: Dict[str, Callable[[DashboardContext], Dict[str, Any]]] = {
+    'overview': build_overview,
+    'matchup_details': build_matchup_details,
+    'matchup_history': build_matchup_history,
+    'category_rankings': build_category_rankings,
+    'position_history': build_position_history,
+    'season_projection': build_season_projection,
+    'team_balance': build_team_balance
+}
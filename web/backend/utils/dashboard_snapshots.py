@@ -0,0 +1,129 @@
+"""
+Готовые ответы дашборда с параметрами по умолчанию (period=2026_total, simulation_mode=all).
+После каждого успешного обновления данных лиги основной виджет дашборда рассчитывается
+для всех команд параллельно и сохраняется уже сериализованным в JSON, поэтому самый частый
+запрос отдается без расчетов. Ответы привязаны к версии снимка данных лиги и не отдаются
+после следующего обновления, пока не будут пересобраны.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.encoders import jsonable_encoder
+from utils.dashboard import DashboardContext, build_overview
+from typing import Any, Dict, Optional
+import json
+import threading
+import time
+
+
+# Параметры дашборда, для которых хранятся готовые ответы
+DEFAULT_PERIOD = "2026_total"
+DEFAULT_SIMULATION_MODE = "all"
+
+
+def serialize_payload(payload: Any) -> bytes:
+    """Сериализует ответ так же, как JSONResponse FastAPI."""
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+class DashboardSnapshotStore:
+    """
+    Сериализованные ответы GET /api/dashboard/{team_id} с параметрами по умолчанию
+    для всех команд лиги в пределах одного снимка данных.
+    """
+    
+    def __init__(self, max_workers: int = 4):
+        """
+        Args:
+            max_workers: Количество потоков для расчета дашбордов команд
+        """
+        self.max_workers = max_workers
+        self._version = None
+        self._payloads = {}
+        self._built_at = None
+        self._build_seconds = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+    
+    @staticmethod
+    def matches_defaults(period: str, simulation_mode: str) -> bool:
+        """Совпадают ли параметры запроса с параметрами готовых ответов."""
+        return period == DEFAULT_PERIOD and simulation_mode == DEFAULT_SIMULATION_MODE
+    
+    def build(self, league_meta) -> int:
+        """
+        Рассчитывает дашборды всех команд для текущего снимка данных лиги.
+        Данные лиги (статистика и Z-scores игроков, турнирная таблица, матчапы текущей недели)
+        загружаются один раз, после чего виджеты команд строятся параллельно.
+        Команды с ошибкой в ответе не сохраняются.
+        
+        Returns:
+            Количество сохраненных ответов
+        """
+        with self._build_lock:
+            start = time.perf_counter()
+            version = league_meta.get_snapshot_version()
+            teams = league_meta.get_teams()
+            if not teams:
+                return 0
+            
+            # Общие данные лиги загружаются до запуска потоков
+            base = DashboardContext(league_meta, teams[0].team_id, DEFAULT_PERIOD, DEFAULT_SIMULATION_MODE)
+            base.z_data(base.exclude_ir)
+            base.week_table(base.current_week)
+            
+            def build_team(team) -> Optional[bytes]:
+                try:
+                    payload = build_overview(base.for_team(team.team_id))
+                    if 'error' in payload:
+                        return None
+                    return serialize_payload(payload)
+                except Exception as e:
+                    print(f"Error building dashboard snapshot for team {team.team_id}: {e}")
+                    return None
+            
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(executor.map(build_team, teams))
+            
+            payloads = {team.team_id: data for team, data in zip(teams, results) if data is not None}
+            
+            with self._lock:
+                # Данные могли обновиться во время расчета - такие ответы уже устарели
+                if version != league_meta.get_snapshot_version():
+                    return 0
+                self._version = version
+                self._payloads = payloads
+                self._built_at = time.time()
+                self._build_seconds = round(time.perf_counter() - start, 3)
+            return len(payloads)
+    
+    def get(self, league_meta, team_id: int) -> Optional[bytes]:
+        """Готовый ответ команды или None, если его нет для текущего снимка данных лиги."""
+        with self._lock:
+            if self._version != league_meta.get_snapshot_version():
+                return None
+            return self._payloads.get(team_id)
+    
+    def clear(self) -> None:
+        """Удаляет все готовые ответы."""
+        with self._lock:
+            self._version = None
+            self._payloads = {}
+    
+    def stats(self) -> Dict[str, Any]:
+        """Статистика хранилища для мониторинга."""
+        with self._lock:
+            return {
+                'snapshot_version': self._version,
+                'teams': len(self._payloads),
+                'bytes': sum(len(data) for data in self._payloads.values()),
+                'built_at': self._built_at,
+                'build_seconds': self._build_seconds
+            }
+
+
+dashboard_snapshots = DashboardSnapshotStore()
@@ -0,0 +1,181 @@
+"""
+Пул свободных агентов и оптимизатор add/drop для команды.
+"""
+from core.config import CATEGORIES
+from core.z_score import calculate_player_z_scores, calculate_z_scores
+from utils.cache import SnapshotCache
+from utils.trade_search import TRADE_SEARCH_METRICS, build_trade_context, metric_value, player_z_total, row_z_total
+from typing import Any, Dict, List, Optional, Tuple
+import math
+import time
+
+
+# Пулы свободных агентов со статистикой и Z-scores (сбрасываются при обновлении данных лиги)
+_free_agent_pool_cache = SnapshotCache(maxsize=8)
+
+
+def get_free_agent_pool(league_meta, period: str, exclude_ir: bool = False, size: int = 500) -> List[Dict[str, Any]]:
+    """
+    Получает свободных агентов с avg статистикой и Z-scores по метрикам лиги.
+    Свободные агенты без статистики за период пропускаются.
+    
+    Returns:
+        list: [{'name', 'position', 'nba_team', 'eligibleSlots', 'injury_status', 'schedule', 'stats', 'z_scores'}]
+    """
+    key = ('fa_pool', period, exclude_ir, size)
+    
+    def compute():
+        # Неудачная загрузка (нет свободных агентов или метрик лиги) не кэшируется
+        free_agents = league_meta.get_free_agents(size=size)
+        if not free_agents:
+            return None
+        
+        data = calculate_z_scores(league_meta, period, exclude_ir=exclude_ir)
+        if not data['league_metrics']:
+            return None
+        
+        pool = []
+        for fa in free_agents:
+            stats = league_meta.get_player_stats(fa, period, 'avg')
+            if not stats:
+                continue
+            clean_stats = {
+                stat_key: (0.0 if isinstance(val, float) and not math.isfinite(val) else val)
+                for stat_key, val in stats.items()
+            }
+            pool.append({
+                'name': fa.name,
+                'position': getattr(fa, 'position', 'N/A'),
+                'nba_team': getattr(fa, 'proTeam', 'N/A'),
+                'eligibleSlots': getattr(fa, 'eligibleSlots', []),
+                'injury_status': getattr(fa, 'injuryStatus', 'ACTIVE'),
+                'schedule': getattr(fa, 'schedule', None) or {},
+                'stats': clean_stats,
+                'z_scores': calculate_player_z_scores(stats, data['league_metrics'])
+            })
+        return pool
+    
+    return _free_agent_pool_cache.get_or_compute(league_meta, key, compute) or []
+
+
+def optimize_add_drop(
+    league_meta,
+    team_id: int,
+    period: str = "2026_total",
+    punt_categories: Optional[List[str]] = None,
+    simulation_mode: str = "all",
+    top_n_players: int = 13,
+    metric: str = "z_total",
+    rank_mode: str = "team_stats_avg",
+    top_k: int = 10,
+    pool_size: int = 500,
+    max_evaluations: int = 200
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Оценивает все пары (отчисляю своего игрока, подписываю свободного агента).
+    
+    Этапы:
+        1. Для всех пар - изменение total Z по векторам Z-scores игроков (с учетом пантов)
+        2. Для max_evaluations лучших пар - точный пересчет строк команды, мест по категориям
+           и места в симуляции "все против всех" (пересчитываются только пары с моей командой)
+    
+    Returns:
+        tuple: ({'team_id', 'team_name', 'base', 'moves': [...], 'stats': {...}}, текст ошибки или None)
+    """
+    started = time.time()
+    punt_categories = punt_categories or []
+    
+    if metric not in TRADE_SEARCH_METRICS:
+        return None, f"Unknown metric: {metric}"
+    if rank_mode not in ('team_stats_avg', 'z_scores'):
+        return None, f"Unknown rank mode: {rank_mode}"
+    if league_meta.get_team_by_id(team_id) is None:
+        return None, "Team not found"
+    
+    exclude_ir = (simulation_mode == "exclude_ir")
+    pool = get_free_agent_pool(league_meta, period, exclude_ir=exclude_ir, size=pool_size)
+    if not pool:
+        return None, "No free agents found"
+    
+    context, error = build_trade_context(league_meta, period, simulation_mode, top_n_players)
+    if error:
+        return None, error
+    context.add_external_players(pool)
+    
+    roster = context.before['players_by_team'].get(team_id, [])
+    if not roster:
+        return None, "Team has no players"
+    
+    # 1. Оценка всех пар по векторам игроков
+    drop_values = [player_z_total(p, punt_categories) for p in roster]
+    add_values = [player_z_total(fa, punt_categories) for fa in pool]
+    pairs = [
+        (add_value - drop_value, drop_idx, add_idx)
+        for drop_idx, drop_value in enumerate(drop_values)
+        for add_idx, add_value in enumerate(add_values)
+    ]
+    pairs.sort(key=lambda x: x[0], reverse=True)
+    
+    # 2. Точная оценка лучших пар
+    before = context.before
+    z_before = before['rows']['z_scores'].get(team_id)
+    avg_before = before['rows']['team_stats_avg'].get(team_id, {})
+    rank_before = before['ranks'][rank_mode].get(team_id)
+    cat_ranks_before = context.category_ranks(before, team_id)
+    
+    moves = []
+    evaluated = 0
+    for _, drop_idx, add_idx in pairs[:max(max_evaluations, 0)]:
+        dropped = roster[drop_idx]
+        added = pool[add_idx]
+        new_roster = [p for p in roster if p is not dropped]
+        new_roster.append(dict(added, team_id=team_id, team_name=context.team_names.get(team_id, '')))
+        state = context.apply_roster(team_id, new_roster)
+        evaluated += 1
+        
+        z_after = state['rows']['z_scores'].get(team_id)
+        avg_after = state['rows']['team_stats_avg'].get(team_id, {})
+        cat_ranks_after = context.category_ranks(state, team_id)
+        move = {
+            'drop': dropped['name'],
+            'add': added['name'],
+            'add_position': added['position'],
+            'add_nba_team': added['nba_team'],
+            'my_z_delta': round(row_z_total(z_after, punt_categories) - row_z_total(z_before, punt_categories), 2),
+            'category_deltas': {
+                cat: round((z_after or {}).get(cat, 0.0) - (z_before or {}).get(cat, 0.0), 2)
+                for cat in CATEGORIES if cat not in punt_categories
+            },
+            'raw_deltas': {
+                cat: round(avg_after.get(cat, 0.0) - avg_before.get(cat, 0.0), 4)
+                for cat in CATEGORIES if cat not in punt_categories
+            },
+            'my_rank_before': rank_before,
+            'my_rank_after': state['ranks'][rank_mode].get(team_id),
+            'category_rank_gain': sum(
+                cat_ranks_before[cat] - cat_ranks_after[cat]
+                for cat in cat_ranks_before if cat not in punt_categories
+            )
+        }
+        move['score'] = metric_value(move, metric)
+        if move['score'] > 0:
+            moves.append(move)
+    
+    moves.sort(key=lambda x: (x['score'], x['my_z_delta']), reverse=True)
+    
+    return {
+        'team_id': team_id,
+        'team_name': context.team_names.get(team_id, ''),
+        'base': {
+            'z_total': round(row_z_total(z_before, punt_categories), 2),
+            'rank': rank_before,
+            'category_ranks': {cat: rank for cat, rank in cat_ranks_before.items() if cat not in punt_categories}
+        },
+        'moves': moves[:max(top_k, 0)],
+        'stats': {
+            'pool_size': len(pool),
+            'pairs': len(pairs),
+            'evaluated': evaluated,
+            'elapsed': round(time.time() - started, 3)
+        }
+    }, None
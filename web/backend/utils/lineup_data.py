@@ -0,0 +1,104 @@
+"""
+Общие данные для оптимизации составов: Z-scores игроков по имени,
+доступные игроки команд и статистика матчапов текущей недели.
+Все расчеты кэшируются до следующего обновления данных лиги.
+"""
+from core.z_score import calculate_z_scores
+from utils.cache import SnapshotCache
+from utils.live_projection import get_current_week_totals, week_category_stats
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Z-scores игроков по имени (сбрасываются при обновлении данных лиги)
+_lineup_z_cache = SnapshotCache(maxsize=8)
+
+
+def get_lineup_z_data(league_meta, period: str, exclude_ir: bool = False) -> Dict[str, Any]:
+    """
+    Получает Z-scores всех игроков лиги по имени и метрики лиги.
+    Если имя встречается несколько раз, используется первое вхождение (как при линейном поиске).
+    
+    Returns:
+        dict: {'z_scores_by_name': {имя: z_scores}, 'league_metrics': {...}}
+    """
+    def compute():
+        z_data = calculate_z_scores(league_meta, period, exclude_ir=exclude_ir)
+        z_scores_by_name = {}
+        for player in z_data['players']:
+            z_scores_by_name.setdefault(player['name'], player.get('z_scores', {}))
+        return {'z_scores_by_name': z_scores_by_name, 'league_metrics': z_data['league_metrics']}
+    
+    return _lineup_z_cache.get_or_compute(league_meta, ('lineup_z', period, exclude_ir), compute)
+
+
+def get_z_scores_by_name(league_meta, period: str, exclude_ir: bool = False) -> Dict[str, Dict[str, float]]:
+    """Получает Z-scores всех игроков лиги в виде словаря {имя: z_scores}."""
+    return get_lineup_z_data(league_meta, period, exclude_ir)['z_scores_by_name']
+
+
+def get_available_lineup_players(league_meta, team_id: int, z_scores_by_name: Dict[str, Dict[str, float]]) -> Tuple[List[Dict[str, Any]], List[Any]]:
+    """
+    Доступные игроки команды (без IR и травмированных OUT), для которых есть Z-scores.
+    
+    Returns:
+        tuple: ([{'name', 'position', 'eligibleSlots', 'z_scores'}], [объекты игроков ESPN в том же порядке])
+    """
+    players_data = []
+    roster = []
+    for player in league_meta.get_team_roster(team_id):
+        # Исключаем IR
+        if getattr(player, 'lineupSlot', '') == 'IR':
+            continue
+        
+        # Исключаем травмированных OUT
+        injury_status = getattr(player, 'injuryStatus', 'ACTIVE')
+        is_injured = getattr(player, 'injured', False)
+        if is_injured and injury_status == 'OUT':
+            continue
+        
+        z_scores = z_scores_by_name.get(player.name)
+        if z_scores is None:
+            continue
+        
+        players_data.append({
+            'name': player.name,
+            'position': getattr(player, 'position', ''),
+            'eligibleSlots': getattr(player, 'eligibleSlots', []),
+            'z_scores': z_scores
+        })
+        roster.append(player)
+    return players_data, roster
+
+
+def get_week_matchup_stats(league_meta, week: int) -> Optional[Dict[int, Dict[str, Any]]]:
+    """
+    Статистика команд в матчапах недели по категориям (как team*_stats_filtered в get_matchup_summary),
+    из одного кэшированного запроса Box Score.
+    
+    Returns:
+        Словарь {team_id: {'team_name', 'opponent_id', 'opponent_name', 'stats', 'opponent_stats'}}
+        или None при ошибке
+    """
+    matchups = get_current_week_totals(league_meta, week)
+    if matchups is None:
+        return None
+    
+    week_stats = {}
+    for matchup in matchups:
+        team1_stats = week_category_stats(matchup['team1_totals'])
+        team2_stats = week_category_stats(matchup['team2_totals'])
+        week_stats[matchup['team1_id']] = {
+            'team_name': matchup['team1'],
+            'opponent_id': matchup['team2_id'],
+            'opponent_name': matchup['team2'],
+            'stats': team1_stats,
+            'opponent_stats': team2_stats
+        }
+        week_stats[matchup['team2_id']] = {
+            'team_name': matchup['team2'],
+            'opponent_id': matchup['team1_id'],
+            'opponent_name': matchup['team1'],
+            'stats': team2_stats,
+            'opponent_stats': team1_stats
+        }
+    return week_stats
@@ -2,7 +2,7 @@
 Утилита для оптимизации состава команды.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 import math
 
 
@@ -10,6 +10,13 @@ import math
 POSITIONAL_SLOTS = ['PG', 'SG', 'SF', 'PF', 'C']
 FLEXIBLE_SLOTS = ['G', 'F']
 UTILITY_SLOTS = ['UT'] * 3  # 3 слота UT
+LINEUP_SLOTS = POSITIONAL_SLOTS + FLEXIBLE_SLOTS + UTILITY_SLOTS
+
+# Биты слотов в маске допустимых слотов игрока
+SLOT_BITS = {slot: 1 << idx for idx, slot in enumerate(POSITIONAL_SLOTS + FLEXIBLE_SLOTS + ['UT'])}
+
+# Метки стартовых слотов в ответе (слоты UT нумеруются)
+LINEUP_SLOT_LABELS = POSITIONAL_SLOTS + FLEXIBLE_SLOTS + [f'UT{i}' for i in range(1, len(UTILITY_SLOTS) + 1)]
 
 PERCENTAGE_CATEGORIES = ['FG%', 'FT%', '3PT%']
 
@@ -21,6 +28,104 @@ def normalize_percentage_value(value: float) -> float:
     return value
 
 
+def _matchup_values(category: str, team_stats: Dict[str, float], opponent_stats: Dict[str, float]) -> Tuple[float, float]:
+    """Значения категории у команды и соперника (процентные категории в формате 0.0-1.0)."""
+    team_value = team_stats.get(category, 0.0)
+    opponent_value = opponent_stats.get(category, 0.0)
+    
+    # Нормализуем процентные категории
+    if category in PERCENTAGE_CATEGORIES:
+        team_value = normalize_percentage_value(team_value)
+        opponent_value = normalize_percentage_value(opponent_value)
+    return team_value, opponent_value
+
+
+def _category_bonus_weight(team_value: float, opponent_value: float) -> float:
+    """Множитель Z-score игрока в бонусе за матчап по одной категории."""
+    if opponent_value > team_value:
+        # ОТСТАЕМ - добавляем ценность, если отставание не более 20%
+        if team_value > 0:
+            diff_pct = (opponent_value - team_value) / team_value
+            if diff_pct <= 0.20:
+                return 1.0 + diff_pct * 5  # Бонус до 2.0x
+        return 0.0
+    
+    if team_value > opponent_value * 1.2:
+        # СИЛЬНО ЛИДИРУЕМ (>20%) - уменьшаем ценность
+        return -0.3
+    return 0.0
+
+
+def matchup_bonus_weights(
+    team_stats: Dict[str, float],
+    opponent_stats: Dict[str, float],
+    punt_categories: List[str],
+    categories: Iterable[str]
+) -> Dict[str, float]:
+    """
+    Множители категорий для бонуса за матчап. Зависят только от статистики матчапа,
+    поэтому считаются один раз для всего состава.
+    
+    Returns:
+        Словарь {category: множитель} только для категорий с ненулевым множителем
+    """
+    weights = {}
+    for category in categories:
+        if category in punt_categories or category in weights:
+            continue
+        weight = _category_bonus_weight(*_matchup_values(category, team_stats, opponent_stats))
+        if weight != 0.0:
+            weights[category] = weight
+    return weights
+
+
+def _weighted_bonus(z_scores: Dict[str, float], weights: Dict[str, float]) -> float:
+    """Бонус игрока за матчап: сумма Z-scores по категориям с множителями."""
+    bonus = 0.0
+    for category, player_z in z_scores.items():
+        weight = weights.get(category)
+        if weight:
+            bonus += player_z * weight
+    return bonus
+
+
+def _matchup_category_details(
+    z_scores: Dict[str, float],
+    weights: Dict[str, float],
+    team_stats: Dict[str, float],
+    opponent_stats: Dict[str, float],
+    punt_categories: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """Детализация бонуса за матчап по категориям с текстовым пояснением."""
+    category_details = {}
+    for category, player_z in z_scores.items():
+        if category in punt_categories:
+            continue  # Игнорируем панты
+        
+        team_value, opponent_value = _matchup_values(category, team_stats, opponent_stats)
+        weight = weights.get(category)
+        category_bonus = player_z * weight if weight else 0.0
+        
+        if opponent_value > team_value:
+            if team_value <= 0:
+                continue
+            diff_pct = (opponent_value - team_value) / team_value
+            reason = f"Отстаем на {diff_pct*100:.1f}%" if diff_pct <= 0.20 else f"Отстаем на {diff_pct*100:.1f}% (безнадежно)"
+        elif team_value > opponent_value * 1.2:
+            reason = f"Лидируем на {(team_value - opponent_value) / opponent_value * 100:.1f}%" if opponent_value > 0 else "Лидируем"
+        else:
+            reason = "Выигрываем или нейтрально"
+        
+        category_details[category] = {
+            'bonus': category_bonus,
+            'z_score': player_z,
+            'reason': reason,
+            'team_value': team_value,
+            'opponent_value': opponent_value
+        }
+    return category_details
+
+
 def calculate_matchup_bonus(
     player: Dict[str, Any],
     team_stats: Dict[str, float],
@@ -41,60 +146,40 @@ def calculate_matchup_bonus(
     Returns:
         float или tuple: Бонус за матчап (и детализация, если return_details=True)
     """
-    bonus = 0.0
     z_scores = player.get('z_scores', {})
-    category_details = {}
-    
-    for category in z_scores.keys():
-        if category in punt_categories:
-            continue  # Игнорируем панты
-        
-        team_value = team_stats.get(category, 0.0)
-        opponent_value = opponent_stats.get(category, 0.0)
-        
-        # Нормализуем процентные категории
-        if category in PERCENTAGE_CATEGORIES:
-            team_value = normalize_percentage_value(team_value)
-            opponent_value = normalize_percentage_value(opponent_value)
-        
-        player_z = z_scores.get(category, 0.0)
-        category_bonus = 0.0
-        reason = ""
-        
-        if opponent_value > team_value:
-            # ОТСТАЕМ - добавляем ценность
-            if team_value > 0:
-                diff_pct = (opponent_value - team_value) / team_value
-                if diff_pct <= 0.20:  # Отстаем не более чем на 20%
-                    category_bonus = player_z * (1.0 + diff_pct * 5)  # Бонус до 2.0x
-                    bonus += category_bonus
-                    reason = f"Отстаем на {diff_pct*100:.1f}%"
-                else:
-                    reason = f"Отстаем на {diff_pct*100:.1f}% (безнадежно)"
-        
-        elif team_value > opponent_value * 1.2:
-            # СИЛЬНО ЛИДИРУЕМ (>20%) - уменьшаем ценность
-            category_bonus = -player_z * 0.3  # Штраф
-            bonus += category_bonus
-            diff_pct = (team_value - opponent_value) / opponent_value
-            reason = f"Лидируем на {diff_pct*100:.1f}%"
-        else:
-            reason = "Выигрываем или нейтрально"
-        
-        if return_details and (category_bonus != 0.0 or reason):
-            category_details[category] = {
-                'bonus': category_bonus,
-                'z_score': player_z,
-                'reason': reason,
-                'team_value': team_value,
-                'opponent_value': opponent_value
-            }
+    weights = matchup_bonus_weights(team_stats, opponent_stats, punt_categories, z_scores.keys())
+    bonus = _weighted_bonus(z_scores, weights)
     
     if return_details:
-        return bonus, category_details
+        return bonus, _matchup_category_details(z_scores, weights, team_stats, opponent_stats, punt_categories)
     return bonus
 
 
+def calculate_roster_values(
+    players: List[Dict[str, Any]],
+    team_stats: Dict[str, float],
+    opponent_stats: Dict[str, float],
+    punt_categories: List[str]
+) -> List[Tuple[float, float]]:
+    """
+    Рассчитывает базовый Z-score и бонус за матчап для всего состава
+    (множители категорий считаются один раз).
+    
+    Returns:
+        list: [(base_z, matchup_bonus)] в порядке игроков
+    """
+    weights = matchup_bonus_weights(
+        team_stats, opponent_stats, punt_categories,
+        (category for player in players for category in player.get('z_scores', {}))
+    )
+    values = []
+    for player in players:
+        z_scores = player.get('z_scores', {})
+        base_z = sum(z for z in z_scores.values() if math.isfinite(z))
+        values.append((base_z, _weighted_bonus(z_scores, weights)))
+    return values
+
+
 def calculate_player_value(
     player: Dict[str, Any],
     team_stats: Dict[str, float],
@@ -107,23 +192,36 @@ def calculate_player_value(
     Returns:
         float: Ценность игрока
     """
-    # Базовый Z-score
-    z_scores = player.get('z_scores', {})
-    base_z = sum(z for z in z_scores.values() if math.isfinite(z))
+    base_z, matchup_bonus = calculate_roster_values([player], team_stats, opponent_stats, punt_categories)[0]
+    return base_z + matchup_bonus
+
+
+def player_slot_mask(player: Dict[str, Any]) -> int:
+    """
+    Битовая маска слотов, в которых может играть игрок (по eligibleSlots и position).
     
-    # Бонус за матчап (без детализации)
-    matchup_bonus = calculate_matchup_bonus(
-        player, team_stats, opponent_stats, punt_categories, return_details=False
-    )
+    Returns:
+        int: Маска из SLOT_BITS
+    """
+    # UT - любой игрок может играть
+    mask = SLOT_BITS['UT']
+    for slot in player.get('eligibleSlots') or []:
+        mask |= SLOT_BITS.get(slot, 0)
     
-    return base_z + matchup_bonus
+    position = player.get('position', '')
+    mask |= SLOT_BITS.get(position, 0)
+    if position in ['PG', 'SG']:
+        mask |= SLOT_BITS['G']
+    if position in ['SF', 'PF']:
+        mask |= SLOT_BITS['F']
+    return mask
 
 
 def can_fit_all_players(players: List[Dict[str, Any]]) -> bool:
     """
     Проверяет, можно ли разместить всех игроков в 10 стартовых слотов.
     Учитывает позиции игроков и ограничения слотов.
-    Использует backtracking для перебора всех возможных вариантов.
+    Использует максимальное паросочетание игроки × слоты по битовым маскам (полиномиальное время).
     
     Args:
         players: Список игроков
@@ -131,72 +229,155 @@ def can_fit_all_players(players: List[Dict[str, Any]]) -> bool:
     Returns:
         bool: True если всех можно разместить, False если нет
     """
-    if len(players) > 10:
+    if len(players) > len(LINEUP_SLOTS):
         return False
     
     if len(players) == 0:
         return True
     
-    # Для каждого игрока находим все слоты, в которые он может играть
-    player_slots = []
-    for player in players:
-        slots = []
-        eligible_slots = player.get('eligibleSlots', [])
-        position = player.get('position', '')
-        
-        # UT - любой может играть (3 слота)
-        slots.append('UT')
-        
-        # Позиционные слоты
-        for slot in ['PG', 'SG', 'SF', 'PF', 'C']:
-            if slot in eligible_slots or position == slot:
-                slots.append(slot)
-        
-        # Гибкие слоты
-        if 'G' in eligible_slots or position in ['PG', 'SG']:
-            slots.append('G')
-        
-        if 'F' in eligible_slots or position in ['SF', 'PF']:
-            slots.append('F')
-        
-        if not slots:
-            # Игрок не может играть ни в один слот
-            return False
-        
-        player_slots.append(slots)
+    return _max_slot_matching([player_slot_mask(player) for player in players]) == len(players)
+
+
+def _max_slot_matching(slot_masks: List[int]) -> int:
+    """
+    Размер максимального паросочетания игроки × стартовые слоты (алгоритм Куна по битовым маскам).
     
-    # Пробуем разместить всех игроков (backtracking)
-    def try_place_players(player_idx: int, used_slots: dict) -> bool:
-        """Рекурсивная функция для размещения игроков с backtracking."""
-        if player_idx >= len(players):
-            return True  # Все игроки размещены
-        
-        slots = player_slots[player_idx]
-        
-        # Пробуем разместить игрока в каждый доступный слот
-        for slot in slots:
-            # Проверяем, доступен ли слот
-            if slot == 'UT':
-                # UT - проверяем, есть ли свободные UT слоты (3 слота)
-                ut_count = used_slots.get('UT', 0)
-                if ut_count < 3:
-                    used_slots['UT'] = ut_count + 1
-                    if try_place_players(player_idx + 1, used_slots):
-                        return True
-                    used_slots['UT'] = ut_count  # Backtrack
-            else:
-                # Обычный слот - проверяем, свободен ли
-                if used_slots.get(slot, 0) == 0:
-                    used_slots[slot] = 1
-                    if try_place_players(player_idx + 1, used_slots):
-                        return True
-                    used_slots[slot] = 0  # Backtrack
-        
+    Returns:
+        int: Максимальное количество игроков, которых можно одновременно поставить в старт
+    """
+    slot_bits = [SLOT_BITS[slot] for slot in LINEUP_SLOTS]
+    slot_owner = [-1] * len(LINEUP_SLOTS)
+    
+    def place(player_idx, visited):
+        for slot_idx, slot_bit in enumerate(slot_bits):
+            if not slot_masks[player_idx] & slot_bit or visited[slot_idx]:
+                continue
+            visited[slot_idx] = True
+            if slot_owner[slot_idx] < 0 or place(slot_owner[slot_idx], visited):
+                slot_owner[slot_idx] = player_idx
+                return True
         return False
     
-    # Запускаем проверку
-    used_slots = {}
-    return try_place_players(0, used_slots)
+    return sum(1 for player_idx in range(len(slot_masks)) if place(player_idx, [False] * len(slot_bits)))
+
+
+def _min_cost_assignment(cost: List[List[float]]) -> List[int]:
+    """
+    Венгерский алгоритм (метод потенциалов, O(n^3)) для квадратной матрицы стоимостей.
+    
+    Returns:
+        list: assignment[row] - столбец, назначенный строке
+    """
+    n = len(cost)
+    u = [0.0] * (n + 1)
+    v = [0.0] * (n + 1)
+    match = [0] * (n + 1)  # match[col] - строка (с 1), назначенная столбцу
+    way = [0] * (n + 1)
+    
+    for row in range(1, n + 1):
+        match[0] = row
+        col0 = 0
+        min_v = [math.inf] * (n + 1)
+        used = [False] * (n + 1)
+        while True:
+            used[col0] = True
+            row0 = match[col0]
+            delta = math.inf
+            col1 = 0
+            for col in range(1, n + 1):
+                if used[col]:
+                    continue
+                reduced = cost[row0 - 1][col - 1] - u[row0] - v[col]
+                if reduced < min_v[col]:
+                    min_v[col] = reduced
+                    way[col] = col0
+                if min_v[col] < delta:
+                    delta = min_v[col]
+                    col1 = col
+            for col in range(n + 1):
+                if used[col]:
+                    u[match[col]] += delta
+                    v[col] -= delta
+                else:
+                    min_v[col] -= delta
+            col0 = col1
+            if match[col0] == 0:
+                break
+        # Восстанавливаем увеличивающую цепочку
+        while col0:
+            col1 = way[col0]
+            match[col0] = match[col1]
+            col0 = col1
+    
+    assignment = [-1] * n
+    for col in range(1, n + 1):
+        if match[col]:
+            assignment[match[col] - 1] = col - 1
+    return assignment
+
+
+def assign_lineup_slots(
+    players: List[Dict[str, Any]],
+    values: List[float],
+    slot_masks: Optional[List[int]] = None
+) -> Tuple[Dict[str, int], List[int]]:
+    """
+    Распределяет игроков по стартовым слотам (максимальное взвешенное паросочетание игроки × слоты).
+    Сначала максимизируется количество занятых слотов, затем суммарная ценность стартового состава.
+    
+    Args:
+        players: Список игроков с eligibleSlots/position
+        values: Ценность каждого игрока (в том же порядке)
+        slot_masks: Готовые маски допустимых слотов игроков (player_slot_mask)
+    
+    Returns:
+        tuple: ({метка слота: индекс игрока}, [индексы игроков на скамейке])
+    """
+    # Вес занятого слота больше любой суммы ценностей, поэтому количество стартеров важнее ценности
+    slot_weight = 1.0 + 2.0 * sum(abs(value) for value in values if math.isfinite(value))
+    size = max(len(players), len(LINEUP_SLOTS))
+    if slot_masks is None:
+        slot_masks = [player_slot_mask(player) for player in players]
+    
+    cost = [[0.0] * size for _ in range(size)]
+    for slot_idx, slot in enumerate(LINEUP_SLOTS):
+        slot_bit = SLOT_BITS[slot]
+        for player_idx, mask in enumerate(slot_masks):
+            if mask & slot_bit:
+                value = values[player_idx] if math.isfinite(values[player_idx]) else 0.0
+                cost[slot_idx][player_idx] = -(slot_weight + value)
+    
+    assignment = _min_cost_assignment(cost)
+    
+    start_lineup = {}
+    for slot_idx, label in enumerate(LINEUP_SLOT_LABELS):
+        player_idx = assignment[slot_idx]
+        if player_idx < len(players) and cost[slot_idx][player_idx] < 0:
+            start_lineup[label] = player_idx
+    
+    starters = set(start_lineup.values())
+    bench = [idx for idx in range(len(players)) if idx not in starters]
+    return start_lineup, bench
+
+
+def best_lineup_value(values: List[float], slot_masks: List[int]) -> Tuple[float, List[int]]:
+    """
+    Суммарная ценность лучшего стартового состава из играющих игроков.
+    Если все игроки помещаются в слоты, венгерский алгоритм не запускается.
+    
+    Args:
+        values: Ценность каждого игрока
+        slot_masks: Маски допустимых слотов игроков (player_slot_mask)
+    
+    Returns:
+        tuple: (ценность стартового состава, индексы стартовых игроков)
+    """
+    if len(values) <= len(LINEUP_SLOTS) and _max_slot_matching(slot_masks) == len(values):
+        return sum(values), list(range(len(values)))
+    
+    start_slots, _ = assign_lineup_slots([{}] * len(values), values, slot_masks)
+    starters = sorted(start_slots.values())
+    return sum(values[idx] for idx in starters), starters
 
 
 def can_play_in_slot(player: Dict[str, Any], slot: str) -> bool:
@@ -210,66 +391,54 @@ def can_play_in_slot(player: Dict[str, Any], slot: str) -> bool:
     Returns:
         bool: Может ли играть в слоте
     """
-    # UT - любой игрок может играть
-    if slot == 'UT':
-        return True
-    
-    # Получаем eligibleSlots или position
-    eligible_slots = player.get('eligibleSlots', [])
-    position = player.get('position', '')
-    
-    # Проверяем eligibleSlots
-    if eligible_slots:
-        if slot in eligible_slots:
-            return True
-    
-    # Проверяем position
-    if position:
-        # Позиционные слоты
-        if slot == position:
-            return True
-        
-        # Гибкие слоты
-        if slot == 'G' and position in ['PG', 'SG']:
-            return True
-        if slot == 'F' and position in ['SF', 'PF']:
-            return True
-    
-    return False
+    return bool(player_slot_mask(player) & SLOT_BITS.get(slot, 0))
 
 
 def optimize_lineup(
     players: List[Dict[str, Any]],
     team_stats: Dict[str, float],
     opponent_stats: Dict[str, float],
-    punt_categories: List[str] = None
+    punt_categories: List[str] = None,
+    include_details: bool = True
 ) -> Dict[str, Any]:
     """
-    Оптимизирует состав команды - сортирует игроков по ценности.
+    Оптимизирует состав команды: сортирует игроков по ценности и распределяет
+    их по стартовым слотам с максимальной суммарной ценностью.
     
     Args:
         players: Список игроков команды (исключены IR и OUT)
         team_stats: Статистика команды
         opponent_stats: Статистика соперника
         punt_categories: Список пант-категорий
+        include_details: Добавлять детализацию бонуса по категориям (category_details)
     
     Returns:
         {
             'players': [player],  # Отсортированные по ценности
-            'total_players': int
+            'total_players': int,
+            'can_fit_all': bool,  # Все игроки помещаются в стартовый состав
+            'start_lineup': {slot: player},  # PG, SG, SF, PF, C, G, F, UT1-UT3
+            'bench': [player],
+            'start_value': float
         }
     """
     if punt_categories is None:
         punt_categories = []
     
-    # Расчет ценности игроков
+    # Расчет ценности игроков (множители категорий считаются один раз на весь состав)
+    weights = matchup_bonus_weights(
+        team_stats, opponent_stats, punt_categories,
+        (category for player in players for category in player.get('z_scores', {}))
+    )
     players_with_value = []
     for player in players:
-        base_z = sum(z for z in player.get('z_scores', {}).values() if math.isfinite(z))
-        matchup_bonus, category_details = calculate_matchup_bonus(
-            player, team_stats, opponent_stats, punt_categories, return_details=True
-        )
+        z_scores = player.get('z_scores', {})
+        base_z = sum(z for z in z_scores.values() if math.isfinite(z))
+        matchup_bonus = _weighted_bonus(z_scores, weights)
         value = base_z + matchup_bonus
+        category_details = None
+        if include_details:
+            category_details = _matchup_category_details(z_scores, weights, team_stats, opponent_stats, punt_categories)
         
         players_with_value.append({
             'player': player,
@@ -295,8 +464,123 @@ def optimize_lineup(
             'category_details': item['category_details']
         })
     
+    # Распределяем игроков по стартовым слотам
+    start_slots, bench_indices = assign_lineup_slots(
+        [item['player'] for item in players_with_value],
+        [item['value'] for item in players_with_value]
+    )
+    start_lineup = {label: players_sorted[idx] for label, idx in start_slots.items()}
+    
     return {
         'players': players_sorted,
-        'total_players': len(players)
+        'total_players': len(players),
+        'can_fit_all': not bench_indices,
+        'start_lineup': start_lineup,
+        'bench': [players_sorted[idx] for idx in bench_indices],
+        'start_value': sum(player['value'] for player in start_lineup.values())
     }
 
+
+def plan_weekly_lineup(
+    players: List[Dict[str, Any]],
+    scoring_periods: List[int],
+    team_stats: Dict[str, float],
+    opponent_stats: Dict[str, float],
+    punt_categories: List[str] = None
+) -> Dict[str, Any]:
+    """
+    Планирует стартовый состав на каждый игровой день матчапа.
+    В каждый день в слоты распределяются только игроки, у которых есть игра;
+    ценность игрока за игру - Z-score с бонусом за матчап (calculate_roster_values).
+    Дни с одинаковым набором играющих игроков используют одно распределение.
+    
+    Args:
+        players: Игроки команды с z_scores, eligibleSlots/position и games ({id игрового дня: дата игры})
+        scoring_periods: ID игровых дней для планирования
+        team_stats: Статистика команды
+        opponent_stats: Статистика соперника
+        punt_categories: Список пант-категорий
+    
+    Returns:
+        {
+            'slots': [метки слотов],
+            'days': [{'scoring_period', 'date', 'games', 'start_lineup': {slot: имя}, 'bench': [имена], 'value'}],
+            'grid': {slot: [имя или None по дням]},
+            'players': [{'name', 'position', 'value', 'games', 'starts'}],
+            'total_games', 'total_starts', 'category_totals': {category: Z}, 'matchings': {...}
+        }
+    """
+    if punt_categories is None:
+        punt_categories = []
+    
+    values = [base_z + bonus for base_z, bonus in calculate_roster_values(players, team_stats, opponent_stats, punt_categories)]
+    slot_masks = [player_slot_mask(player) for player in players]
+    starts = [0] * len(players)
+    games = [0] * len(players)
+    
+    # Распределение зависит только от набора играющих игроков
+    assignments = {}
+    reused = 0
+    days = []
+    for scoring_period in scoring_periods:
+        playing = tuple(idx for idx, player in enumerate(players) if scoring_period in player.get('games', {}))
+        if playing in assignments:
+            reused += 1
+        else:
+            assignments[playing] = assign_lineup_slots(
+                [players[idx] for idx in playing],
+                [values[idx] for idx in playing],
+                [slot_masks[idx] for idx in playing]
+            )
+        start_slots, bench_positions = assignments[playing]
+        
+        start_lineup = {}
+        for label, position in start_slots.items():
+            idx = playing[position]
+            starts[idx] += 1
+            start_lineup[label] = players[idx]['name']
+        for idx in playing:
+            games[idx] += 1
+        
+        game_dates = [players[idx]['games'][scoring_period] for idx in playing if players[idx]['games'][scoring_period]]
+        days.append({
+            'scoring_period': scoring_period,
+            'date': min(game_dates) if game_dates else None,
+            'games': len(playing),
+            'start_lineup': start_lineup,
+            'bench': [players[playing[position]]['name'] for position in bench_positions],
+            'value': sum(values[playing[position]] for position in start_slots.values())
+        })
+    
+    # Ожидаемый вклад стартовых игроков по категориям (Z-score за игру × количество стартов)
+    category_totals = {}
+    for idx, player in enumerate(players):
+        if not starts[idx]:
+            continue
+        for category, z_score in player.get('z_scores', {}).items():
+            if category in punt_categories or not math.isfinite(z_score):
+                continue
+            category_totals[category] = category_totals.get(category, 0.0) + z_score * starts[idx]
+    
+    players_summary = [
+        {
+            'name': player.get('name', ''),
+            'position': player.get('position', ''),
+            'value': values[idx],
+            'games': games[idx],
+            'starts': starts[idx]
+        }
+        for idx, player in enumerate(players)
+    ]
+    players_summary.sort(key=lambda x: x['value'], reverse=True)
+    
+    return {
+        'slots': LINEUP_SLOT_LABELS,
+        'days': days,
+        'grid': {label: [day['start_lineup'].get(label) for day in days] for label in LINEUP_SLOT_LABELS},
+        'players': players_summary,
+        'total_games': sum(games),
+        'total_starts': sum(starts),
+        'category_totals': category_totals,
+        'matchings': {'computed': len(assignments), 'reused': reused}
+    }
@@ -0,0 +1,439 @@
+"""
+Живой прогноз матчапов текущей недели.
+Прогноз = накопленные тоталы из Box Score + ожидаемый вклад игроков за оставшиеся игры
+(средние за игру × количество оставшихся игр по расписанию игрока).
+"""
+from core.config import CATEGORIES
+from utils.cache import SnapshotCache
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import math
+import threading
+
+
+# Счетные показатели, из которых собираются все категории
+COUNT_KEYS = ['PTS', 'REB', 'AST', 'STL', 'BLK', '3PM', 'DD', 'TO', 'FGM', 'FGA', 'FTM', 'FTA', '3PA']
+_KEY_INDEX = {key: idx for idx, key in enumerate(COUNT_KEYS)}
+
+# Процентные категории: (категория, попадания, попытки)
+_RATIO_CATEGORIES = {
+    'FG%': ('FGM', 'FGA'),
+    'FT%': ('FTM', 'FTA'),
+    '3PT%': ('3PM', '3PA'),
+    'A/TO': ('AST', 'TO')
+}
+
+# Тоталы текущей недели (сбрасываются при обновлении данных лиги)
+_box_totals_cache = SnapshotCache(maxsize=4)
+
+
+def _zero_vector() -> List[float]:
+    return [0.0] * len(COUNT_KEYS)
+
+
+def _stats_vector(stats: Dict[str, float], games: float = 1.0) -> List[float]:
+    """Преобразует словарь статистики в вектор COUNT_KEYS, умножая на количество игр."""
+    return [stats.get(key, 0.0) * games for key in COUNT_KEYS]
+
+
+def _add_vector(target: List[float], vector: List[float]) -> None:
+    for idx, value in enumerate(vector):
+        target[idx] += value
+
+
+def _lineup_current_vector(league_meta, lineup) -> List[float]:
+    """
+    Суммирует накопленную статистику состава матчапа (ключ '0'), без игроков на IR.
+    Повторяет правила get_matchup_box_score.
+    """
+    totals = _zero_vector()
+    for player in lineup or []:
+        if getattr(player, 'slot_position', None) == 'IR':
+            continue
+        player_stats = league_meta.get_player_stats(player, '0', 'total')
+        if player_stats:
+            _add_vector(totals, _stats_vector(player_stats))
+    return totals
+
+
+def week_category_stats(totals: List[float]) -> Dict[str, float]:
+    """
+    Значения категорий по накопленным тоталам (вектор COUNT_KEYS).
+    Повторяет расчет TOTALS в get_matchup_box_score с фильтрацией по CATEGORIES.
+    """
+    stats = {}
+    for cat in CATEGORIES:
+        if cat in _RATIO_CATEGORIES:
+            made_key, att_key = _RATIO_CATEGORIES[cat]
+            attempts = totals[_KEY_INDEX[att_key]]
+            stats[cat] = totals[_KEY_INDEX[made_key]] / attempts if attempts > 0 else 0.0
+        else:
+            stats[cat] = totals[_KEY_INDEX[cat]] if cat in _KEY_INDEX else 0.0
+    return stats
+
+
+def get_current_week_totals(league_meta, week: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Получает накопленные тоталы всех матчапов недели одним запросом к ESPN API.
+    Результат кэшируется до следующего обновления данных лиги (ошибка запроса не кэшируется).
+    
+    Returns:
+        Список [{'team1_id', 'team1', 'team2_id', 'team2', 'team1_totals', 'team2_totals'}, ...]
+        или None при ошибке
+    """
+    def compute():
+        try:
+            box_scores = league_meta.league.box_scores(matchup_period=week)
+        except Exception as e:
+            print(f"Ошибка получения матчапов за неделю {week}: {e}")
+            return None
+        
+        matchups = []
+        for box in box_scores or []:
+            matchups.append({
+                'team1_id': box.home_team.team_id,
+                'team1': box.home_team.team_name,
+                'team2_id': box.away_team.team_id,
+                'team2': box.away_team.team_name,
+                'team1_totals': _lineup_current_vector(league_meta, box.home_lineup),
+                'team2_totals': _lineup_current_vector(league_meta, box.away_lineup)
+            })
+        return matchups
+    
+    return _box_totals_cache.get_or_compute(league_meta, ('box_totals', week), compute)
+
+
+def _is_future_game(game_date, now: datetime) -> bool:
+    """Проверяет, что игра еще не началась (с учетом наличия часового пояса у даты)."""
+    if not isinstance(game_date, datetime):
+        return False
+    if game_date.tzinfo is None:
+        return game_date > now.replace(tzinfo=None)
+    return game_date > now
+
+
+def count_remaining_games(player, remaining_periods: List[int], today: Optional[int], now: datetime) -> int:
+    """
+    Считает оставшиеся игры игрока в матчапе по его расписанию (player.schedule).
+    Игра в текущий игровой день учитывается, только если она еще не началась.
+    
+    Args:
+        player: Объект игрока из ESPN API
+        remaining_periods: ID оставшихся игровых дней матчапа (включая текущий)
+        today: ID текущего игрового дня
+        now: Текущее время
+    
+    Returns:
+        Количество оставшихся игр
+    """
+    return len(remaining_game_periods(getattr(player, 'schedule', None) or {}, remaining_periods, today, now))
+
+
+def remaining_game_periods(schedule: Dict[str, Any], remaining_periods: List[int], today: Optional[int], now: datetime) -> List[int]:
+    """
+    Игровые дни матчапа, в которые у игрока еще будет игра (по расписанию player.schedule).
+    Игра в текущий игровой день учитывается, только если она еще не началась.
+    
+    Returns:
+        Список ID игровых дней
+    """
+    periods = []
+    for period_id in remaining_periods:
+        game = schedule.get(str(period_id))
+        if not game:
+            continue
+        if period_id == today and not _is_future_game(game.get('date'), now):
+            continue
+        periods.append(period_id)
+    return periods
+
+
+def _is_available(player) -> bool:
+    """Игрок будет играть: не на IR и не выбыл (OUT)."""
+    lineup_slot = getattr(player, 'lineupSlot', '')
+    slot_position = getattr(player, 'slot_position', '')
+    if lineup_slot == 'IR' or slot_position == 'IR':
+        return False
+    return getattr(player, 'injuryStatus', 'ACTIVE') != 'OUT'
+
+
+def build_remaining_vectors(league_meta, period: str, remaining_periods: List[int], today: Optional[int], now: datetime) -> Dict[int, Dict[str, Any]]:
+    """
+    Рассчитывает ожидаемый вклад каждой команды за оставшиеся игры.
+    
+    Returns:
+        Словарь {team_id: {'vector': [...], 'games': int}}
+    """
+    remaining = {}
+    for team in league_meta.get_teams():
+        vector = _zero_vector()
+        games_total = 0
+        for player in league_meta.get_team_roster(team.team_id):
+            if not _is_available(player):
+                continue
+            games = count_remaining_games(player, remaining_periods, today, now)
+            if games == 0:
+                continue
+            avg_stats = league_meta.get_player_stats(player, period, 'avg')
+            if not avg_stats:
+                continue
+            _add_vector(vector, _stats_vector(avg_stats, games))
+            games_total += games
+        remaining[team.team_id] = {'vector': vector, 'games': games_total}
+    return remaining
+
+
+def project_categories(current: List[float], remaining: List[float]) -> Dict[str, Tuple[float, float, float]]:
+    """
+    Рассчитывает текущие и прогнозные значения категорий и дисперсию прогноза.
+    Счетные показатели считаются пуассоновскими, проценты - биномиальными по оставшимся попыткам.
+    
+    Returns:
+        Словарь {category: (текущее значение, прогноз, дисперсия прогноза)}
+    """
+    final = [c + r for c, r in zip(current, remaining)]
+    result = {}
+    for cat in CATEGORIES:
+        if cat in _RATIO_CATEGORIES:
+            made_key, att_key = _RATIO_CATEGORIES[cat]
+            made_idx, att_idx = _KEY_INDEX[made_key], _KEY_INDEX[att_key]
+            current_value = current[made_idx] / current[att_idx] if current[att_idx] > 0 else 0.0
+            if final[att_idx] <= 0:
+                result[cat] = (current_value, 0.0, 0.0)
+                continue
+            ratio = final[made_idx] / final[att_idx]
+            if cat == 'A/TO':
+                variance = (remaining[made_idx] + ratio * ratio * remaining[att_idx]) / (final[att_idx] ** 2)
+            else:
+                p = min(max(ratio, 0.0), 1.0)
+                variance = p * (1.0 - p) * remaining[att_idx] / (final[att_idx] ** 2)
+            result[cat] = (current_value, ratio, variance)
+        elif cat in _KEY_INDEX:
+            idx = _KEY_INDEX[cat]
+            result[cat] = (current[idx], final[idx], remaining[idx])
+        else:
+            result[cat] = (0.0, 0.0, 0.0)
+    return result
+
+
+def _category_win_probability(value1: float, value2: float, variance: float, lower_is_better: bool = False) -> float:
+    """Вероятность победы первой команды в категории (нормальное приближение разницы)."""
+    diff = value2 - value1 if lower_is_better else value1 - value2
+    if variance <= 0:
+        return 1.0 if diff > 0 else (0.0 if diff < 0 else 0.5)
+    return 0.5 * (1.0 + math.erf(diff / math.sqrt(2.0 * variance)))
+
+
+def _matchup_outcome_probabilities(category_probs: List[float]) -> Tuple[float, float, float]:
+    """
+    Распределение числа выигранных категорий (Poisson-binomial) -> вероятности исхода матчапа.
+    
+    Returns:
+        tuple: (победа первой команды, победа второй команды, ничья)
+    """
+    dist = [1.0]
+    for p in category_probs:
+        next_dist = [0.0] * (len(dist) + 1)
+        for wins, prob in enumerate(dist):
+            next_dist[wins] += prob * (1.0 - p)
+            next_dist[wins + 1] += prob * p
+        dist = next_dist
+    
+    total = len(category_probs)
+    team1_win = sum(prob for wins, prob in enumerate(dist) if 2 * wins > total)
+    team2_win = sum(prob for wins, prob in enumerate(dist) if 2 * wins < total)
+    return team1_win, team2_win, max(0.0, 1.0 - team1_win - team2_win)
+
+
+def team_week_vector(players: List[Dict[str, Any]], games: float) -> List[float]:
+    """Ожидаемый недельный вектор команды: средние игроков за игру × количество игр."""
+    totals = _zero_vector()
+    for player in players:
+        _add_vector(totals, _stats_vector(player.get('stats', {}), games))
+    return totals
+
+
+def week_matchup_probabilities(vector1: List[float], vector2: List[float]) -> Tuple[float, float, float]:
+    """
+    Вероятности исхода матчапа целой будущей недели по ожидаемым недельным векторам команд.
+    
+    Returns:
+        tuple: (победа первой команды, победа второй команды, ничья)
+    """
+    cats1 = project_categories(_zero_vector(), vector1)
+    cats2 = project_categories(_zero_vector(), vector2)
+    category_probs = [
+        _category_win_probability(cats1[cat][1], cats2[cat][1], cats1[cat][2] + cats2[cat][2], lower_is_better=(cat == 'TO'))
+        for cat in CATEGORIES
+    ]
+    return _matchup_outcome_probabilities(category_probs)
+
+
+def project_matchup(matchup: Dict[str, Any], remaining1: Dict[str, Any], remaining2: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Строит прогноз одного матчапа по векторам текущих тоталов и оставшегося вклада.
+    """
+    cats1 = project_categories(matchup['team1_totals'], remaining1['vector'])
+    cats2 = project_categories(matchup['team2_totals'], remaining2['vector'])
+    
+    categories = []
+    category_probs = []
+    team1_projected_wins = 0
+    team2_projected_wins = 0
+    for cat in CATEGORIES:
+        current1, projected1, var1 = cats1[cat]
+        current2, projected2, var2 = cats2[cat]
+        p_win = _category_win_probability(projected1, projected2, var1 + var2, lower_is_better=(cat == 'TO'))
+        category_probs.append(p_win)
+        
+        if p_win > 0.5:
+            team1_projected_wins += 1
+        elif p_win < 0.5:
+            team2_projected_wins += 1
+        
+        categories.append({
+            'category': cat,
+            'team1_current': round(current1, 4),
+            'team2_current': round(current2, 4),
+            'team1_projected': round(projected1, 4),
+            'team2_projected': round(projected2, 4),
+            'team1_win_prob': round(p_win, 3)
+        })
+    
+    team1_win, team2_win, tie = _matchup_outcome_probabilities(category_probs)
+    ties = len(CATEGORIES) - team1_projected_wins - team2_projected_wins
+    
+    return {
+        'team1_id': matchup['team1_id'],
+        'team1': matchup['team1'],
+        'team2_id': matchup['team2_id'],
+        'team2': matchup['team2'],
+        'team1_games_remaining': remaining1['games'],
+        'team2_games_remaining': remaining2['games'],
+        'categories': categories,
+        'team1_expected_categories': round(sum(category_probs), 2),
+        'team2_expected_categories': round(len(CATEGORIES) - sum(category_probs), 2),
+        'projected_score': f"{team1_projected_wins}-{team2_projected_wins}-{ties}",
+        'team1_win_prob': round(team1_win, 3),
+        'team2_win_prob': round(team2_win, 3),
+        'tie_prob': round(tie, 3)
+    }
+
+
+def orient_matchup_projection(projection: Dict[str, Any], team_id: int) -> Dict[str, Any]:
+    """
+    Разворачивает прогноз матчапа так, чтобы команда team_id была team1.
+    """
+    if projection['team1_id'] == team_id:
+        return projection
+    
+    swapped = {}
+    for key, value in projection.items():
+        if key.startswith('team1'):
+            swapped['team2' + key[5:]] = value
+        elif key.startswith('team2'):
+            swapped['team1' + key[5:]] = value
+        else:
+            swapped[key] = value
+    
+    swapped['categories'] = []
+    for cat in projection['categories']:
+        swapped['categories'].append({
+            'category': cat['category'],
+            'team1_current': cat['team2_current'],
+            'team2_current': cat['team1_current'],
+            'team1_projected': cat['team2_projected'],
+            'team2_projected': cat['team1_projected'],
+            'team1_win_prob': round(1.0 - cat['team1_win_prob'], 3)
+        })
+    wins1, wins2, ties = projection['projected_score'].split('-')
+    swapped['projected_score'] = f"{wins2}-{wins1}-{ties}"
+    return swapped
+
+
+class LiveProjectionEngine:
+    """
+    Прогноз всех матчапов текущей недели с инкрементальным обновлением:
+    матчап пересчитывается, только если изменились его тоталы или оставшиеся игры.
+    Прогнозы хранятся для ограниченного числа периодов (LRU).
+    """
+    
+    def __init__(self, max_periods: int = 4):
+        """
+        Args:
+            max_periods: Максимальное количество периодов, для которых хранятся прогнозы
+        """
+        self.max_periods = max_periods
+        self._lock = threading.Lock()
+        # period -> {(team1_id, team2_id): (отпечаток входных данных, прогноз)}
+        self._projections = OrderedDict()
+        self.recomputed = 0
+        self.reused = 0
+    
+    def project_week(self, league_meta, period: str = '2026_total', now: Optional[datetime] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Прогнозирует все матчапы текущей недели.
+        
+        Args:
+            league_meta: Экземпляр LeagueMetadata
+            period: Период средних показателей игроков
+            now: Текущее время (по умолчанию - сейчас, UTC)
+        
+        Returns:
+            tuple: ({'week', 'period', 'scoring_periods_remaining', 'matchups'}, error)
+        """
+        if now is None:
+            now = datetime.now(timezone.utc)
+        
+        week = league_meta.league.currentMatchupPeriod
+        matchups = get_current_week_totals(league_meta, week)
+        if not matchups:
+            return None, "No current matchups found"
+        
+        today = getattr(league_meta.league, 'scoringPeriodId', None)
+        scoring_periods = league_meta.get_matchup_scoring_periods(week)
+        remaining_periods = [sp for sp in scoring_periods if today is None or sp >= today]
+        remaining = build_remaining_vectors(league_meta, period, remaining_periods, today, now)
+        empty = {'vector': _zero_vector(), 'games': 0}
+        
+        projections = []
+        with self._lock:
+            previous = self._projections.get(period, {})
+            # Сохраняются только матчапы текущей недели, матчапы прошлых недель удаляются
+            current = {}
+            for matchup in matchups:
+                remaining1 = remaining.get(matchup['team1_id'], empty)
+                remaining2 = remaining.get(matchup['team2_id'], empty)
+                key = (matchup['team1_id'], matchup['team2_id'])
+                fingerprint = (
+                    tuple(matchup['team1_totals']), tuple(matchup['team2_totals']),
+                    tuple(remaining1['vector']), tuple(remaining2['vector'])
+                )
+                
+                cached = previous.get(key)
+                if cached and cached[0] == fingerprint:
+                    self.reused += 1
+                    current[key] = cached
+                    projections.append(cached[1])
+                    continue
+                
+                projection = project_matchup(matchup, remaining1, remaining2)
+                current[key] = (fingerprint, projection)
+                self.recomputed += 1
+                projections.append(projection)
+            
+            self._projections[period] = current
+            self._projections.move_to_end(period)
+            while len(self._projections) > self.max_periods:
+                self._projections.popitem(last=False)
+        
+        return {
+            'week': week,
+            'period': period,
+            'scoring_periods_remaining': len(remaining_periods),
+            'matchups': projections
+        }, None
+
+
+live_projection_engine = LiveProjectionEngine()
@@ -0,0 +1,116 @@
+"""
+Запуск независимых частей расчета в общем пуле процессов с ограничением по времени.
+Пул создается один раз при старте приложения (start_pool) и переиспользуется всеми запросами.
+Процессы запускаются методом spawn, а не fork из потоков обработчиков запросов.
+Если пул не запущен (скрипты, отдельные вызовы), расчет выполняется в текущем процессе.
+"""
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional, Tuple
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# Размер общего пула и верхняя граница количества процессов одного расчета
+DEFAULT_MAX_WORKERS = 4
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+def resolve_workers(workers: int, items_count: int, min_items: int = 1) -> int:
+    """
+    Количество процессов: 0 - по числу ядер; явно заданное значение и автоматический выбор
+    ограничены DEFAULT_MAX_WORKERS и количеством заданий; при малом объеме работы (меньше min_items) - 1.
+    """
+    if workers <= 0:
+        workers = min(DEFAULT_MAX_WORKERS, os.cpu_count() or 1)
+    workers = min(workers, DEFAULT_MAX_WORKERS)
+    if items_count < min_items:
+        return 1
+    return max(1, min(workers, items_count))
+
+
+def start_pool(workers: int = 0) -> int:
+    """
+    Создает общий пул процессов (вызывается при старте приложения).
+    
+    Args:
+        workers: Размер пула (0 - по числу ядер, не больше DEFAULT_MAX_WORKERS)
+    
+    Returns:
+        Размер пула (1 - пул не нужен, расчеты выполняются в текущем процессе)
+    """
+    global _pool, _pool_size
+    size = resolve_workers(workers, DEFAULT_MAX_WORKERS)
+    with _pool_lock:
+        if _pool is None and size > 1:
+            _pool = ProcessPoolExecutor(max_workers=size, mp_context=multiprocessing.get_context('spawn'))
+        _pool_size = size
+    return size
+
+
+def shutdown_pool() -> None:
+    """Останавливает общий пул процессов (вызывается при остановке приложения)."""
+    global _pool, _pool_size
+    with _pool_lock:
+        pool, _pool, _pool_size = _pool, None, 0
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _get_pool() -> Tuple[Optional[ProcessPoolExecutor], int]:
+    """Общий пул и его размер; сломанный пул пересоздается, если пул был запущен."""
+    global _pool
+    with _pool_lock:
+        if _pool is None and _pool_size > 1:
+            _pool = ProcessPoolExecutor(max_workers=_pool_size, mp_context=multiprocessing.get_context('spawn'))
+        return _pool, _pool_size
+
+
+def _reset_broken_pool(pool: ProcessPoolExecutor) -> None:
+    """Удаляет сломанный пул, чтобы следующий расчет создал новый."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_chunks(worker: Callable, shared: Any, items: List[Any], args: Tuple, workers: int, deadline: float):
+    """
+    Выполняет worker(shared, часть items, *args) в общем пуле процессов, разбивая items на части
+    (не больше workers и размера пула). Аргументы должны быть сериализуемы, worker должен сам
+    прекращать работу после deadline. При workers <= 1, незапущенном пуле или ошибке пула
+    считает в текущем процессе.
+    
+    Returns:
+        tuple: (список результатов worker, истекло ли время, количество использованных процессов)
+    """
+    pool, pool_size = _get_pool()
+    workers = min(workers, pool_size)
+    if workers > 1 and pool is not None:
+        chunks = [items[i::workers] for i in range(workers)]
+        futures = []
+        try:
+            futures = [pool.submit(worker, shared, chunk, *args) for chunk in chunks]
+            done, not_done = wait(futures, timeout=max(deadline - time.time(), 0) + 5)
+            # Незапущенные части отменяются, запущенные завершатся сами по deadline
+            for future in not_done:
+                future.cancel()
+            return [future.result() for future in futures if future in done], bool(not_done), workers
+        except BrokenProcessPool:
+            logger.exception("Пул процессов сломан, расчет %s выполняется в текущем процессе", worker.__name__)
+            _reset_broken_pool(pool)
+        except Exception:
+            logger.exception("Ошибка в пуле процессов, расчет %s выполняется в текущем процессе", worker.__name__)
+            for future in futures:
+                future.cancel()
+    
+    return [worker(shared, items, *args)], False, 1
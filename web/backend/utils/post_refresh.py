@@ -0,0 +1,33 @@
+"""
+Этапы, выполняемые после каждого успешного обновления данных лиги
+(фоновое автообновление и POST /api/refresh-league).
+"""
+from utils.dashboard_snapshots import dashboard_snapshots
+from typing import Any, Callable, Dict, List, Tuple
+import time
+
+
+# Этапы в порядке выполнения: (название, функция от league_meta)
+POST_REFRESH_STAGES: List[Tuple[str, Callable[[Any], Any]]] = [
+    ('dashboard_snapshots', dashboard_snapshots.build),
+]
+
+
+def run_post_refresh_pipeline(league_meta) -> Dict[str, Dict[str, Any]]:
+    """
+    Выполняет этапы после обновления данных лиги.
+    Ошибка одного этапа не останавливает остальные.
+    
+    Returns:
+        dict: {этап: {'success': bool, 'result' или 'error', 'seconds': float}}
+    """
+    report = {}
+    for name, stage in POST_REFRESH_STAGES:
+        start = time.perf_counter()
+        try:
+            report[name] = {'success': True, 'result': stage(league_meta)}
+        except Exception as e:
+            print(f"Error in post-refresh stage {name}: {e}")
+            report[name] = {'success': False, 'error': str(e)}
+        report[name]['seconds'] = round(time.perf_counter() - start, 3)
+    return report
@@ -0,0 +1,105 @@
+"""
+Матрица мест команд по категориям (команды × категории).
+Для каждой категории команды сортируются один раз, равные значения делят место
+(место = 1 + число команд с большим значением), после чего места любой команды
+читаются как строка матрицы.
+"""
+from core.config import CATEGORIES
+from utils.cache import SnapshotCache
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+# Матрицы мест по периоду, режиму и конфигурации составов (сбрасываются при обновлении данных лиги)
+_rank_matrix_cache = SnapshotCache(maxsize=32)
+
+
+def build_rank_matrix(
+    rows: Dict[int, Dict[str, float]],
+    names: Optional[Dict[int, str]] = None,
+    categories: List[str] = CATEGORIES
+) -> Dict[str, Any]:
+    """
+    Строит матрицу мест команд по категориям (больше = лучше).
+    
+    Args:
+        rows: Статистика команд {team_id: {category: value}}
+        names: Названия команд {team_id: name}
+        categories: Категории (столбцы матрицы)
+    
+    Returns:
+        dict: {
+            'team_ids': [int],               # порядок строк матрицы
+            'names': [str],
+            'index': {team_id: строка},
+            'categories': [str],
+            'values': [[float]],             # values[строка][столбец]
+            'ranks': [[int]],                # места с учетом ничьих
+            'order': {category: [строка]}    # строки по убыванию значения (стабильная сортировка)
+        }
+    """
+    team_ids = list(rows.keys())
+    n = len(team_ids)
+    values = [[rows[team_id].get(cat, 0.0) for cat in categories] for team_id in team_ids]
+    ranks = [[0] * len(categories) for _ in range(n)]
+    order = {}
+    
+    for col, cat in enumerate(categories):
+        cat_order = sorted(range(n), key=lambda idx: values[idx][col], reverse=True)
+        rank = 0
+        for pos, idx in enumerate(cat_order, 1):
+            # Равные значения делят место, следующее место пропускается
+            if pos == 1 or values[idx][col] < values[cat_order[pos - 2]][col]:
+                rank = pos
+            ranks[idx][col] = rank
+        order[cat] = cat_order
+    
+    return {
+        'team_ids': team_ids,
+        'names': [(names or {}).get(team_id, f"Team {team_id}") for team_id in team_ids],
+        'index': {team_id: idx for idx, team_id in enumerate(team_ids)},
+        'categories': list(categories),
+        'values': values,
+        'ranks': ranks,
+        'order': order
+    }
+
+
+def team_category_ranks(matrix: Dict[str, Any], team_id: int) -> Dict[str, int]:
+    """
+    Места команды по категориям из матрицы.
+    
+    Returns:
+        dict: {category: rank}, пустой словарь, если команды нет в матрице
+    """
+    idx = matrix['index'].get(team_id)
+    if idx is None:
+        return {}
+    return dict(zip(matrix['categories'], matrix['ranks'][idx]))
+
+
+def get_rank_matrix(
+    league_meta,
+    key: Hashable,
+    compute_team_stats: Callable[[], Optional[Dict[int, Dict[str, Any]]]]
+) -> Optional[Dict[str, Any]]:
+    """
+    Матрица мест, кэшируемая до следующего обновления данных лиги.
+    
+    Args:
+        league_meta: Экземпляр LeagueMetadata
+        key: Ключ конфигурации (период, режим, составы)
+        compute_team_stats: Функция, возвращающая {team_id: {'name': str, 'stats': dict}} или None
+    
+    Returns:
+        Матрица в формате build_rank_matrix или None, если статистики нет
+    """
+    def compute():
+        team_stats = compute_team_stats()
+        if team_stats is None:
+            return None
+        return build_rank_matrix(
+            {team_id: data['stats'] for team_id, data in team_stats.items()},
+            {team_id: data['name'] for team_id, data in team_stats.items()}
+        )
+    
+    return _rank_matrix_cache.get_or_compute(league_meta, key, compute)
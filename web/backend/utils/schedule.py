@@ -0,0 +1,291 @@
+"""
+Расписание матчапов сезона (shedule.json).
+Файл загружается один раз и перечитывается только при изменении времени модификации,
+названия команд сопоставляются с team_id через нормализацию.
+"""
+from utils.cache import SnapshotCache
+from utils.season_results import season_results
+from utils.simulation import get_cached_round_robin
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import threading
+
+
+SCHEDULE_PATH = Path(__file__).parent.parent / "shedule.json"
+
+# Сила расписания (сбрасывается при обновлении данных лиги)
+_strength_cache = SnapshotCache(maxsize=16)
+
+# Результаты сыгранных недель по Box Score (сбрасываются при обновлении данных лиги)
+_records_cache = SnapshotCache(maxsize=8)
+
+
+def normalize_team_name(name: str) -> str:
+    """Нормализует название команды для сопоставления: лишние пробелы и регистр не учитываются."""
+    return ' '.join(str(name).split()).casefold()
+
+
+class ScheduleStore:
+    """
+    Хранилище расписания с горячей перезагрузкой по mtime файла.
+    Разобранное расписание с team_id кэшируется до смены файла или снимка данных лиги.
+    """
+    
+    def __init__(self, path: Path = SCHEDULE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._weeks = []
+        self._error = None
+        self._resolved = None
+        self._resolved_key = None
+    
+    def _reload_if_changed(self) -> None:
+        """Перечитывает файл, если он изменился. Вызывается под блокировкой."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            self._mtime = None
+            self._weeks = []
+            self._error = f"Failed to load schedule: {str(e)}"
+            return
+        
+        if mtime == self._mtime:
+            return
+        
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                raw_schedule = json.load(f)
+            weeks = []
+            for week_data in raw_schedule:
+                pairs = []
+                for matchup_str in week_data.get('matchups', []):
+                    # Строка матчапа: "Team1 vs Team2"
+                    parts = matchup_str.split(' vs ')
+                    if len(parts) == 2:
+                        pairs.append((parts[0].strip(), parts[1].strip()))
+                weeks.append({'week': int(week_data['week']), 'pairs': pairs})
+            weeks.sort(key=lambda w: w['week'])
+        except Exception as e:
+            self._mtime = mtime
+            self._weeks = []
+            self._error = f"Failed to load schedule: {str(e)}"
+            return
+        
+        self._mtime = mtime
+        self._weeks = weeks
+        self._error = None
+        self._resolved = None
+    
+    def get_version(self) -> Optional[int]:
+        """Версия расписания (mtime файла) или None, если файл недоступен."""
+        with self._lock:
+            self._reload_if_changed()
+            return self._mtime
+    
+    def resolve(self, league_meta) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Возвращает расписание с сопоставленными team_id.
+        
+        Returns:
+            tuple: ({
+                'version': int,                       # mtime файла
+                'weeks': [int],                       # номера недель по возрастанию
+                'matchups': {week: [{'team1_id', 'team2_id', 'team1', 'team2'}]},
+                'unresolved': [str],                  # матчапы с неизвестными командами
+                'team_ids': [int],                    # порядок строк матрицы opponents
+                'opponents': [[int]]                  # opponents[i][k] - индекс соперника команды i
+                                                      # на неделе weeks[k] или -1
+            }, текст ошибки или None)
+        """
+        with self._lock:
+            self._reload_if_changed()
+            if self._error:
+                return None, self._error
+            
+            key = (self._mtime, league_meta.get_snapshot_version())
+            if self._resolved is not None and self._resolved_key == key:
+                return self._resolved, None
+            
+            teams = league_meta.get_teams()
+            name_to_id = {normalize_team_name(team.team_name): team.team_id for team in teams}
+            team_ids = [team.team_id for team in teams]
+            team_index = {team_id: idx for idx, team_id in enumerate(team_ids)}
+            
+            weeks = [week_data['week'] for week_data in self._weeks]
+            matchups = {}
+            unresolved = []
+            opponents = [[-1] * len(weeks) for _ in team_ids]
+            
+            for col, week_data in enumerate(self._weeks):
+                week_matchups = []
+                for team1_name, team2_name in week_data['pairs']:
+                    team1_id = name_to_id.get(normalize_team_name(team1_name))
+                    team2_id = name_to_id.get(normalize_team_name(team2_name))
+                    if team1_id is None or team2_id is None:
+                        unresolved.append(f"{week_data['week']}: {team1_name} vs {team2_name}")
+                        continue
+                    
+                    week_matchups.append({
+                        'team1_id': team1_id,
+                        'team2_id': team2_id,
+                        'team1': team1_name,
+                        'team2': team2_name
+                    })
+                    opponents[team_index[team1_id]][col] = team_index[team2_id]
+                    opponents[team_index[team2_id]][col] = team_index[team1_id]
+                matchups[week_data['week']] = week_matchups
+            
+            self._resolved = {
+                'version': self._mtime,
+                'weeks': weeks,
+                'matchups': matchups,
+                'unresolved': unresolved,
+                'team_ids': team_ids,
+                'opponents': opponents
+            }
+            self._resolved_key = key
+            return self._resolved, None
+
+
+schedule_store = ScheduleStore()
+
+
+def get_remaining_opponents(league_meta, from_week: int) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Получает оставшихся соперников всех команд начиная с недели from_week (включительно)
+    в виде индексной матрицы.
+    
+    Returns:
+        tuple: ({'weeks': [int], 'team_ids': [int], 'opponents': [[int]]}, текст ошибки или None)
+    """
+    schedule, error = schedule_store.resolve(league_meta)
+    if error:
+        return None, error
+    
+    start = next((col for col, week in enumerate(schedule['weeks']) if week >= from_week), len(schedule['weeks']))
+    return {
+        'weeks': schedule['weeks'][start:],
+        'team_ids': schedule['team_ids'],
+        'opponents': [row[start:] for row in schedule['opponents']]
+    }, None
+
+
+def get_completed_records(league_meta, weeks: List[int]) -> Dict[int, Dict[str, int]]:
+    """
+    Рекорды команд (победы/поражения/ничьи матчапов) за сыгранные недели по реальным Box Score.
+    Недели, для которых Box Score недоступны, пропускаются.
+    
+    Args:
+        weeks: Номера сыгранных недель
+    
+    Returns:
+        dict: {team_id: {'wins': int, 'losses': int, 'ties': int}} для всех команд лиги
+    """
+    key = ('records', tuple(weeks))
+    
+    def compute():
+        records = {team.team_id: {'wins': 0, 'losses': 0, 'ties': 0} for team in league_meta.get_teams()}
+        for week_num in weeks:
+            # Результаты недели из таблицы результатов сезона (один запрос Box Score на неделю)
+            results = season_results.get_week(league_meta, week_num)
+            if not results:
+                continue
+            
+            for matchup in results['matchups']:
+                if not matchup['has_stats']:
+                    continue
+                
+                team1_id = matchup['team1_id']
+                team2_id = matchup['team2_id']
+                if matchup['winner'] == 'team1':
+                    records[team1_id]['wins'] += 1
+                    records[team2_id]['losses'] += 1
+                elif matchup['winner'] == 'team2':
+                    records[team1_id]['losses'] += 1
+                    records[team2_id]['wins'] += 1
+                else:
+                    records[team1_id]['ties'] += 1
+                    records[team2_id]['ties'] += 1
+        return records
+    
+    return _records_cache.get_or_compute(league_meta, key, compute)
+
+
+def get_remaining_strength_of_schedule(
+    league_meta,
+    from_week: int,
+    mode: str = "team_stats_avg",
+    period: str = "2026_total",
+    simulation_mode: str = "all",
+    top_n_players: int = 13
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Рассчитывает сложность оставшегося расписания каждой команды.
+    Рейтинг соперника - его винрейт в симуляции "все против всех" (берется из кэша симуляции).
+    Ошибки не кэшируются: следующий запрос повторит расчет.
+    
+    Returns:
+        tuple: ({
+            'weeks': [int],
+            'ratings': {team_id: float},   # винрейт all-play, 0..1
+            'teams': [{'team_id', 'name', 'remaining_games', 'strength', 'rank', 'opponents'}]
+        }, текст ошибки или None)
+        strength - средний рейтинг оставшихся соперников, rank 1 - самое сложное расписание.
+    """
+    version = schedule_store.get_version()
+    key = ('sos', version, from_week, mode, period, simulation_mode, top_n_players)
+    errors = []
+    
+    def compute():
+        remaining, error = get_remaining_opponents(league_meta, from_week)
+        if error:
+            errors.append(error)
+            return None
+        
+        result, error = get_cached_round_robin(
+            league_meta, from_week, None, mode, period, simulation_mode, top_n_players
+        )
+        if error:
+            errors.append(error)
+            return None
+        
+        ratings = {}
+        for idx, team_id in enumerate(result['team_ids']):
+            total_games = result['wins'][idx] + result['losses'][idx] + result['ties'][idx]
+            ratings[team_id] = (result['wins'][idx] + 0.5 * result['ties'][idx]) / total_games if total_games > 0 else 0.0
+        
+        team_ids = remaining['team_ids']
+        names = {team.team_id: team.team_name for team in league_meta.get_teams()}
+        teams = []
+        for idx, team_id in enumerate(team_ids):
+            opponent_ids = [team_ids[opp] for opp in remaining['opponents'][idx] if opp >= 0]
+            rated = [ratings[opp_id] for opp_id in opponent_ids if opp_id in ratings]
+            teams.append({
+                'team_id': team_id,
+                'name': names.get(team_id, ''),
+                'remaining_games': len(opponent_ids),
+                'strength': round(sum(rated) / len(rated), 3) if rated else None,
+                'opponents': opponent_ids
+            })
+        
+        ranked = sorted(
+            (t for t in teams if t['strength'] is not None),
+            key=lambda t: t['strength'],
+            reverse=True
+        )
+        for rank, team in enumerate(ranked, 1):
+            team['rank'] = rank
+        for team in teams:
+            team.setdefault('rank', None)
+        
+        return {
+            'weeks': remaining['weeks'],
+            'ratings': {team_id: round(rating, 3) for team_id, rating in ratings.items()},
+            'teams': teams
+        }, None
+    
+    value = _strength_cache.get_or_compute(league_meta, key, compute)
+    return value if value is not None else (None, errors[0])
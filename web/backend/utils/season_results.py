@@ -0,0 +1,277 @@
+"""
+Таблица результатов матчапов сезона.
+Для каждой недели по одному запросу Box Score рассчитываются значения категорий,
+победители категорий и счет всех матчапов лиги. Завершенные недели сохраняются
+между обновлениями данных лиги, текущая неделя пересчитывается для каждого снимка.
+История любой команды и личные встречи двух команд читаются из памяти за O(недель).
+"""
+from core.config import CATEGORIES
+from utils.cache import SnapshotCache
+from utils.simulation import decode_outcome_mask, encode_matchup
+from typing import Any, Dict, List, Optional, Tuple
+import threading
+
+
+def load_week_table(league_meta, week: int) -> Optional[Dict[int, Dict[str, Any]]]:
+    """
+    Таблица команд недели из одного запроса Box Score.
+    Порядок команд совпадает с порядком в box_scores (хозяева, затем гости).
+    
+    Returns:
+        Словарь {team_id: {
+            'team_name': str,
+            'opponent_id': int,
+            'opponent_name': str,
+            'has_lineup': bool,           # есть ли состав команды в Box Score
+            'stats': dict или None        # статистика по CATEGORIES (как в get_all_teams_stats_for_week)
+        }} или None при ошибке
+    """
+    if not league_meta.league:
+        if not league_meta.connect_to_league():
+            return None
+    
+    try:
+        box_scores = league_meta.league.box_scores(matchup_period=week)
+    except Exception as e:
+        print(f"Ошибка получения матчапов за неделю {week}: {e}")
+        return None
+    
+    if not box_scores:
+        return None
+    
+    table = {}
+    for box in box_scores:
+        sides = (
+            (box.home_team, box.home_lineup, box.away_team),
+            (box.away_team, box.away_lineup, box.home_team)
+        )
+        for team, lineup, opponent in sides:
+            if team.team_id in table:
+                continue
+            lineup_stats = league_meta._extract_team_stats_from_lineup(lineup, team.team_name)
+            table[team.team_id] = {
+                'team_name': team.team_name,
+                'opponent_id': opponent.team_id,
+                'opponent_name': opponent.team_name,
+                'has_lineup': bool(lineup),
+                'stats': lineup_stats['stats'] if lineup_stats else None
+            }
+    return table
+
+
+def build_week_results(league_meta, week: int) -> Optional[Dict[str, Any]]:
+    """
+    Результаты всех матчапов недели (правила как в get_matchup_summary).
+    Матчап попадает в таблицу, если в Box Score есть составы обеих команд.
+    
+    Returns:
+        {
+            'week': int,
+            'teams': {team_id: ...},      # таблица команд недели (load_week_table)
+            'matchups': [{
+                'team1_id', 'team2_id', 'team1', 'team2',
+                'team1_stats', 'team2_stats',              # значения по CATEGORIES
+                'category_results': {cat: 'team1'|'team2'|'tie'},
+                'team1_wins', 'team2_wins', 'ties', 'score',
+                'winner': 'team1'|'team2'|'tie',
+                'has_stats': bool                           # у обеих команд есть статистика игроков
+            }],
+            'by_team': {team_id: индекс матчапа в 'matchups'}
+        }
+        или None при ошибке
+    """
+    table = load_week_table(league_meta, week)
+    if table is None:
+        return None
+    
+    empty_stats = {cat: 0.0 for cat in CATEGORIES}
+    matchups = []
+    by_team = {}
+    for team1_id, entry in table.items():
+        team2_id = entry['opponent_id']
+        if team1_id in by_team or team2_id in by_team:
+            continue
+        
+        opponent = table.get(team2_id)
+        if not entry['has_lineup'] or not opponent or not opponent['has_lineup'] or opponent['opponent_id'] != team1_id:
+            continue
+        
+        team1_stats = entry['stats'] or empty_stats
+        team2_stats = opponent['stats'] or empty_stats
+        mask, team1_wins, team2_wins = encode_matchup(team1_stats, team2_stats)
+        
+        outcome = {'win': 'team1', 'loss': 'team2', 'tie': 'tie'}
+        category_results = {cat: outcome[label] for cat, label in decode_outcome_mask(mask).items()}
+        
+        ties = len(CATEGORIES) - team1_wins - team2_wins
+        if team1_wins > team2_wins:
+            winner = 'team1'
+        elif team2_wins > team1_wins:
+            winner = 'team2'
+        else:
+            winner = 'tie'
+        
+        by_team[team1_id] = by_team[team2_id] = len(matchups)
+        matchups.append({
+            'team1_id': team1_id,
+            'team2_id': team2_id,
+            'team1': entry['team_name'],
+            'team2': opponent['team_name'],
+            'team1_stats': team1_stats,
+            'team2_stats': team2_stats,
+            'category_results': category_results,
+            'team1_wins': team1_wins,
+            'team2_wins': team2_wins,
+            'ties': ties,
+            'score': f"{team1_wins}-{team2_wins}-{ties}",
+            'winner': winner,
+            'has_stats': entry['stats'] is not None and opponent['stats'] is not None
+        })
+    
+    return {
+        'week': week,
+        'teams': table,
+        'matchups': matchups,
+        'by_team': by_team
+    }
+
+
+def orient_week_result(matchup: Dict[str, Any], week: int, team_id: int) -> Dict[str, Any]:
+    """
+    Представляет матчап из таблицы результатов с точки зрения команды team_id.
+    
+    Returns:
+        {'week', 'team_id', 'team_name', 'opponent_id', 'opponent_name', 'stats', 'opponent_stats',
+         'wins', 'opponent_wins', 'ties', 'score', 'result': 'W'|'L'|'T',
+         'category_results': {cat: 'my_team'|'opponent'|'tie'}}
+    """
+    is_team1 = matchup['team1_id'] == team_id
+    me, other = ('team1', 'team2') if is_team1 else ('team2', 'team1')
+    wins = matchup[f'{me}_wins']
+    opponent_wins = matchup[f'{other}_wins']
+    outcome = {me: 'my_team', other: 'opponent', 'tie': 'tie'}
+    
+    return {
+        'week': week,
+        'team_id': team_id,
+        'team_name': matchup[me],
+        'opponent_id': matchup[f'{other}_id'],
+        'opponent_name': matchup[other],
+        'stats': matchup[f'{me}_stats'],
+        'opponent_stats': matchup[f'{other}_stats'],
+        'wins': wins,
+        'opponent_wins': opponent_wins,
+        'ties': matchup['ties'],
+        'score': f"{wins}-{opponent_wins}-{matchup['ties']}",
+        'result': 'W' if wins > opponent_wins else ('L' if opponent_wins > wins else 'T'),
+        'category_results': {cat: outcome[winner] for cat, winner in matchup['category_results'].items()}
+    }
+
+
+def _is_complete_week(results: Dict[str, Any]) -> bool:
+    """Есть ли в результатах недели матчапы всех команд со статистикой обеих сторон."""
+    return (
+        bool(results['matchups'])
+        and len(results['by_team']) == len(results['teams'])
+        and all(matchup['has_stats'] for matchup in results['matchups'])
+    )
+
+
+class SeasonResultsTable:
+    """
+    Результаты матчапов лиги по неделям.
+    Завершенные недели (раньше currentMatchupPeriod) рассчитываются один раз и хранятся
+    до перезапуска, текущая и будущие недели кэшируются в пределах снимка данных лиги.
+    """
+    
+    def __init__(self, live_maxsize: int = 4):
+        """
+        Args:
+            live_maxsize: Максимальное количество недель в кэше текущего снимка (текущая, будущие и неполные завершенные)
+        """
+        self._completed = {}
+        self._live = SnapshotCache(maxsize=live_maxsize)
+        self._lock = threading.Lock()
+    
+    def get_week(self, league_meta, week: int) -> Optional[Dict[str, Any]]:
+        """
+        Результаты матчапов недели (формат build_week_results) или None при ошибке.
+        Ошибки загрузки не кэшируются. Завершенная неделя сохраняется до перезапуска, только если
+        в ней есть статистика всех матчапов, иначе (например, пустые составы в Box Score)
+        она кэшируется как текущая - до следующего обновления данных лиги.
+        """
+        def compute():
+            return build_week_results(league_meta, week)
+        
+        if week >= league_meta.league.currentMatchupPeriod:
+            return self._live.get_or_compute(league_meta, ('week', week), compute)
+        
+        key = (league_meta.league_id, league_meta.year, week)
+        with self._lock:
+            results = self._completed.get(key)
+        if results is not None:
+            return results
+        
+        results = self._live.get_or_compute(league_meta, ('week', week), compute)
+        if results is not None and _is_complete_week(results):
+            with self._lock:
+                self._completed[key] = results
+        return results
+    
+    def get_team_week(self, league_meta, week: int, team_id: int) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Матчап команды за неделю с ее точки зрения (формат orient_week_result).
+        
+        Returns:
+            tuple: (матчап, текст ошибки или None)
+        """
+        results = self.get_week(league_meta, week)
+        entry = results['teams'].get(team_id) if results else None
+        if not entry or not entry['has_lineup']:
+            return None, "No current matchup found"
+        if team_id not in results['by_team']:
+            return None, "Could not get matchup summary"
+        return orient_week_result(results['matchups'][results['by_team'][team_id]], week, team_id), None
+    
+    def get_team_history(self, league_meta, team_id: int) -> List[Dict[str, Any]]:
+        """Матчапы команды за завершенные недели (от старых к новым, формат orient_week_result)."""
+        history = []
+        for week in range(1, league_meta.league.currentMatchupPeriod):
+            matchup, error = self.get_team_week(league_meta, week, team_id)
+            if not error:
+                history.append(matchup)
+        return history
+    
+    def get_head_to_head(self, league_meta, team_id: int, opponent_id: int) -> Dict[str, Any]:
+        """
+        Личные встречи двух команд за завершенные недели.
+        
+        Returns:
+            {'wins': int, 'losses': int, 'ties': int, 'category_wins': int, 'category_losses': int,
+             'category_ties': int, 'matchups': [формат orient_week_result]}
+        """
+        matchups = [m for m in self.get_team_history(league_meta, team_id) if m['opponent_id'] == opponent_id]
+        return {
+            'wins': sum(1 for m in matchups if m['result'] == 'W'),
+            'losses': sum(1 for m in matchups if m['result'] == 'L'),
+            'ties': sum(1 for m in matchups if m['result'] == 'T'),
+            'category_wins': sum(m['wins'] for m in matchups),
+            'category_losses': sum(m['opponent_wins'] for m in matchups),
+            'category_ties': sum(m['ties'] for m in matchups),
+            'matchups': matchups
+        }
+    
+    def clear(self) -> None:
+        """Очищает сохраненные результаты (например, при смене лиги)."""
+        with self._lock:
+            self._completed.clear()
+        self._live.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Статистика таблицы для мониторинга."""
+        with self._lock:
+            completed_weeks = sorted(key[2] for key in self._completed)
+        return {'completed_weeks': completed_weeks, 'live': self._live.stats()}
+
+
+season_results = SeasonResultsTable()
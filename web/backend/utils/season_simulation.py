@@ -0,0 +1,253 @@
+"""
+Монте-Карло симуляция оставшейся части сезона по расписанию (shedule.json).
+Вероятности исходов матчапов считаются по ожидаемым недельным векторам команд,
+сезоны "до" и "после" изменения составов разыгрываются на общих случайных числах,
+поэтому разница между ними имеет низкую дисперсию.
+"""
+from utils.live_projection import team_week_vector, week_matchup_probabilities
+from utils.parallel import resolve_workers, run_chunks
+from utils.schedule import get_completed_records, schedule_store
+from typing import Any, Dict, List, Optional, Tuple
+import math
+import random
+import time
+
+
+# Среднее количество игр игрока за неделю матчапа
+DEFAULT_WEEKLY_GAMES = 3.5
+
+# Количество команд в плей-офф, если в настройках лиги его нет
+DEFAULT_PLAYOFF_TEAMS = 6
+
+# Сезоны разыгрываются блоками с собственным seed: результат не зависит от количества процессов
+SEASONS_PER_CHUNK = 250
+MAX_SEASONS = 50000
+
+
+def get_playoff_team_count(league_meta, default: int = DEFAULT_PLAYOFF_TEAMS) -> int:
+    """Количество команд в плей-офф из настроек лиги ESPN."""
+    settings = getattr(league_meta.league, 'settings', None)
+    count = getattr(settings, 'playoff_team_count', None)
+    return count if isinstance(count, int) and count > 0 else default
+
+
+def _final_positions(wins: List[int], losses: List[int], ties: List[int]) -> List[int]:
+    """
+    Итоговые места команд (как в прогнозе сезона: по винрейту, затем по победам).
+    
+    Returns:
+        list: positions[i] - место команды с индексом i (с 1)
+    """
+    def sort_key(idx):
+        total_games = wins[idx] + losses[idx] + ties[idx]
+        win_rate = (wins[idx] + 0.5 * ties[idx]) / total_games if total_games > 0 else 0
+        return (win_rate, wins[idx])
+    
+    positions = [0] * len(wins)
+    for position, idx in enumerate(sorted(range(len(wins)), key=sort_key, reverse=True), 1):
+        positions[idx] = position
+    return positions
+
+
+def _play_season(slots: List[Tuple[int, int, float, float]], draws: List[float], records: Tuple[List[int], List[int], List[int]]) -> List[int]:
+    """Разыгрывает оставшиеся матчапы по заранее выбранным случайным числам и возвращает места команд."""
+    wins, losses, ties = records[0][:], records[1][:], records[2][:]
+    for (i, j, win_threshold, tie_threshold), u in zip(slots, draws):
+        if u < win_threshold:
+            wins[i] += 1
+            losses[j] += 1
+        elif u < tie_threshold:
+            ties[i] += 1
+            ties[j] += 1
+        else:
+            losses[i] += 1
+            wins[j] += 1
+    return _final_positions(wins, losses, ties)
+
+
+def _simulate_chunks(
+    payload: Dict[str, Any],
+    chunk_ids: List[int],
+    seed: int,
+    seasons: int,
+    playoff_teams: int,
+    deadline: float
+) -> Dict[str, Any]:
+    """
+    Разыгрывает блоки сезонов для составов "до" и "после" на общих случайных числах.
+    Выполняется как в текущем процессе, так и в пуле процессов.
+    
+    Returns:
+        dict: суммы по командам и количество сыгранных сезонов
+    """
+    team_count = len(payload['team_ids'])
+    totals = {
+        'seasons': 0,
+        'timed_out': False,
+        'playoffs_before': [0] * team_count,
+        'playoffs_after': [0] * team_count,
+        'playoff_changes': [0] * team_count,
+        'finish_before': [0] * team_count,
+        'finish_after': [0] * team_count,
+        'finish_diff_sq': [0] * team_count
+    }
+    before_slots = payload['before_slots']
+    after_slots = payload['after_slots']
+    records = payload['records']
+    
+    for chunk_id in chunk_ids:
+        if time.time() >= deadline:
+            totals['timed_out'] = True
+            break
+        rng = random.Random(seed * 1000003 + chunk_id)
+        count = min(SEASONS_PER_CHUNK, seasons - chunk_id * SEASONS_PER_CHUNK)
+        for _ in range(count):
+            draws = [rng.random() for _ in before_slots]
+            positions_before = _play_season(before_slots, draws, records)
+            positions_after = _play_season(after_slots, draws, records)
+            for idx in range(team_count):
+                in_before = positions_before[idx] <= playoff_teams
+                in_after = positions_after[idx] <= playoff_teams
+                totals['playoffs_before'][idx] += in_before
+                totals['playoffs_after'][idx] += in_after
+                totals['playoff_changes'][idx] += in_before != in_after
+                totals['finish_before'][idx] += positions_before[idx]
+                totals['finish_after'][idx] += positions_after[idx]
+                totals['finish_diff_sq'][idx] += (positions_after[idx] - positions_before[idx]) ** 2
+        totals['seasons'] += count
+    return totals
+
+
+def _standard_error(total_diff: float, total_diff_sq: float, seasons: int) -> Optional[float]:
+    """Стандартная ошибка среднего разницы по суммам разниц и их квадратов."""
+    if seasons < 2:
+        return None
+    mean = total_diff / seasons
+    variance = max(total_diff_sq / seasons - mean * mean, 0.0) * seasons / (seasons - 1)
+    return math.sqrt(variance / seasons)
+
+
+def simulate_playoff_odds(
+    league_meta,
+    rosters_before: Dict[int, List[Dict[str, Any]]],
+    rosters_after: Dict[int, List[Dict[str, Any]]],
+    seasons: int = 5000,
+    seed: int = 0,
+    playoff_teams: Optional[int] = None,
+    weekly_games: float = DEFAULT_WEEKLY_GAMES,
+    workers: int = 0,
+    time_budget: float = 20.0
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Сравнивает шансы на плей-офф и ожидаемое итоговое место команд для двух вариантов составов.
+    Сыгранные недели берутся из реальных Box Score, оставшиеся недели расписания (начиная с текущей)
+    разыгрываются Монте-Карло. Вероятности матчапов считаются один раз на пару команд,
+    случайные числа для каждого матчапа общие для обоих вариантов.
+    
+    Args:
+        rosters_before: {team_id: [игроки со stats]} - составы до изменения
+        rosters_after: {team_id: [игроки со stats]} - составы после изменения
+        seasons: Количество симулируемых сезонов
+        seed: Seed генератора случайных чисел (результат воспроизводим)
+        playoff_teams: Количество команд в плей-офф (None - из настроек лиги)
+        weekly_games: Среднее количество игр игрока за неделю
+    
+    Returns:
+        tuple: ({
+            'seasons', 'seed', 'playoff_teams', 'remaining_weeks',
+            'teams': [{'team_id', 'team_name',
+                       'playoff_prob_before', 'playoff_prob_after', 'playoff_prob_delta', 'playoff_prob_delta_se',
+                       'expected_finish_before', 'expected_finish_after', 'expected_finish_delta', 'expected_finish_delta_se'}],
+            'timed_out', 'workers', 'elapsed'
+        }, текст ошибки или None)
+    """
+    started = time.time()
+    deadline = started + max(time_budget, 0.0)
+    seasons = min(max(seasons, 0), MAX_SEASONS)
+    if seasons == 0:
+        return None, "Number of seasons must be positive"
+    
+    schedule, error = schedule_store.resolve(league_meta)
+    if error:
+        return None, error
+    
+    current_week = league_meta.league.currentMatchupPeriod
+    remaining_weeks = [week for week in schedule['weeks'] if week >= current_week]
+    team_ids = schedule['team_ids']
+    team_index = {team_id: idx for idx, team_id in enumerate(team_ids)}
+    names = {team.team_id: team.team_name for team in league_meta.get_teams()}
+    playoff_teams = playoff_teams or get_playoff_team_count(league_meta)
+    
+    completed = get_completed_records(league_meta, [week for week in schedule['weeks'] if week < current_week])
+    records = tuple(
+        [completed.get(team_id, {}).get(key, 0) for team_id in team_ids]
+        for key in ('wins', 'losses', 'ties')
+    )
+    
+    # Вероятности исходов считаются один раз на пару команд
+    vectors = {
+        side: {team_id: team_week_vector(rosters.get(team_id, []), weekly_games) for team_id in team_ids}
+        for side, rosters in (('before', rosters_before), ('after', rosters_after))
+    }
+    probability_cache = {}
+    
+    def slot(side, team1_id, team2_id):
+        key = (side, team1_id, team2_id)
+        if key not in probability_cache:
+            team1_win, _, tie = week_matchup_probabilities(vectors[side][team1_id], vectors[side][team2_id])
+            probability_cache[key] = (team_index[team1_id], team_index[team2_id], team1_win, team1_win + tie)
+        return probability_cache[key]
+    
+    before_slots = []
+    after_slots = []
+    for week in remaining_weeks:
+        for matchup in schedule['matchups'][week]:
+            before_slots.append(slot('before', matchup['team1_id'], matchup['team2_id']))
+            after_slots.append(slot('after', matchup['team1_id'], matchup['team2_id']))
+    
+    payload = {'team_ids': team_ids, 'before_slots': before_slots, 'after_slots': after_slots, 'records': records}
+    chunk_ids = list(range(-(-seasons // SEASONS_PER_CHUNK)))
+    workers = resolve_workers(workers, len(chunk_ids), 2)
+    outcomes, timed_out, used_workers = run_chunks(
+        _simulate_chunks, payload, chunk_ids, (seed, seasons, playoff_teams, deadline), workers, deadline
+    )
+    
+    played = sum(outcome['seasons'] for outcome in outcomes)
+    timed_out = timed_out or any(outcome['timed_out'] for outcome in outcomes)
+    if played == 0:
+        return None, "Simulation time budget exceeded"
+    
+    def total(key, idx):
+        return sum(outcome[key][idx] for outcome in outcomes)
+    
+    teams = []
+    for idx, team_id in enumerate(team_ids):
+        playoffs_before = total('playoffs_before', idx)
+        playoffs_after = total('playoffs_after', idx)
+        finish_before = total('finish_before', idx)
+        finish_after = total('finish_after', idx)
+        playoff_se = _standard_error(playoffs_after - playoffs_before, total('playoff_changes', idx), played)
+        finish_se = _standard_error(finish_after - finish_before, total('finish_diff_sq', idx), played)
+        teams.append({
+            'team_id': team_id,
+            'team_name': names.get(team_id, ''),
+            'playoff_prob_before': round(playoffs_before / played, 4),
+            'playoff_prob_after': round(playoffs_after / played, 4),
+            'playoff_prob_delta': round((playoffs_after - playoffs_before) / played, 4),
+            'playoff_prob_delta_se': round(playoff_se, 4) if playoff_se is not None else None,
+            'expected_finish_before': round(finish_before / played, 2),
+            'expected_finish_after': round(finish_after / played, 2),
+            'expected_finish_delta': round((finish_after - finish_before) / played, 2),
+            'expected_finish_delta_se': round(finish_se, 3) if finish_se is not None else None
+        })
+    
+    return {
+        'seasons': played,
+        'seed': seed,
+        'playoff_teams': playoff_teams,
+        'remaining_weeks': remaining_weeks,
+        'teams': teams,
+        'timed_out': timed_out,
+        'workers': used_workers,
+        'elapsed': round(time.time() - started, 3)
+    }, None
@@ -0,0 +1,728 @@
+"""
+Общие функции симуляции "все против всех".
+"""
+from core.config import CATEGORIES
+from core.z_score import calculate_z_scores_from_stats
+from utils.calculations import calculate_team_category_z, calculate_team_raw_stats, select_top_n_players
+from utils.cache import SnapshotCache
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Коды исхода категории (2 бита на категорию в битовой маске матчапа)
+OUTCOME_TIE = 0
+OUTCOME_WIN = 1
+OUTCOME_LOSS = 2
+OUTCOME_LABELS = {OUTCOME_TIE: 'tie', OUTCOME_WIN: 'win', OUTCOME_LOSS: 'loss'}
+
+# Маска младших битов каждой 2-битной пары (0b0101...01)
+_LOW_BITS = int('01' * len(CATEGORIES), 2)
+
+# Кэш результатов симуляции (сбрасывается при обновлении данных лиги)
+simulation_cache = SnapshotCache(maxsize=32)
+
+
+def parse_players_list(players_str: Optional[str]) -> Optional[List[str]]:
+    """
+    Парсит список игроков из строки через запятую.
+    
+    Returns:
+        list или None, если строка пустая
+    """
+    if not players_str:
+        return None
+    players = [name.strip() for name in players_str.split(',') if name.strip()]
+    return players or None
+
+
+def encode_matchup(stats1: Dict[str, float], stats2: Dict[str, float], categories: List[str] = CATEGORIES) -> Tuple[int, int, int]:
+    """
+    Сравнивает две команды по категориям и упаковывает результат в битовую маску.
+    Для категории с индексом i биты (2i, 2i+1) содержат код исхода с точки зрения первой команды.
+    
+    Args:
+        stats1: Статистика первой команды {category: value}
+        stats2: Статистика второй команды {category: value}
+        categories: Список категорий для сравнения
+    
+    Returns:
+        tuple: (маска, побед первой команды, побед второй команды)
+    """
+    mask = 0
+    wins1 = 0
+    wins2 = 0
+    for idx, cat in enumerate(categories):
+        val1 = stats1.get(cat, 0.0)
+        val2 = stats2.get(cat, 0.0)
+        
+        # TO (Turnovers) - чем меньше, тем лучше
+        if cat == 'TO':
+            first_better, second_better = val1 < val2, val2 < val1
+        else:
+            first_better, second_better = val1 > val2, val2 > val1
+        
+        if first_better:
+            wins1 += 1
+            mask |= OUTCOME_WIN << (2 * idx)
+        elif second_better:
+            wins2 += 1
+            mask |= OUTCOME_LOSS << (2 * idx)
+    return mask, wins1, wins2
+
+
+def invert_outcome_mask(mask: int) -> int:
+    """Переворачивает маску матчапа на точку зрения соперника (win <-> loss)."""
+    return ((mask & _LOW_BITS) << 1) | ((mask >> 1) & _LOW_BITS)
+
+
+def decode_outcome_mask(mask: int, categories: List[str] = CATEGORIES) -> Dict[str, str]:
+    """
+    Распаковывает маску матчапа в словарь {category: 'win'|'loss'|'tie'}.
+    """
+    return {cat: OUTCOME_LABELS[(mask >> (2 * idx)) & 0b11] for idx, cat in enumerate(categories)}
+
+
+def build_player_rosters(
+    league_meta,
+    mode: str,
+    period: str,
+    simulation_mode: str,
+    top_n_players: int,
+    custom_team_players: Optional[Dict[int, List[str]]] = None,
+    players_stats: Optional[List[Dict[str, Any]]] = None,
+    z_data: Optional[Dict[str, Any]] = None
+) -> Tuple[Dict[int, List[Dict[str, Any]]], List[Dict[str, Any]], Optional[str]]:
+    """
+    Формирует составы команд для симуляции в режимах 'team_stats_avg' и 'z_scores'
+    с учетом режима симуляции (all / exclude_ir / top_n).
+    
+    Args:
+        league_meta: Экземпляр LeagueMetadata
+        mode: 'team_stats_avg' (игроки со stats) или 'z_scores' (игроки с z_scores)
+        period: Период статистики
+        simulation_mode: 'all', 'exclude_ir' или 'top_n'
+        top_n_players: Количество игроков для режима 'top_n'
+        custom_team_players: Словарь {team_id: [имена игроков]} для ручного выбора игроков в режиме 'top_n'
+        players_stats: Уже полученная avg статистика игроков за period с учетом exclude_ir
+                       (чтобы не обходить составы повторно)
+        z_data: Уже рассчитанные по players_stats Z-scores
+    
+    Returns:
+        tuple: ({team_id: [игроки]}, [все игроки лиги], текст ошибки или None)
+    """
+    teams = league_meta.get_teams()
+    exclude_ir = (simulation_mode == "exclude_ir")
+    
+    if players_stats is None:
+        players_stats = league_meta.get_all_players_stats(period, 'avg', exclude_ir=exclude_ir)
+        z_data = None
+    
+    if mode == "team_stats_avg":
+        all_players = players_stats
+    else:
+        if z_data is None:
+            z_data = calculate_z_scores_from_stats(players_stats)
+        if not z_data['players']:
+            return {}, [], "No data found"
+        all_players = z_data['players']
+    
+    players_by_team = {}
+    for player in all_players:
+        players_by_team.setdefault(player['team_id'], []).append(player)
+    
+    # Если режим "top_n", применяем логику выбора топ-N игроков
+    if simulation_mode == "top_n":
+        # В режиме top_n exclude_ir не действует, поэтому players_stats уже содержит всех игроков
+        if z_data is None:
+            z_data = calculate_z_scores_from_stats(players_stats)
+        z_scores_by_name = {p['name']: p['z_scores'] for p in z_data['players']}
+        
+        for team in teams:
+            if team.team_id not in players_by_team:
+                continue
+            team_players = players_by_team[team.team_id]
+            if custom_team_players and custom_team_players.get(team.team_id):
+                selected_names = set(custom_team_players[team.team_id])
+                team_players = [p for p in team_players if p['name'] in selected_names]
+            else:
+                team_players = select_top_n_players(
+                    team_players,
+                    top_n_players,
+                    punt_categories=[],
+                    z_scores_data=z_scores_by_name
+                )
+            players_by_team[team.team_id] = team_players
+    
+    return players_by_team, all_players, None
+
+
+def aggregate_team_stats(team_players: List[Dict[str, Any]], mode: str) -> Dict[str, float]:
+    """
+    Рассчитывает значения категорий команды для симуляции.
+    
+    Args:
+        team_players: Игроки команды (со stats для 'team_stats_avg' или z_scores для 'z_scores')
+        mode: 'team_stats_avg' или 'z_scores'
+    
+    Returns:
+        dict: {category: value}
+    """
+    if mode == "team_stats_avg":
+        team_raw_stats = calculate_team_raw_stats(team_players)
+        return {cat: team_raw_stats.get(cat, 0.0) for cat in CATEGORIES}
+    return calculate_team_category_z(team_players)
+
+
+def build_simulation_team_stats(
+    league_meta,
+    week: int,
+    weeks_count: Optional[int],
+    mode: str,
+    period: str,
+    simulation_mode: str,
+    top_n_players: int,
+    custom_team_players: Optional[Dict[int, List[str]]] = None
+) -> Tuple[Dict[int, Dict[str, Any]], Optional[str]]:
+    """
+    Рассчитывает статистику команд для симуляции в одном из режимов.
+    
+    Args:
+        league_meta: Экземпляр LeagueMetadata
+        week: Номер недели (для режима 'matchup')
+        weeks_count: Количество недель для усреднения (для режима 'matchup')
+        mode: 'matchup', 'team_stats_avg' или 'z_scores'
+        period: Период статистики
+        simulation_mode: 'all', 'exclude_ir' или 'top_n'
+        top_n_players: Количество игроков для режима 'top_n'
+        custom_team_players: Словарь {team_id: [имена игроков]} для ручного выбора игроков в режиме 'top_n'
+    
+    Returns:
+        tuple: ({team_id: {'name': str, 'stats': dict}}, текст ошибки или None)
+    """
+    teams = league_meta.get_teams()
+    team_stats = {}
+    
+    if mode == "matchup":
+        # Режим по матчапам: если weeks_count не указан, используем все недели с начала
+        if weeks_count is None:
+            weeks_count = week
+        weeks_count = max(min(weeks_count, week), 1)
+        
+        # Таблицы команд недель из таблицы результатов сезона (один запрос Box Score на неделю)
+        from utils.season_results import season_results  # локальный импорт: season_results зависит от этого модуля
+        week_tables = []
+        for w in range(week - weeks_count + 1, week + 1):
+            if w < 1:
+                continue
+            results = season_results.get_week(league_meta, w)
+            week_tables.append(results['teams'] if results else {})
+        
+        for team in teams:
+            all_weeks_stats = []
+            for table in week_tables:
+                entry = table.get(team.team_id)
+                if entry and entry['has_lineup']:
+                    all_weeks_stats.append(entry['stats'] or league_meta.filter_stats_by_categories({}))
+            
+            if not all_weeks_stats:
+                continue
+            
+            # Усредняем статистику по всем неделям
+            avg_stats = {}
+            for cat in CATEGORIES:
+                values = [s.get(cat, 0.0) for s in all_weeks_stats if cat in s]
+                avg_stats[cat] = sum(values) / len(values) if values else 0.0
+            
+            team_stats[team.team_id] = {'name': team.team_name, 'stats': avg_stats}
+    
+    elif mode in ("team_stats_avg", "z_scores"):
+        players_by_team, _, error = build_player_rosters(
+            league_meta, mode, period, simulation_mode, top_n_players, custom_team_players
+        )
+        if error:
+            return {}, error
+        
+        for team in teams:
+            if team.team_id in players_by_team:
+                team_stats[team.team_id] = {
+                    'name': team.team_name,
+                    'stats': aggregate_team_stats(players_by_team[team.team_id], mode)
+                }
+    
+    else:
+        return {}, f"Unknown mode: {mode}"
+    
+    if not team_stats:
+        return {}, "No stats found"
+    return team_stats, None
+
+
+def run_round_robin(team_stats: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Проводит симуляцию "все против всех" и сохраняет исходы в компактном виде.
+    
+    Args:
+        team_stats: Словарь {team_id: {'name': str, 'stats': dict}}
+    
+    Returns:
+        dict: {
+            'team_ids': [int],            # порядок строк/столбцов матрицы
+            'names': [str],
+            'outcomes': [[int|None]],     # outcomes[i][j] - маска матчапа i против j с точки зрения i
+            'wins': [int], 'losses': [int], 'ties': [int]
+        }
+    """
+    team_ids = list(team_stats.keys())
+    n = len(team_ids)
+    stats_list = [team_stats[tid]['stats'] for tid in team_ids]
+    outcomes = [[None] * n for _ in range(n)]
+    wins = [0] * n
+    losses = [0] * n
+    ties = [0] * n
+    
+    for i in range(n):
+        for j in range(i + 1, n):
+            mask, wins1, wins2 = encode_matchup(stats_list[i], stats_list[j])
+            outcomes[i][j] = mask
+            outcomes[j][i] = invert_outcome_mask(mask)
+            
+            if wins1 > wins2:
+                wins[i] += 1
+                losses[j] += 1
+            elif wins2 > wins1:
+                wins[j] += 1
+                losses[i] += 1
+            else:
+                ties[i] += 1
+                ties[j] += 1
+    
+    return {
+        'team_ids': team_ids,
+        'names': [team_stats[tid]['name'] for tid in team_ids],
+        'outcomes': outcomes,
+        'wins': wins,
+        'losses': losses,
+        'ties': ties
+    }
+
+
+def count_mask_wins(mask: int) -> Tuple[int, int]:
+    """
+    Считает выигранные и проигранные категории по маске матчапа.
+    
+    Returns:
+        tuple: (побед, поражений) с точки зрения владельца маски
+    """
+    return bin(mask & _LOW_BITS).count('1'), bin((mask >> 1) & _LOW_BITS).count('1')
+
+
+def update_round_robin(
+    base_result: Dict[str, Any],
+    team_stats: Dict[int, Dict[str, Any]],
+    changed_team_ids
+) -> Dict[str, Any]:
+    """
+    Пересчитывает результат симуляции после изменения статистики части команд.
+    Заново сравниваются только пары, в которых участвует хотя бы одна изменившаяся команда,
+    остальные исходы берутся из базового результата.
+    
+    Args:
+        base_result: Результат run_round_robin для исходной статистики
+        team_stats: Новая статистика команд {team_id: {'name': str, 'stats': dict}}
+        changed_team_ids: ID команд, чья статистика изменилась
+    
+    Returns:
+        dict: Результат в формате run_round_robin
+    """
+    team_ids = list(team_stats.keys())
+    if team_ids != base_result['team_ids']:
+        # Изменился состав участников - пересчитываем полностью
+        return run_round_robin(team_stats)
+    
+    n = len(team_ids)
+    stats_list = [team_stats[tid]['stats'] for tid in team_ids]
+    outcomes = [row[:] for row in base_result['outcomes']]
+    changed_idx = {idx for idx, tid in enumerate(team_ids) if tid in changed_team_ids}
+    
+    for i in sorted(changed_idx):
+        for j in range(n):
+            # Пару двух изменившихся команд сравниваем один раз
+            if j == i or (j in changed_idx and j < i):
+                continue
+            mask, _, _ = encode_matchup(stats_list[i], stats_list[j])
+            outcomes[i][j] = mask
+            outcomes[j][i] = invert_outcome_mask(mask)
+    
+    wins = [0] * n
+    losses = [0] * n
+    ties = [0] * n
+    for i in range(n):
+        for j in range(i + 1, n):
+            wins1, wins2 = count_mask_wins(outcomes[i][j])
+            if wins1 > wins2:
+                wins[i] += 1
+                losses[j] += 1
+            elif wins2 > wins1:
+                wins[j] += 1
+                losses[i] += 1
+            else:
+                ties[i] += 1
+                ties[j] += 1
+    
+    return {
+        'team_ids': team_ids,
+        'names': [team_stats[tid]['name'] for tid in team_ids],
+        'outcomes': outcomes,
+        'wins': wins,
+        'losses': losses,
+        'ties': ties
+    }
+
+
+def categories_mask(categories: List[str]) -> int:
+    """Маска 2-битных пар для указанных категорий (для фильтрации масок матчапов)."""
+    mask = 0
+    for idx, cat in enumerate(CATEGORIES):
+        if cat in categories:
+            mask |= 0b11 << (2 * idx)
+    return mask
+
+
+def recount_round_robin(result: Dict[str, Any], keep_mask: int) -> Dict[str, Any]:
+    """
+    Пересчитывает победы/поражения/ничьи по сохраненным маскам, учитывая только категории из keep_mask
+    (например, без пант-категорий). Статистику команд повторно не сравнивает.
+    
+    Returns:
+        dict: Результат в формате run_round_robin
+    """
+    n = len(result['team_ids'])
+    outcomes = [[mask & keep_mask if mask is not None else None for mask in row] for row in result['outcomes']]
+    wins = [0] * n
+    losses = [0] * n
+    ties = [0] * n
+    for i in range(n):
+        for j in range(i + 1, n):
+            wins1, wins2 = count_mask_wins(outcomes[i][j])
+            if wins1 > wins2:
+                wins[i] += 1
+                losses[j] += 1
+            elif wins2 > wins1:
+                wins[j] += 1
+                losses[i] += 1
+            else:
+                ties[i] += 1
+                ties[j] += 1
+    
+    return dict(result, outcomes=outcomes, wins=wins, losses=losses, ties=ties)
+
+
+def get_round_robin_standings(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Формирует таблицу результатов симуляции, отсортированную по винрейту.
+    
+    Returns:
+        list: [{'team_id', 'name', 'wins', 'losses', 'ties', 'win_rate' (в процентах)}]
+    """
+    standings = []
+    for idx, team_id in enumerate(result['team_ids']):
+        wins = result['wins'][idx]
+        losses = result['losses'][idx]
+        ties = result['ties'][idx]
+        total_games = wins + losses + ties
+        
+        # Винрейт: ничья = 0.5 победы
+        win_rate = (wins + 0.5 * ties) / total_games if total_games > 0 else 0
+        
+        standings.append({
+            'team_id': team_id,
+            'name': result['names'][idx],
+            'wins': wins,
+            'losses': losses,
+            'ties': ties,
+            'win_rate': round(win_rate * 100, 1)
+        })
+    
+    standings.sort(key=lambda x: x['win_rate'], reverse=True)
+    return standings
+
+
+def expand_team_matchups(result: Dict[str, Any], team_idx: int) -> List[Dict[str, Any]]:
+    """
+    Разворачивает матчапы одной команды из компактного результата в подробный формат.
+    
+    Args:
+        result: Результат run_round_robin
+        team_idx: Индекс команды в result['team_ids']
+    
+    Returns:
+        list: [{'opponent_id', 'opponent_name', 'result', 'score', 'categories'}]
+    """
+    matchups = []
+    for j, mask in enumerate(result['outcomes'][team_idx]):
+        if mask is None:
+            continue
+        categories = decode_outcome_mask(mask)
+        my_wins = sum(1 for res in categories.values() if res == 'win')
+        opponent_wins = sum(1 for res in categories.values() if res == 'loss')
+        
+        if my_wins > opponent_wins:
+            matchup_result = 'win'
+        elif opponent_wins > my_wins:
+            matchup_result = 'loss'
+        else:
+            matchup_result = 'tie'
+        
+        matchups.append({
+            'opponent_id': result['team_ids'][j],
+            'opponent_name': result['names'][j],
+            'result': matchup_result,
+            'score': f"{my_wins}-{opponent_wins}",
+            'categories': categories
+        })
+    return matchups
+
+
+def _round_robin_key(
+    week: Optional[int],
+    weeks_count: Optional[int],
+    mode: str,
+    period: str,
+    simulation_mode: str,
+    top_n_players: int,
+    custom_team_players: Optional[Dict[int, List[str]]] = None
+) -> Tuple:
+    """Ключ кэша результата симуляции "все против всех"."""
+    custom_key = None
+    if custom_team_players:
+        custom_key = tuple(sorted(
+            (team_id, tuple(sorted(names))) for team_id, names in custom_team_players.items() if names
+        ))
+    # Неделя влияет только на режим 'matchup', для остальных режимов не включаем ее в ключ
+    if mode != "matchup":
+        week, weeks_count = None, None
+    return ('round_robin', week, weeks_count, mode, period, simulation_mode, top_n_players, custom_key)
+
+
+def get_cached_round_robin(
+    league_meta,
+    week: int,
+    weeks_count: Optional[int],
+    mode: str,
+    period: str,
+    simulation_mode: str,
+    top_n_players: int,
+    custom_team_players: Optional[Dict[int, List[str]]] = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Возвращает результат симуляции "все против всех" из кэша или рассчитывает его.
+    Ошибки не кэшируются: следующий запрос повторит расчет.
+    
+    Returns:
+        tuple: (результат run_round_robin или None, текст ошибки или None)
+    """
+    key = _round_robin_key(week, weeks_count, mode, period, simulation_mode, top_n_players, custom_team_players)
+    errors = []
+    
+    def compute():
+        team_stats, error = build_simulation_team_stats(
+            league_meta, week, weeks_count, mode, period, simulation_mode, top_n_players, custom_team_players
+        )
+        if error:
+            errors.append(error)
+            return None
+        return run_round_robin(team_stats), None
+    
+    value = simulation_cache.get_or_compute(league_meta, key, compute)
+    return value if value is not None else (None, errors[0])
+
+
+def evaluate_roster_scenarios(
+    league_meta,
+    scenarios: List[Dict[int, List[str]]],
+    mode: str,
+    period: str,
+    simulation_mode: str,
+    top_n_players: int
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Оценивает набор сценариев составов за один проход.
+    Общее состояние лиги (игроки, составы, базовая симуляция) строится один раз,
+    для каждого сценария пересчитываются только затронутые команды и их матчапы.
+    
+    Args:
+        league_meta: Экземпляр LeagueMetadata
+        scenarios: Список сценариев, каждый - словарь {team_id: [имена игроков]}.
+                   Для указанных команд используются ровно эти игроки (из любого состава лиги),
+                   остальные команды играют базовым составом.
+        mode: 'team_stats_avg' или 'z_scores'
+        period: Период статистики
+        simulation_mode: 'all', 'exclude_ir' или 'top_n' (влияет на базовые составы)
+        top_n_players: Количество игроков для режима 'top_n'
+    
+    Returns:
+        tuple: ({'baseline': [...], 'scenarios': [...]}, текст ошибки или None)
+    """
+    if mode not in ("team_stats_avg", "z_scores"):
+        return None, f"Unsupported mode for roster scenarios: {mode}"
+    
+    players_by_team, all_players, error = build_player_rosters(
+        league_meta, mode, period, simulation_mode, top_n_players
+    )
+    if error:
+        return None, error
+    
+    teams = league_meta.get_teams()
+    team_names = {team.team_id: team.team_name for team in teams}
+    base_team_stats = {
+        team.team_id: {
+            'name': team.team_name,
+            'stats': aggregate_team_stats(players_by_team[team.team_id], mode)
+        }
+        for team in teams if team.team_id in players_by_team
+    }
+    if not base_team_stats:
+        return None, "No stats found"
+    
+    base_result = run_round_robin(base_team_stats)
+    players_by_name = {p['name']: p for p in all_players}
+    
+    scenario_results = []
+    for idx, scenario in enumerate(scenarios):
+        team_stats = dict(base_team_stats)
+        unknown_players = []
+        unknown_teams = []
+        
+        for team_id, player_names in scenario.items():
+            if team_id not in team_names:
+                unknown_teams.append(team_id)
+                continue
+            selected = []
+            for name in player_names:
+                if name in players_by_name:
+                    selected.append(players_by_name[name])
+                else:
+                    unknown_players.append(name)
+            team_stats[team_id] = {'name': team_names[team_id], 'stats': aggregate_team_stats(selected, mode)}
+        
+        # Сохраняем порядок команд базовой симуляции, чтобы переиспользовать ее исходы
+        ordered_stats = {tid: team_stats[tid] for tid in base_team_stats}
+        for tid in team_stats:
+            if tid not in ordered_stats:
+                ordered_stats[tid] = team_stats[tid]
+        
+        result = update_round_robin(base_result, ordered_stats, set(scenario.keys()))
+        standings = get_round_robin_standings(result)
+        
+        scenario_results.append({
+            'index': idx,
+            'ranks': {standing['team_id']: rank for rank, standing in enumerate(standings, 1)},
+            'results': standings,
+            'unknown_players': unknown_players,
+            'unknown_teams': unknown_teams
+        })
+    
+    return {
+        'baseline': get_round_robin_standings(base_result),
+        'scenarios': scenario_results
+    }, None
+
+
+def run_simulation_sweep(
+    league_meta,
+    periods: List[str],
+    modes: List[str],
+    simulation_mode: str,
+    top_n_players: int
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Симуляция "все против всех" сразу для нескольких периодов и режимов.
+    Составы обходятся один раз для всех периодов, Z-scores периода считаются один раз
+    и используются обоими режимами. Результаты сохраняются в общий кэш симуляции,
+    поэтому последующие запросы /simulation/{week} с теми же параметрами берутся из кэша.
+    
+    Args:
+        league_meta: Экземпляр LeagueMetadata
+        periods: Список периодов статистики
+        modes: Список режимов ('team_stats_avg' и/или 'z_scores')
+        simulation_mode: 'all', 'exclude_ir' или 'top_n'
+        top_n_players: Количество игроков для режима 'top_n'
+    
+    Returns:
+        tuple: ({
+            'team_ids': [int], 'names': [str],
+            'ranks': {mode: {period: [int|None]}},        # место команды (порядок team_ids)
+            'win_rates': {mode: {period: [float|None]}},  # винрейт в процентах
+            'errors': {mode: {period: str}}
+        }, текст ошибки или None)
+    """
+    unsupported = [mode for mode in modes if mode not in ("team_stats_avg", "z_scores")]
+    if unsupported:
+        return None, f"Unsupported mode for sweep: {', '.join(unsupported)}"
+    
+    teams = league_meta.get_teams()
+    team_ids = [team.team_id for team in teams]
+    exclude_ir = (simulation_mode == "exclude_ir")
+    
+    def cache_key(mode, period):
+        return _round_robin_key(None, None, mode, period, simulation_mode, top_n_players)
+    
+    version = league_meta.get_snapshot_version()
+    results = {}
+    missing_periods = []
+    for period in periods:
+        for mode in modes:
+            cached = simulation_cache.get(league_meta, cache_key(mode, period))
+            if cached is not None:
+                results[(mode, period)] = cached
+            elif period not in missing_periods:
+                missing_periods.append(period)
+    
+    if missing_periods:
+        players_by_period = league_meta.get_all_players_stats_for_periods(missing_periods, 'avg', exclude_ir=exclude_ir)
+        for period in missing_periods:
+            players_stats = players_by_period[period]
+            z_data = calculate_z_scores_from_stats(players_stats)
+            for mode in modes:
+                if (mode, period) in results:
+                    continue
+                players_by_team, _, error = build_player_rosters(
+                    league_meta, mode, period, simulation_mode, top_n_players,
+                    players_stats=players_stats, z_data=z_data
+                )
+                team_stats = {
+                    team.team_id: {
+                        'name': team.team_name,
+                        'stats': aggregate_team_stats(players_by_team[team.team_id], mode)
+                    }
+                    for team in teams if not error and team.team_id in players_by_team
+                }
+                if not error and not team_stats:
+                    error = "No stats found"
+                value = (None, error) if error else (run_round_robin(team_stats), None)
+                if not error:
+                    # Ошибки не кэшируются: следующий запрос повторит расчет
+                    simulation_cache.set(league_meta, cache_key(mode, period), value, version)
+                results[(mode, period)] = value
+    
+    ranks = {mode: {} for mode in modes}
+    win_rates = {mode: {} for mode in modes}
+    errors = {mode: {} for mode in modes}
+    for (mode, period), (result, error) in results.items():
+        if error:
+            errors[mode][period] = error
+            ranks[mode][period] = [None] * len(team_ids)
+            win_rates[mode][period] = [None] * len(team_ids)
+            continue
+        standings = get_round_robin_standings(result)
+        rank_by_team = {standing['team_id']: rank for rank, standing in enumerate(standings, 1)}
+        rate_by_team = {standing['team_id']: standing['win_rate'] for standing in standings}
+        ranks[mode][period] = [rank_by_team.get(team_id) for team_id in team_ids]
+        win_rates[mode][period] = [rate_by_team.get(team_id) for team_id in team_ids]
+    
+    return {
+        'team_ids': team_ids,
+        'names': [team.team_name for team in teams],
+        'ranks': ranks,
+        'win_rates': win_rates,
+        'errors': {mode: errs for mode, errs in errors.items() if errs}
+    }, None
@@ -0,0 +1,128 @@
+"""
+Турнирная таблица лиги.
+Строится один раз на снимок данных лиги (после каждого обновления) и содержит для каждой команды
+место, рекорд, винрейт, отставание от лидера и ключи тай-брейка, поэтому место любой команды
+читается из словаря без повторной сортировки лиги.
+"""
+from utils.cache import SnapshotCache
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Поля команды ESPN с местом в лиге (в порядке приоритета)
+ESPN_STANDING_FIELDS = ['standing', 'rank', 'overall_rank', 'final_standing', 'standing_position']
+
+# Турнирная таблица (сбрасывается при обновлении данных лиги)
+_standings_cache = SnapshotCache(maxsize=2)
+
+
+def _espn_ranks(league_meta, teams: List[Any]) -> Tuple[Optional[Dict[int, int]], Optional[str]]:
+    """
+    Места команд по данным ESPN, если они известны для всех команд лиги.
+    
+    Returns:
+        tuple: ({team_id: место} или None, источник)
+    """
+    # Поле с местом у каждой команды
+    for field in ESPN_STANDING_FIELDS:
+        ranks = {}
+        for team in teams:
+            value = getattr(team, field, None)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 1:
+                break
+            ranks[team.team_id] = int(value)
+        else:
+            if teams:
+                return ranks, field
+    
+    # league.standings - список команд (или метод, возвращающий его), отсортированный по месту
+    standings = getattr(league_meta.league, 'standings', None)
+    try:
+        if callable(standings):
+            standings = standings()
+    except Exception as e:
+        print(f"Error getting league standings: {e}")
+        standings = None
+    
+    if isinstance(standings, list) and standings:
+        ranks = {}
+        for idx, standing_team in enumerate(standings):
+            if isinstance(standing_team, dict):
+                team_id = standing_team.get('team_id')
+            else:
+                team_id = getattr(standing_team, 'team_id', None)
+            if team_id is not None and team_id not in ranks:
+                ranks[team_id] = idx + 1
+        if all(team.team_id in ranks for team in teams):
+            return ranks, 'standings'
+    
+    return None, 'record'
+
+
+def build_standings(league_meta) -> Dict[str, Any]:
+    """
+    Строит турнирную таблицу лиги.
+    Место берется из ESPN (поле команды или league.standings), если оно известно для всех команд,
+    иначе рассчитывается по рекорду: винрейт (ничья = половина победы), затем победы, затем меньше поражений.
+    
+    Returns:
+        {
+            'source': str,     # поле ESPN, 'standings' или 'record'
+            'teams': [{
+                'rank', 'team_id', 'team_name', 'wins', 'losses', 'ties',
+                'win_pct',     # 0..1
+                'games_back',  # отставание от лидера в матчах
+                'tiebreak'     # [win_pct, wins, -losses] - ключи сортировки по рекорду
+            }],                # отсортированы по месту
+            'by_team': {team_id: строка таблицы}
+        }
+    """
+    teams = league_meta.get_teams()
+    
+    rows = []
+    for team in teams:
+        wins = getattr(team, 'wins', 0) or 0
+        losses = getattr(team, 'losses', 0) or 0
+        ties = getattr(team, 'ties', 0) or 0
+        total_games = wins + losses + ties
+        win_pct = (wins + 0.5 * ties) / total_games if total_games > 0 else 0
+        rows.append({
+            'team_id': team.team_id,
+            'team_name': team.team_name,
+            'wins': wins,
+            'losses': losses,
+            'ties': ties,
+            'win_pct': round(win_pct, 3),
+            'tiebreak': [win_pct, wins, -losses]
+        })
+    
+    ranks, source = _espn_ranks(league_meta, teams)
+    if ranks:
+        rows.sort(key=lambda row: (ranks[row['team_id']], [-key for key in row['tiebreak']]))
+        for row in rows:
+            row['rank'] = ranks[row['team_id']]
+    else:
+        # Стабильная сортировка: при полном равенстве сохраняется порядок команд ESPN
+        rows.sort(key=lambda row: row['tiebreak'], reverse=True)
+        for idx, row in enumerate(rows):
+            row['rank'] = idx + 1
+    
+    if rows:
+        leader = rows[0]
+        for row in rows:
+            row['games_back'] = ((leader['wins'] - row['wins']) + (row['losses'] - leader['losses'])) / 2
+    
+    return {
+        'source': source,
+        'teams': rows,
+        'by_team': {row['team_id']: row for row in rows}
+    }
+
+
+def get_standings(league_meta) -> Dict[str, Any]:
+    """Турнирная таблица лиги (формат build_standings), кэшируется до следующего обновления данных."""
+    return _standings_cache.get_or_compute(league_meta, ('standings',), lambda: build_standings(league_meta))
+
+
+def get_team_standing(league_meta, team_id: int) -> Optional[Dict[str, Any]]:
+    """Строка турнирной таблицы команды или None, если команда не найдена."""
+    return get_standings(league_meta)['by_team'].get(team_id)
@@ -0,0 +1,379 @@
+"""
+Планировщик стриминга свободных агентов в текущем матчапе.
+Подбирает последовательность замен (отчисляю игрока в день d - подписываю свободного агента с дня d),
+которая максимизирует ожидаемый вклад стартовых игроков в категории за оставшиеся игровые дни
+с учетом ограничений слотов в каждый день.
+"""
+from core.config import CATEGORIES
+from core.z_score import COUNTING_CATEGORIES
+from utils.free_agents import get_free_agent_pool
+from utils.lineup_data import get_available_lineup_players, get_lineup_z_data
+from utils.lineup_optimizer import LINEUP_SLOTS, best_lineup_value, player_slot_mask
+from utils.live_projection import COUNT_KEYS, remaining_game_periods, week_category_stats
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import math
+import time
+
+
+# Количество свободных агентов с лучшей оценкой, которые рассматриваются для каждого дня замены
+FREE_AGENTS_PER_DAY = 25
+
+# Минимальный прирост, при котором замена имеет смысл
+MIN_GAIN = 1e-9
+
+
+def _game_value(z_scores: Dict[str, float], punt_categories: List[str], offset: float) -> float:
+    """
+    Ожидаемый вклад игрока в категории за одну игру: сумма Z-scores по категориям без пантов
+    плюс средний вклад игры в счетные категории (offset), поэтому любая игра имеет ценность.
+    """
+    total = sum(
+        z for cat, z in z_scores.items()
+        if cat in CATEGORIES and cat not in punt_categories and math.isfinite(z)
+    )
+    return total + offset
+
+
+def _counting_offset(league_metrics: Dict[str, Any], punt_categories: List[str]) -> float:
+    """Средний вклад игры в счетные категории в единицах стандартного отклонения (mean / std)."""
+    offset = 0.0
+    for cat in COUNTING_CATEGORIES:
+        if cat in punt_categories or cat not in league_metrics:
+            continue
+        std = league_metrics[cat]['std']
+        if std > 0:
+            offset += league_metrics[cat]['mean'] / std
+    return offset
+
+
+class _StreamingState:
+    """
+    Состояние плана: участники состава (включая отчисленных и подписанных по ходу недели)
+    с игровыми днями, лучший стартовый состав и его ценность для каждого дня.
+    """
+    
+    def __init__(self, days: List[int], members: List[Dict[str, Any]]):
+        self.days = days
+        self.members = members
+        self.day_values = {}
+        self.day_starters = {}
+        for day in days:
+            self.day_values[day], self.day_starters[day] = self._solve_day(day, members)
+    
+    @staticmethod
+    def _solve_day(day: int, members: List[Dict[str, Any]]) -> Tuple[float, List[int]]:
+        """Лучший стартовый состав дня: (ценность, индексы участников в старте)."""
+        playing = [idx for idx, member in enumerate(members) if day in member['days']]
+        value, starters = best_lineup_value(
+            [members[idx]['value'] for idx in playing],
+            [members[idx]['mask'] for idx in playing]
+        )
+        return value, [playing[idx] for idx in starters]
+    
+    def total_value(self) -> float:
+        return sum(self.day_values.values())
+    
+    def total_starts(self) -> int:
+        return sum(len(starters) for starters in self.day_starters.values())
+    
+    def droppable(self, day: int) -> List[int]:
+        """Участники, которых можно отчислить в день day (еще в составе и подписаны раньше этого дня)."""
+        return [
+            idx for idx, member in enumerate(self.members)
+            if member['dropped_on'] is None and member['added_on'] < day
+        ]
+    
+    def evaluate(self, drop_idx: int, fa: Dict[str, Any], day: int) -> Dict[str, Any]:
+        """
+        Точная оценка замены: пересчитываются только дни начиная с day,
+        в которые играет отчисляемый игрок или свободный агент.
+        """
+        dropped = dict(self.members[drop_idx], days={d for d in self.members[drop_idx]['days'] if d < day}, dropped_on=day)
+        added = {
+            'name': fa['name'],
+            'value': fa['value'],
+            'mask': fa['mask'],
+            'days': {d for d in fa['days'] if d >= day},
+            'stats': fa['stats'],
+            'added_on': day,
+            'dropped_on': None,
+            'free_agent': True
+        }
+        members = self.members[:]
+        members[drop_idx] = dropped
+        members.append(added)
+        
+        affected = (self.members[drop_idx]['days'] | added['days']) - dropped['days']
+        day_values = {}
+        day_starters = {}
+        for affected_day in affected:
+            day_values[affected_day], day_starters[affected_day] = self._solve_day(affected_day, members)
+        
+        return {
+            'members': members,
+            'day_values': day_values,
+            'day_starters': day_starters,
+            'gain': sum(day_values[d] - self.day_values[d] for d in affected),
+            'starts_gain': sum(len(day_starters[d]) - len(self.day_starters[d]) for d in affected)
+        }
+    
+    def apply(self, evaluation: Dict[str, Any]) -> '_StreamingState':
+        """Новое состояние после замены (без полного пересчета дней)."""
+        state = _StreamingState.__new__(_StreamingState)
+        state.days = self.days
+        state.members = evaluation['members']
+        state.day_values = {**self.day_values, **evaluation['day_values']}
+        state.day_starters = {**self.day_starters, **evaluation['day_starters']}
+        return state
+    
+    def candidates(self, free_agents: List[Dict[str, Any]], used_names: set, limit: int) -> List[Tuple[float, int, int, int]]:
+        """
+        Быстрая оценка замен без решения задачи о назначении:
+        свободный агент получает полную ценность игры, если в день есть свободный слот,
+        иначе - разницу со слабейшим стартовым игроком; отчисляемый теряет свои старты.
+        
+        Returns:
+            list: [(оценка, индекс участника, индекс свободного агента, день замены)]
+        """
+        open_day = {day: len(self.day_starters[day]) < len(LINEUP_SLOTS) for day in self.days}
+        weakest = {
+            day: min((self.members[idx]['value'] for idx in starters), default=0.0)
+            for day, starters in self.day_starters.items()
+        }
+        starts_on = {day: set(starters) for day, starters in self.day_starters.items()}
+        
+        candidates = []
+        for day in self.days:
+            droppable = self.droppable(day)
+            if not droppable:
+                continue
+            
+            # Лучшие свободные агенты для замены в этот день
+            fa_scores = []
+            for fa_idx, fa in enumerate(free_agents):
+                if fa['name'] in used_names:
+                    continue
+                score = 0.0
+                for game_day in fa['days']:
+                    if game_day < day:
+                        continue
+                    score += fa['value'] if open_day[game_day] else max(0.0, fa['value'] - weakest[game_day])
+                if score > 0:
+                    fa_scores.append((score, fa_idx))
+            fa_scores.sort(reverse=True)
+            
+            for _, fa_idx in fa_scores[:FREE_AGENTS_PER_DAY]:
+                fa = free_agents[fa_idx]
+                for drop_idx in droppable:
+                    member = self.members[drop_idx]
+                    estimate = 0.0
+                    for game_day in self.days:
+                        if game_day < day:
+                            continue
+                        starts = drop_idx in starts_on[game_day] and game_day in member['days']
+                        plays = game_day in fa['days']
+                        if plays and starts:
+                            estimate += fa['value'] - member['value']
+                        elif plays:
+                            estimate += fa['value'] if open_day[game_day] else max(0.0, fa['value'] - weakest[game_day])
+                        elif starts:
+                            estimate -= member['value']
+                    if estimate > MIN_GAIN:
+                        candidates.append((estimate, drop_idx, fa_idx, day))
+        
+        candidates.sort(key=lambda x: x[0], reverse=True)
+        return candidates[:limit]
+    
+    def best_moves(self, free_agents: List[Dict[str, Any]], used_names: set, limit: int, count: int) -> Tuple[List[Tuple[Dict[str, Any], int, int]], int]:
+        """
+        Точная оценка лучших по быстрой оценке замен.
+        
+        Returns:
+            tuple: ([(результат evaluate, индекс свободного агента, день)] по убыванию прироста, количество точных оценок)
+        """
+        moves = []
+        candidates = self.candidates(free_agents, used_names, limit)
+        for _, drop_idx, fa_idx, day in candidates:
+            evaluation = self.evaluate(drop_idx, free_agents[fa_idx], day)
+            if evaluation['gain'] > MIN_GAIN:
+                evaluation['drop_idx'] = drop_idx
+                moves.append((evaluation, fa_idx, day))
+        moves.sort(key=lambda x: x[0]['gain'], reverse=True)
+        return moves[:count], len(candidates)
+
+
+def _category_totals(state: _StreamingState) -> Dict[str, float]:
+    """Прогноз категорий по стартовым играм (средние за игру × количество стартов)."""
+    totals = [0.0] * len(COUNT_KEYS)
+    for starters in state.day_starters.values():
+        for idx in starters:
+            stats = state.members[idx]['stats']
+            for key_idx, key in enumerate(COUNT_KEYS):
+                totals[key_idx] += stats.get(key, 0.0)
+    return week_category_stats(totals)
+
+
+def plan_streaming_adds(
+    league_meta,
+    team_id: int,
+    period: str = "2026_total",
+    punt_categories: Optional[List[str]] = None,
+    max_adds: int = 3,
+    pool_size: int = 200,
+    candidate_limit: int = 60,
+    lookahead: int = 3,
+    now: Optional[datetime] = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Строит план стриминга на оставшиеся дни текущего матчапа.
+    
+    Решатель - жадный с просмотром на шаг вперед: на каждом шаге точно оцениваются
+    candidate_limit лучших по быстрой оценке замен, из lookahead лучших выбирается та,
+    после которой сумма ее прироста и лучшего следующего прироста максимальна.
+    
+    Args:
+        team_id: ID команды
+        period: Период средних показателей
+        punt_categories: Пант-категории (не учитываются в ценности игры)
+        max_adds: Лимит подписаний на неделю
+        pool_size: Количество свободных агентов в пуле
+        candidate_limit: Количество точных оценок на шаге
+        lookahead: Количество лучших замен, для которых просматривается следующий шаг
+        now: Текущее время (по умолчанию - сейчас, UTC)
+    
+    Returns:
+        tuple: ({'team_id', 'week', 'days', 'moves', 'base', 'final', 'stats'}, текст ошибки или None)
+    """
+    started = time.time()
+    punt_categories = punt_categories or []
+    if now is None:
+        now = datetime.now(timezone.utc)
+    if league_meta.get_team_by_id(team_id) is None:
+        return None, "Team not found"
+    
+    week = league_meta.league.currentMatchupPeriod
+    today = getattr(league_meta.league, 'scoringPeriodId', None)
+    days = [sp for sp in league_meta.get_matchup_scoring_periods(week) if today is None or sp >= today]
+    if not days:
+        return None, "No scoring periods left in current matchup"
+    
+    z_data = get_lineup_z_data(league_meta, period)
+    offset = _counting_offset(z_data['league_metrics'], punt_categories)
+    
+    # Участники состава: доступные игроки команды с игровыми днями
+    players, roster = get_available_lineup_players(league_meta, team_id, z_data['z_scores_by_name'])
+    if not players:
+        return None, "No available players"
+    members = []
+    for player, player_obj in zip(players, roster):
+        members.append({
+            'name': player['name'],
+            'value': _game_value(player['z_scores'], punt_categories, offset),
+            'mask': player_slot_mask(player),
+            'days': set(remaining_game_periods(getattr(player_obj, 'schedule', None) or {}, days, today, now)),
+            'stats': league_meta.get_player_stats(player_obj, period, 'avg') or {},
+            'added_on': days[0] - 1,
+            'dropped_on': None,
+            'free_agent': False
+        })
+    
+    # Свободные агенты с оставшимися играми
+    free_agents = []
+    for fa in get_free_agent_pool(league_meta, period, size=pool_size):
+        if fa['injury_status'] == 'OUT':
+            continue
+        fa_days = remaining_game_periods(fa['schedule'], days, today, now)
+        if not fa_days:
+            continue
+        free_agents.append({
+            'name': fa['name'],
+            'position': fa['position'],
+            'nba_team': fa['nba_team'],
+            'value': _game_value(fa['z_scores'], punt_categories, offset),
+            'mask': player_slot_mask(fa),
+            'days': set(fa_days),
+            'stats': fa['stats']
+        })
+    
+    base_state = _StreamingState(days, members)
+    state = base_state
+    used_names = set()
+    moves = []
+    evaluated = 0
+    for add_number in range(max(max_adds, 0)):
+        options, count = state.best_moves(free_agents, used_names, candidate_limit, max(lookahead, 1))
+        evaluated += count
+        if not options:
+            break
+        
+        # Просмотр на шаг вперед, если остались подписания
+        best = options[0]
+        if add_number + 1 < max_adds and len(options) > 1:
+            best_total = None
+            for option in options:
+                evaluation, fa_idx, _ = option
+                next_state = state.apply(evaluation)
+                next_moves, count = next_state.best_moves(
+                    free_agents, used_names | {free_agents[fa_idx]['name']}, max(candidate_limit // 3, 1), 1
+                )
+                evaluated += count
+                total = evaluation['gain'] + (next_moves[0][0]['gain'] if next_moves else 0.0)
+                if best_total is None or total > best_total + MIN_GAIN:
+                    best, best_total = option, total
+        
+        evaluation, fa_idx, day = best
+        fa = free_agents[fa_idx]
+        dropped = state.members[evaluation['drop_idx']]
+        used_names.add(fa['name'])
+        moves.append({
+            'scoring_period': day,
+            'drop': dropped['name'],
+            'drop_is_streamer': dropped['free_agent'],
+            'add': fa['name'],
+            'add_position': fa['position'],
+            'add_nba_team': fa['nba_team'],
+            'add_games': len([d for d in fa['days'] if d >= day]),
+            'starts_gain': evaluation['starts_gain'],
+            'value_gain': round(evaluation['gain'], 2)
+        })
+        state = state.apply(evaluation)
+    
+    moves.sort(key=lambda x: x['scoring_period'])
+    base_totals = _category_totals(base_state)
+    final_totals = _category_totals(state)
+    
+    return {
+        'team_id': team_id,
+        'week': week,
+        'days': days,
+        'moves': moves,
+        'base': {
+            'starts': base_state.total_starts(),
+            'value': round(base_state.total_value(), 2),
+            'category_totals': base_totals
+        },
+        'final': {
+            'starts': state.total_starts(),
+            'value': round(state.total_value(), 2),
+            'category_totals': final_totals
+        },
+        'category_deltas': {
+            cat: round(final_totals[cat] - base_totals[cat], 4)
+            for cat in CATEGORIES if cat not in punt_categories
+        },
+        'daily': [
+            {
+                'scoring_period': day,
+                'starts_before': len(base_state.day_starters[day]),
+                'starts_after': len(state.day_starters[day]),
+                'lineup': [state.members[idx]['name'] for idx in state.day_starters[day]]
+            }
+            for day in days
+        ],
+        'stats': {
+            'free_agents': len(free_agents),
+            'evaluated': evaluated,
+            'elapsed': round(time.time() - started, 3)
+        }
+    }, None
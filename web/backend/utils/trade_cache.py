@@ -0,0 +1,49 @@
+"""
+Кэш результатов анализа трейдов.
+Запрос приводится к каноническому ключу, поэтому один и тот же трейд
+(независимо от порядка игроков и пант-категорий) считается один раз до обновления данных лиги.
+"""
+from utils.cache import SnapshotCache
+from typing import Dict, List, Optional, Tuple
+
+
+# Ответы /trade-analysis (сбрасываются при обновлении данных лиги)
+trade_result_cache = SnapshotCache(maxsize=256)
+
+
+def canonical_custom_rosters(
+    custom_team_players: Optional[Dict[int, List[str]]],
+    simulation_mode: str
+) -> Optional[Tuple]:
+    """
+    Канонический вид custom_team_players: учитывается только в режиме top_n,
+    пустой словарь равнозначен его отсутствию, порядок команд и игроков не важен.
+    """
+    if simulation_mode != "top_n" or not custom_team_players:
+        return None
+    return tuple(sorted(
+        (team_id, tuple(sorted(set(names)))) for team_id, names in custom_team_players.items()
+    ))
+
+
+def trade_analysis_key(league_meta, request) -> Tuple:
+    """
+    Канонический ключ запроса анализа трейда (TradeAnalysisRequest).
+    Параметры, которые не влияют на ответ (scope_mode, top_n_players вне режима top_n),
+    в ключ не входят.
+    """
+    is_top_n = request.simulation_mode == "top_n"
+    return (
+        'trade_analysis',
+        league_meta.get_snapshot_version(),
+        request.my_team_id,
+        request.their_team_id,
+        tuple(sorted(set(request.i_give))),
+        tuple(sorted(set(request.i_receive))),
+        request.period,
+        tuple(sorted(set(request.punt_categories))),
+        request.simulation_mode,
+        request.top_n_players if is_top_n else None,
+        canonical_custom_rosters(request.custom_team_players, request.simulation_mode),
+        (request.playoff_seasons, request.playoff_seed) if request.playoff_odds else None
+    )
@@ -0,0 +1,243 @@
+"""
+Контекст инкрементальной оценки трейдов.
+Базовое состояние лиги (составы, статистика команд, симуляция "все против всех")
+строится один раз, трейд применяется как изменение только затронутых команд.
+"""
+from core.config import CATEGORIES
+from utils.calculations import calculate_raw_stats, calculate_team_category_z, select_top_n_players
+from utils.rank_matrix import build_rank_matrix, team_category_ranks
+from utils.simulation import run_round_robin, update_round_robin
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+SIMULATION_MODES = ('z_scores', 'team_stats_avg')
+
+
+def _group_by_team(players: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
+    """Группирует игроков по team_id с сохранением порядка."""
+    players_by_team = {}
+    for player in players:
+        players_by_team.setdefault(player['team_id'], []).append(player)
+    return players_by_team
+
+
+def ranks_from_result(result: Dict[str, Any]) -> Dict[int, int]:
+    """
+    Места команд по результату run_round_robin
+    (стабильная сортировка по неокругленному винрейту).
+    
+    Returns:
+        dict: {team_id: rank}
+    """
+    rates = []
+    for idx, team_id in enumerate(result['team_ids']):
+        wins = result['wins'][idx]
+        losses = result['losses'][idx]
+        ties = result['ties'][idx]
+        total_games = wins + losses + ties
+        rates.append((team_id, (wins + 0.5 * ties) / total_games if total_games > 0 else 0))
+    rates.sort(key=lambda x: x[1], reverse=True)
+    return {team_id: rank for rank, (team_id, _) in enumerate(rates, 1)}
+
+
+class TradeEvaluationContext:
+    """
+    Базовое состояние лиги для оценки трейдов.
+    Места в симуляции и по категориям (без пант-категорий) рассчитываются для всей лиги один раз,
+    после трейда пересчитываются только строки затронутых команд и их пары в матрице исходов симуляции.
+    """
+    
+    def __init__(
+        self,
+        league_meta,
+        players: List[Dict[str, Any]],
+        simulation_mode: str,
+        top_n_players: int = 13,
+        custom_team_players: Optional[Dict[int, List[str]]] = None
+    ):
+        """
+        Args:
+            league_meta: Экземпляр LeagueMetadata
+            players: Игроки лиги с z_scores и stats (результат calculate_z_scores + avg статистика)
+            simulation_mode: 'all', 'exclude_ir' или 'top_n'
+            top_n_players: Количество игроков для режима 'top_n'
+            custom_team_players: Словарь {team_id: [имена игроков]} для состояния ДО трейда
+        """
+        # Храним только ID и названия команд, чтобы контекст можно было передавать в другие процессы
+        self.teams = [(team.team_id, team.team_name) for team in league_meta.get_teams()]
+        self.team_names = dict(self.teams)
+        self.players = players
+        self.simulation_mode = simulation_mode
+        self.top_n_players = top_n_players
+        self.stats_by_name = {p['name']: p.get('stats', {}) for p in players}
+        self.z_scores_by_name = {p['name']: p['z_scores'] for p in players if 'z_scores' in p}
+        self.before = self._build_state(_group_by_team(players), custom_team_players)
+    
+    def _select(self, team_players, team_id, custom_team_players):
+        """Выбор состава в режиме top_n (custom_team_players или авто топ-N)."""
+        if self.simulation_mode != "top_n":
+            return team_players
+        if custom_team_players and team_id in custom_team_players:
+            selected_names = custom_team_players[team_id]
+            return [p for p in team_players if p['name'] in selected_names]
+        return select_top_n_players(
+            team_players,
+            self.top_n_players,
+            punt_categories=[],
+            z_scores_data=self.z_scores_by_name
+        )
+    
+    def _team_rows(self, team_id, team_players, custom_team_players) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """Строки команды в матрицах команды × категории для обоих режимов симуляции."""
+        z_row = calculate_team_category_z(self._select(team_players, team_id, custom_team_players))
+        
+        avg_players = [{'name': p['name'], 'stats': self.stats_by_name.get(p['name'], {})} for p in team_players]
+        raw_stats = calculate_raw_stats(self._select(avg_players, team_id, custom_team_players), [])
+        avg_row = {cat: raw_stats.get(cat, 0.0) for cat in CATEGORIES}
+        return z_row, avg_row
+    
+    def _team_stats(self, state_rows, mode, players_by_team) -> Dict[int, Dict[str, Any]]:
+        """
+        Статистика команд для симуляции в порядке команд лиги.
+        В режиме z_scores учитываются только команды с игроками, в team_stats_avg - все команды.
+        """
+        team_stats = {}
+        for team_id, team_name in self.teams:
+            if mode == 'z_scores' and team_id not in players_by_team:
+                continue
+            team_stats[team_id] = {'name': team_name, 'stats': state_rows[mode][team_id]}
+        return team_stats
+    
+    def _build_state(self, players_by_team, custom_team_players) -> Dict[str, Any]:
+        """Полный расчет состояния лиги."""
+        rows = {mode: {} for mode in SIMULATION_MODES}
+        for team_id, _ in self.teams:
+            if team_id in players_by_team:
+                z_row, avg_row = self._team_rows(team_id, players_by_team[team_id], custom_team_players)
+                rows['z_scores'][team_id] = z_row
+                rows['team_stats_avg'][team_id] = avg_row
+            else:
+                rows['team_stats_avg'][team_id] = {cat: 0.0 for cat in CATEGORIES}
+        
+        results = {mode: run_round_robin(self._team_stats(rows, mode, players_by_team)) for mode in SIMULATION_MODES}
+        return {
+            'players_by_team': players_by_team,
+            'custom_team_players': custom_team_players,
+            'rows': rows,
+            'results': results,
+            'ranks': {mode: ranks_from_result(results[mode]) for mode in SIMULATION_MODES}
+        }
+    
+    def _changed_custom_teams(self, custom_team_players) -> Set[int]:
+        """Команды, для которых выбор состава меняется из-за другого custom_team_players."""
+        if self.simulation_mode != "top_n":
+            return set()
+        before = self.before['custom_team_players'] or {}
+        after = custom_team_players or {}
+        return {
+            team_id for team_id in set(before) | set(after)
+            if before.get(team_id) != after.get(team_id)
+        }
+    
+    def apply_trade(
+        self,
+        transfers: Dict[str, Tuple[int, int]],
+        custom_team_players: Optional[Dict[int, List[str]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Применяет трейд к базовому состоянию.
+        
+        Args:
+            transfers: Словарь {имя игрока: (team_id откуда, team_id куда)}
+            custom_team_players: custom_team_players для состояния ПОСЛЕ трейда
+        
+        Returns:
+            Состояние в формате базового (players_by_team, rows, results, ranks)
+        """
+        affected = set()
+        for from_team, to_team in transfers.values():
+            affected.add(from_team)
+            affected.add(to_team)
+        
+        # Пересобираем составы затронутых команд в исходном порядке игроков
+        players_by_team = dict(self.before['players_by_team'])
+        for team_id in affected:
+            players_by_team.pop(team_id, None)
+        for player in self.players:
+            team_id = player['team_id']
+            move = transfers.get(player['name'])
+            if move and move[0] == team_id:
+                player = dict(player, team_id=move[1], team_name=self.team_names.get(move[1], player.get('team_name')))
+                team_id = move[1]
+            if team_id in affected:
+                players_by_team.setdefault(team_id, []).append(player)
+        
+        return self._apply_rosters(players_by_team, affected | self._changed_custom_teams(custom_team_players), custom_team_players)
+    
+    def add_external_players(self, players: List[Dict[str, Any]]) -> None:
+        """
+        Регистрирует игроков вне составов (например, свободных агентов) с z_scores и stats,
+        чтобы их можно было добавлять в составы через apply_roster.
+        """
+        for player in players:
+            self.stats_by_name[player['name']] = player.get('stats', {})
+            if 'z_scores' in player:
+                self.z_scores_by_name[player['name']] = player['z_scores']
+    
+    def apply_roster(self, team_id: int, team_players: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Заменяет состав одной команды (в режиме top_n состав после замены выбирается автоматически).
+        
+        Returns:
+            Состояние в формате базового (players_by_team, rows, results, ranks)
+        """
+        players_by_team = dict(self.before['players_by_team'])
+        players_by_team[team_id] = team_players
+        return self._apply_rosters(players_by_team, {team_id} | self._changed_custom_teams(None), None)
+    
+    def _apply_rosters(self, players_by_team, changed: Set[int], custom_team_players) -> Dict[str, Any]:
+        """Пересчитывает строки изменившихся команд и их пары в симуляции."""
+        rows = {mode: dict(self.before['rows'][mode]) for mode in SIMULATION_MODES}
+        for team_id in changed:
+            if team_id not in self.team_names:
+                continue
+            if players_by_team.get(team_id):
+                z_row, avg_row = self._team_rows(team_id, players_by_team[team_id], custom_team_players)
+                rows['z_scores'][team_id] = z_row
+                rows['team_stats_avg'][team_id] = avg_row
+            else:
+                players_by_team.pop(team_id, None)
+                rows['z_scores'].pop(team_id, None)
+                rows['team_stats_avg'][team_id] = {cat: 0.0 for cat in CATEGORIES}
+        
+        results = {
+            mode: update_round_robin(
+                self.before['results'][mode],
+                self._team_stats(rows, mode, players_by_team),
+                changed
+            )
+            for mode in SIMULATION_MODES
+        }
+        return {
+            'players_by_team': players_by_team,
+            'custom_team_players': custom_team_players,
+            'rows': rows,
+            'results': results,
+            'ranks': {mode: ranks_from_result(results[mode]) for mode in SIMULATION_MODES}
+        }
+    
+    def selected_players(self, state: Dict[str, Any], team_id: int) -> List[Dict[str, Any]]:
+        """Игроки команды, которые учитываются в расчетах состояния (с учетом режима top_n)."""
+        return self._select(state['players_by_team'].get(team_id, []), team_id, state['custom_team_players'])
+    
+    def category_ranks(self, state: Dict[str, Any], team_id: int) -> Dict[str, int]:
+        """
+        Места команды по категориям без пант-категорий (равные значения делят место).
+        
+        Returns:
+            dict: {category: rank}, пустой словарь, если команда не найдена
+        """
+        # Матрица мест строится один раз на состояние, места команды - строка матрицы
+        if 'rank_matrix' not in state:
+            state['rank_matrix'] = build_rank_matrix(state['rows']['team_stats_avg'])
+        return team_category_ranks(state['rank_matrix'], team_id)
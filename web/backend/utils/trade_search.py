@@ -0,0 +1,668 @@
+"""
+Поиск выгодных трейдов 1-на-1, 2-на-1 и 2-на-2 по всей лиге.
+Кандидаты перебираются по векторам Z-scores игроков с отсечением по оценкам,
+точная оценка выполняется инкрементально через TradeEvaluationContext.
+"""
+from bisect import bisect_left, bisect_right
+from itertools import combinations
+from core.config import CATEGORIES
+from core.z_score import calculate_z_scores
+from utils.cache import SnapshotCache
+from utils.parallel import resolve_workers, run_chunks
+from utils.simulation import categories_mask, recount_round_robin
+from utils.trade_context import TradeEvaluationContext, ranks_from_result
+from typing import Any, Dict, List, Optional, Tuple
+import math
+import time
+
+
+# Формы пакетов: "отдаю x получаю"
+PACKAGE_SHAPES = {
+    '1x1': (1, 1),
+    '2x1': (2, 1),
+    '1x2': (1, 2),
+    '2x2': (2, 2)
+}
+
+TRADE_SEARCH_METRICS = ('z_total', 'all_play_rank', 'category_ranks')
+
+# Матрицы обменов 1-на-1 (сбрасываются при обновлении данных лиги)
+_swap_matrix_cache = SnapshotCache(maxsize=16)
+
+# Меньше кандидатов нет смысла отправлять в пул процессов - запуск дороже расчета
+_MIN_CANDIDATES_FOR_POOL = 64
+
+
+def build_trade_context(
+    league_meta,
+    period: str,
+    simulation_mode: str,
+    top_n_players: int,
+    custom_team_players: Optional[Dict[int, List[str]]] = None
+) -> Tuple[Optional[TradeEvaluationContext], Optional[str]]:
+    """
+    Загружает Z-scores и avg статистику игроков и строит контекст оценки трейдов.
+    
+    Returns:
+        tuple: (TradeEvaluationContext или None, текст ошибки или None)
+    """
+    exclude_ir = (simulation_mode == "exclude_ir")
+    data = calculate_z_scores(league_meta, period, exclude_ir=exclude_ir)
+    if not data['players']:
+        return None, "No data found"
+    
+    all_players_with_stats = league_meta.get_all_players_stats(period, 'avg', exclude_ir=exclude_ir)
+    stats_by_name = {p['name']: p['stats'] for p in all_players_with_stats}
+    for player in data['players']:
+        player['stats'] = stats_by_name.get(player['name'], {})
+    
+    return TradeEvaluationContext(
+        league_meta, data['players'], simulation_mode, top_n_players, custom_team_players
+    ), None
+
+
+def player_z_total(player: Dict[str, Any], punt_categories: List[str]) -> float:
+    """Total Z-score игрока без пант-категорий (только конечные значения)."""
+    total = 0.0
+    for cat in CATEGORIES:
+        if cat not in punt_categories:
+            z_val = player['z_scores'].get(cat, 0)
+            if math.isfinite(z_val):
+                total += z_val
+    return total
+
+
+def row_z_total(row: Optional[Dict[str, float]], punt_categories: List[str]) -> float:
+    """Total Z-score команды по строке категорий без пант-категорий."""
+    if not row:
+        return 0.0
+    return sum(value for cat, value in row.items() if cat not in punt_categories)
+
+
+def _team_packages(players: List[Dict[str, Any]], size: int, punt_categories: List[str]) -> List[Tuple[float, float, Tuple[str, ...]]]:
+    """
+    Все пакеты игроков команды заданного размера, отсортированные по убыванию ценности для меня.
+    
+    Returns:
+        list: [(ценность с учетом пантов, ценность без пантов, (имена игроков))]
+    """
+    packages = []
+    for combo in combinations(players, size):
+        packages.append((
+            sum(player_z_total(p, punt_categories) for p in combo),
+            sum(player_z_total(p, []) for p in combo),
+            tuple(p['name'] for p in combo)
+        ))
+    packages.sort(key=lambda x: x[0], reverse=True)
+    return packages
+
+
+def enumerate_trade_candidates(
+    my_players: List[Dict[str, Any]],
+    their_players: List[Dict[str, Any]],
+    shapes: List[Tuple[int, int]],
+    punt_categories: List[str],
+    max_partner_loss: float,
+    metric: str = 'z_total'
+) -> Tuple[List[Tuple[float, Tuple[str, ...], Tuple[str, ...]]], int]:
+    """
+    Перебирает пакеты трейда с одной командой по векторам Z-scores игроков.
+    Оценка выигрыша - разница total Z получаемых и отдаваемых игроков (для полного состава
+    она точная, в режиме top_n - приближенная). Для metric='z_total' это верхняя граница:
+    пакеты получаемых игроков отсортированы по убыванию ценности, поэтому перебор прекращается,
+    как только выигрыш становится <= 0. Для метрик по местам total Z выигрыш не ограничивает
+    (трейд может терять total Z, но усиливать слабую категорию), поэтому отсечения нет -
+    оценка только задает порядок, а объем точной оценки ограничивают max_evaluations и time_budget.
+    
+    Returns:
+        tuple: ([(оценка выигрыша, отдаю, получаю)], количество рассмотренных пакетов)
+    """
+    candidates = []
+    considered = 0
+    for give_size, receive_size in shapes:
+        give_packages = _team_packages(my_players, give_size, punt_categories)
+        receive_packages = _team_packages(their_players, receive_size, punt_categories)
+        for give_mine, give_full, give_names in give_packages:
+            for receive_mine, receive_full, receive_names in receive_packages:
+                considered += 1
+                gain = receive_mine - give_mine
+                if gain <= 0 and metric == 'z_total':
+                    # Дальше пакеты только дешевле
+                    break
+                # Партнер оценивает игроков без пантов
+                if give_full - receive_full < -max_partner_loss:
+                    continue
+                candidates.append((gain, give_names, receive_names))
+    return candidates, considered
+
+
+def score_trade(
+    context: TradeEvaluationContext,
+    my_team_id: int,
+    partner_id: int,
+    give: Tuple[str, ...],
+    receive: Tuple[str, ...],
+    punt_categories: List[str],
+    rank_mode: str
+) -> Dict[str, Any]:
+    """
+    Точно оценивает трейд через инкрементальный контекст.
+    """
+    transfers = {name: (my_team_id, partner_id) for name in give}
+    transfers.update({name: (partner_id, my_team_id) for name in receive})
+    state = context.apply_trade(transfers, custom_team_players=None)
+    before = context.before
+    
+    my_z_before = row_z_total(before['rows']['z_scores'].get(my_team_id), punt_categories)
+    my_z_after = row_z_total(state['rows']['z_scores'].get(my_team_id), punt_categories)
+    partner_z_before = row_z_total(before['rows']['z_scores'].get(partner_id), [])
+    partner_z_after = row_z_total(state['rows']['z_scores'].get(partner_id), [])
+    
+    cat_before = context.category_ranks(before, my_team_id)
+    cat_after = context.category_ranks(state, my_team_id)
+    category_rank_gain = sum(
+        cat_before[cat] - cat_after[cat] for cat in cat_before if cat not in punt_categories
+    )
+    
+    return {
+        'partner_team_id': partner_id,
+        'partner_team_name': context.team_names.get(partner_id, ''),
+        'give': list(give),
+        'receive': list(receive),
+        'my_z_delta': round(my_z_after - my_z_before, 2),
+        'partner_z_delta': round(partner_z_after - partner_z_before, 2),
+        'my_rank_before': before['ranks'][rank_mode].get(my_team_id),
+        'my_rank_after': state['ranks'][rank_mode].get(my_team_id),
+        'partner_rank_before': before['ranks'][rank_mode].get(partner_id),
+        'partner_rank_after': state['ranks'][rank_mode].get(partner_id),
+        'category_rank_gain': category_rank_gain
+    }
+
+
+def metric_value(result: Dict[str, Any], metric: str) -> float:
+    """Значение целевой метрики трейда (больше - лучше для меня)."""
+    if metric == 'all_play_rank':
+        if result['my_rank_before'] is None or result['my_rank_after'] is None:
+            return 0
+        return result['my_rank_before'] - result['my_rank_after']
+    if metric == 'category_ranks':
+        return result['category_rank_gain']
+    return result['my_z_delta']
+
+
+def _evaluate_candidates(
+    context: TradeEvaluationContext,
+    candidates: List[Tuple[int, Tuple[str, ...], Tuple[str, ...]]],
+    my_team_id: int,
+    punt_categories: List[str],
+    rank_mode: str,
+    metric: str,
+    max_partner_loss: float,
+    deadline: float
+) -> Dict[str, Any]:
+    """
+    Точная оценка списка кандидатов до истечения deadline.
+    Выполняется как в текущем процессе, так и в пуле процессов (аргументы сериализуемы).
+    
+    Returns:
+        dict: {'results': [...], 'evaluated': int, 'timed_out': bool}
+    """
+    results = []
+    evaluated = 0
+    for partner_id, give, receive in candidates:
+        if time.time() >= deadline:
+            return {'results': results, 'evaluated': evaluated, 'timed_out': True}
+        result = score_trade(context, my_team_id, partner_id, give, receive, punt_categories, rank_mode)
+        evaluated += 1
+        if result['partner_z_delta'] < -max_partner_loss:
+            continue
+        result['score'] = metric_value(result, metric)
+        if result['score'] > 0:
+            results.append(result)
+    return {'results': results, 'evaluated': evaluated, 'timed_out': False}
+
+
+def search_trades(
+    league_meta,
+    my_team_id: int,
+    period: str = "2026_total",
+    punt_categories: Optional[List[str]] = None,
+    simulation_mode: str = "all",
+    top_n_players: int = 13,
+    metric: str = "z_total",
+    rank_mode: str = "team_stats_avg",
+    package_sizes: Optional[List[str]] = None,
+    partner_team_ids: Optional[List[int]] = None,
+    max_partner_loss: float = 1.0,
+    top_k: int = 10,
+    max_evaluations: int = 400,
+    time_budget: float = 10.0,
+    workers: int = 0
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Ищет по всей лиге трейды, которые улучшают мою команду по целевой метрике
+    и ухудшают total Z партнера не более чем на max_partner_loss.
+    
+    Этапы:
+        1. Перебор пакетов против каждой команды по векторам Z-scores игроков
+           (с отсечением по total Z только для metric='z_total')
+        2. Отбор max_evaluations лучших кандидатов по оценке
+        3. Точная инкрементальная оценка кандидатов (в пуле процессов) в пределах time_budget
+    
+    Returns:
+        tuple: ({'trades': [...], 'stats': {...}}, текст ошибки или None)
+    """
+    started = time.time()
+    deadline = started + max(time_budget, 0.0)
+    punt_categories = punt_categories or []
+    package_sizes = package_sizes or ['1x1', '2x1', '2x2']
+    
+    if metric not in TRADE_SEARCH_METRICS:
+        return None, f"Unknown metric: {metric}"
+    if rank_mode not in ('team_stats_avg', 'z_scores'):
+        return None, f"Unknown rank mode: {rank_mode}"
+    unknown_sizes = [size for size in package_sizes if size not in PACKAGE_SHAPES]
+    if unknown_sizes:
+        return None, f"Unknown package sizes: {', '.join(unknown_sizes)}"
+    if league_meta.get_team_by_id(my_team_id) is None:
+        return None, "Team not found"
+    
+    context, error = build_trade_context(league_meta, period, simulation_mode, top_n_players)
+    if error:
+        return None, error
+    
+    players_by_team = context.before['players_by_team']
+    my_players = players_by_team.get(my_team_id, [])
+    shapes = [PACKAGE_SHAPES[size] for size in package_sizes]
+    
+    partners = [
+        team_id for team_id, _ in context.teams
+        if team_id != my_team_id and (partner_team_ids is None or team_id in partner_team_ids)
+    ]
+    
+    # 1. Перебор кандидатов
+    candidates = []
+    considered = 0
+    for partner_id in partners:
+        partner_candidates, partner_considered = enumerate_trade_candidates(
+            my_players, players_by_team.get(partner_id, []), shapes, punt_categories, max_partner_loss, metric
+        )
+        considered += partner_considered
+        candidates.extend((gain, partner_id, give, receive) for gain, give, receive in partner_candidates)
+    
+    # 2. Лучшие кандидаты по оценке
+    candidates.sort(key=lambda x: x[0], reverse=True)
+    shortlisted = [(partner_id, give, receive) for _, partner_id, give, receive in candidates[:max(max_evaluations, 0)]]
+    
+    # 3. Точная оценка
+    args = (my_team_id, punt_categories, rank_mode, metric, max_partner_loss, deadline)
+    workers = resolve_workers(workers, len(shortlisted), _MIN_CANDIDATES_FOR_POOL)
+    outcomes, timed_out, used_workers = run_chunks(_evaluate_candidates, context, shortlisted, args, workers, deadline)
+    
+    results = []
+    evaluated = 0
+    for outcome in outcomes:
+        results.extend(outcome['results'])
+        evaluated += outcome['evaluated']
+        timed_out = timed_out or outcome['timed_out']
+    
+    results.sort(key=lambda x: (x['score'], x['my_z_delta']), reverse=True)
+    
+    return {
+        'trades': results[:max(top_k, 0)],
+        'stats': {
+            'partners': len(partners),
+            'packages_considered': considered,
+            'candidates_after_pruning': len(candidates),
+            'evaluated': evaluated,
+            'timed_out': timed_out,
+            'workers': used_workers,
+            'elapsed': round(time.time() - started, 3)
+        }
+    }, None
+
+
+def score_three_team_trade(
+    context: TradeEvaluationContext,
+    my_team_id: int,
+    cycle: Tuple[int, str, int, str, str],
+    punt_categories: List[str],
+    rank_mode: str
+) -> Dict[str, Any]:
+    """
+    Точно оценивает трехсторонний трейд-цикл: я отдаю give команде B,
+    B отдает via команде C, C отдает receive мне.
+    
+    Args:
+        cycle: (team_b, give, team_c, via, receive)
+    """
+    team_b, give, team_c, via, receive = cycle
+    state = context.apply_trade({
+        give: (my_team_id, team_b),
+        via: (team_b, team_c),
+        receive: (team_c, my_team_id)
+    }, custom_team_players=None)
+    before = context.before
+    z_before = before['rows']['z_scores']
+    z_after = state['rows']['z_scores']
+    ranks_before = before['ranks'][rank_mode]
+    ranks_after = state['ranks'][rank_mode]
+    
+    cat_before = context.category_ranks(before, my_team_id)
+    cat_after = context.category_ranks(state, my_team_id)
+    
+    partners = []
+    for team_id in (team_b, team_c):
+        partners.append({
+            'team_id': team_id,
+            'team_name': context.team_names.get(team_id, ''),
+            'z_delta': round(row_z_total(z_after.get(team_id), []) - row_z_total(z_before.get(team_id), []), 2),
+            'rank_before': ranks_before.get(team_id),
+            'rank_after': ranks_after.get(team_id)
+        })
+    
+    return {
+        'legs': [
+            {'from_team_id': my_team_id, 'to_team_id': team_b, 'player': give},
+            {'from_team_id': team_b, 'to_team_id': team_c, 'player': via},
+            {'from_team_id': team_c, 'to_team_id': my_team_id, 'player': receive}
+        ],
+        'give': [give],
+        'receive': [receive],
+        'partners': partners,
+        'my_z_delta': round(
+            row_z_total(z_after.get(my_team_id), punt_categories) - row_z_total(z_before.get(my_team_id), punt_categories), 2
+        ),
+        'my_rank_before': ranks_before.get(my_team_id),
+        'my_rank_after': ranks_after.get(my_team_id),
+        'category_rank_gain': sum(
+            cat_before[cat] - cat_after[cat] for cat in cat_before if cat not in punt_categories
+        )
+    }
+
+
+def _expand_three_team_beams(
+    context: TradeEvaluationContext,
+    beams: List[Tuple[float, int, str, float, str, float]],
+    my_team_id: int,
+    partner_values: Dict[int, Tuple[List[float], List[str]]],
+    punt_categories: List[str],
+    rank_mode: str,
+    metric: str,
+    max_partner_loss: float,
+    max_evaluations: int,
+    deadline: float
+) -> Dict[str, Any]:
+    """
+    Второй уровень лучевого поиска и точная оценка финалистов.
+    Для каждого луча (я отдаю give, получаю receive от команды C) подбирается
+    промежуточный игрок via команды B, которого B отдает C. По векторам Z-scores
+    обе команды-партнера должны терять не больше max_partner_loss, поэтому
+    total Z игрока via лежит в окне [Z(receive) - loss, Z(give) + loss] и ищется бинарным поиском.
+    
+    Args:
+        beams: [(оценка выигрыша, team_c, receive, total Z receive, give, total Z give)]
+        partner_values: {team_id: (отсортированные total Z игроков, имена в том же порядке)}
+    
+    Returns:
+        dict: {'results': [...], 'expanded': int, 'evaluated': int, 'timed_out': bool}
+    """
+    finalists = []
+    for gain, team_c, receive, receive_full, give, give_full in beams:
+        low = receive_full - max_partner_loss
+        high = give_full + max_partner_loss
+        for team_b, (values, names) in partner_values.items():
+            if team_b == team_c:
+                continue
+            for idx in range(bisect_left(values, low), bisect_right(values, high)):
+                # Запас партнера, который теряет больше
+                slack = min(give_full - values[idx], values[idx] - receive_full)
+                finalists.append((gain, slack, (team_b, give, team_c, names[idx], receive)))
+    
+    finalists.sort(key=lambda x: (x[0], x[1]), reverse=True)
+    
+    results = []
+    evaluated = 0
+    for _, _, cycle in finalists[:max(max_evaluations, 0)]:
+        if time.time() >= deadline:
+            return {'results': results, 'expanded': len(finalists), 'evaluated': evaluated, 'timed_out': True}
+        result = score_three_team_trade(context, my_team_id, cycle, punt_categories, rank_mode)
+        evaluated += 1
+        if any(partner['z_delta'] < -max_partner_loss for partner in result['partners']):
+            continue
+        result['score'] = metric_value(result, metric)
+        if result['score'] > 0:
+            results.append(result)
+    return {'results': results, 'expanded': len(finalists), 'evaluated': evaluated, 'timed_out': False}
+
+
+def search_three_team_trades(
+    league_meta,
+    my_team_id: int,
+    period: str = "2026_total",
+    punt_categories: Optional[List[str]] = None,
+    simulation_mode: str = "all",
+    top_n_players: int = 13,
+    metric: str = "z_total",
+    rank_mode: str = "team_stats_avg",
+    partner_team_ids: Optional[List[int]] = None,
+    max_partner_loss: float = 1.0,
+    beam_width: int = 200,
+    top_k: int = 10,
+    max_evaluations: int = 300,
+    time_budget: float = 10.0,
+    workers: int = 0
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Лучевой поиск трехсторонних трейдов-циклов по одному игроку:
+    я -> команда B -> команда C -> я.
+    
+    Этапы:
+        1. Пары (отдаю, получаю от C), упорядоченные по выигрышу total Z; для metric='z_total'
+           остаются только пары с положительным выигрышем, для метрик по местам - все пары.
+           Пары, для которых не существует допустимого промежуточного игрока, отсекаются.
+           В луч попадают beam_width лучших пар
+        2. Лучи делятся между процессами: каждый достраивает циклы через команды B
+           и точно оценивает лучших финалистов (всего не больше max_evaluations) в пределах time_budget
+    
+    Returns:
+        tuple: ({'trades': [...], 'stats': {...}}, текст ошибки или None)
+    """
+    started = time.time()
+    deadline = started + max(time_budget, 0.0)
+    punt_categories = punt_categories or []
+    
+    if metric not in TRADE_SEARCH_METRICS:
+        return None, f"Unknown metric: {metric}"
+    if rank_mode not in ('team_stats_avg', 'z_scores'):
+        return None, f"Unknown rank mode: {rank_mode}"
+    if league_meta.get_team_by_id(my_team_id) is None:
+        return None, "Team not found"
+    
+    context, error = build_trade_context(league_meta, period, simulation_mode, top_n_players)
+    if error:
+        return None, error
+    
+    players_by_team = context.before['players_by_team']
+    partners = [
+        team_id for team_id, _ in context.teams
+        if team_id != my_team_id and (partner_team_ids is None or team_id in partner_team_ids)
+    ]
+    if len(partners) < 2:
+        return None, "At least two partner teams are required"
+    
+    # Мои игроки по возрастанию ценности для меня - для z_total перебор прерывается, когда выигрыш <= 0
+    my_players = sorted(
+        ((player_z_total(p, punt_categories), player_z_total(p, []), p['name']) for p in players_by_team.get(my_team_id, [])),
+        key=lambda x: x[0]
+    )
+    partner_values = {}
+    for team_id in partners:
+        ordered = sorted(
+            (player_z_total(p, []), p['name']) for p in players_by_team.get(team_id, [])
+        )
+        partner_values[team_id] = ([value for value, _ in ordered], [name for _, name in ordered])
+    
+    # 1. Первый уровень луча
+    pairs = []
+    considered = 0
+    for team_c in partners:
+        for p in players_by_team.get(team_c, []):
+            receive_mine = player_z_total(p, punt_categories)
+            receive_full = player_z_total(p, [])
+            for give_mine, give_full, give in my_players:
+                considered += 1
+                gain = receive_mine - give_mine
+                if gain <= 0 and metric == 'z_total':
+                    # Total Z не ограничивает выигрыш по местам - для них отсечения нет
+                    break
+                # Промежуточный игрок должен устроить обоих партнеров
+                if receive_full - give_full > 2 * max_partner_loss:
+                    continue
+                pairs.append((gain, team_c, p['name'], receive_full, give, give_full))
+    
+    pairs.sort(key=lambda x: x[0], reverse=True)
+    beams = pairs[:max(beam_width, 0)]
+    
+    # 2. Достраивание циклов и точная оценка финалистов
+    workers = resolve_workers(workers, len(beams), _MIN_CANDIDATES_FOR_POOL)
+    args = (
+        my_team_id, partner_values, punt_categories, rank_mode, metric, max_partner_loss,
+        -(-max(max_evaluations, 0) // workers), deadline
+    )
+    outcomes, timed_out, used_workers = run_chunks(_expand_three_team_beams, context, beams, args, workers, deadline)
+    
+    results = []
+    expanded = 0
+    evaluated = 0
+    for outcome in outcomes:
+        results.extend(outcome['results'])
+        expanded += outcome['expanded']
+        evaluated += outcome['evaluated']
+        timed_out = timed_out or outcome['timed_out']
+    
+    results.sort(key=lambda x: (x['score'], x['my_z_delta']), reverse=True)
+    
+    return {
+        'trades': results[:max(top_k, 0)],
+        'stats': {
+            'partners': len(partners),
+            'pairs_considered': considered,
+            'pairs_after_pruning': len(pairs),
+            'beams': len(beams),
+            'cycles_expanded': expanded,
+            'evaluated': evaluated,
+            'timed_out': timed_out,
+            'workers': used_workers,
+            'elapsed': round(time.time() - started, 3)
+        }
+    }, None
+
+
+def _swap_rank_view(state: Dict[str, Any], team_id: int, rank_mode: str, keep_mask: int):
+    """Места команды в симуляции без учета и с учетом пант-категорий."""
+    result = state['results'][rank_mode]
+    return (
+        state['ranks'][rank_mode].get(team_id),
+        ranks_from_result(recount_round_robin(result, keep_mask)).get(team_id)
+    )
+
+
+def build_swap_matrix(
+    league_meta,
+    my_team_id: int,
+    their_team_id: int,
+    period: str = "2026_total",
+    punt_categories: Optional[List[str]] = None,
+    simulation_mode: str = "all",
+    top_n_players: int = 13,
+    rank_mode: str = "team_stats_avg"
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Матрица обменов 1-на-1: мои игроки × игроки соперника.
+    Ячейка [i][j] - изменения моей команды, если я отдаю my_players[i] и получаю their_players[j]:
+    Z-scores по категориям, total Z и место в симуляции "все против всех" без учета и с учетом пантов.
+    Строки категорий пересчитываются только для двух команд, место с пантами считается
+    по маскам исходов без повторного сравнения команд. Результат кэшируется до обновления данных лиги.
+    
+    Returns:
+        tuple: ({
+            'my_team': {'team_id', 'name', 'players'},
+            'their_team': {'team_id', 'name', 'players'},
+            'base': {'z_total', 'z_total_punt', 'rank', 'rank_punt'},
+            'cells': [[{'category_deltas', 'z_delta', 'z_delta_punt',
+                        'rank_after', 'rank_delta', 'rank_after_punt', 'rank_delta_punt'}]]
+        }, текст ошибки или None)
+    """
+    punt_categories = punt_categories or []
+    if rank_mode not in ('team_stats_avg', 'z_scores'):
+        return None, f"Unknown rank mode: {rank_mode}"
+    if my_team_id == their_team_id:
+        return None, "Teams must be different"
+    
+    key = (
+        'swap', my_team_id, their_team_id, period, simulation_mode, top_n_players,
+        rank_mode, tuple(sorted(punt_categories))
+    )
+    errors = []
+    
+    def compute():
+        if league_meta.get_team_by_id(my_team_id) is None or league_meta.get_team_by_id(their_team_id) is None:
+            errors.append("Team not found")
+            return None
+        
+        context, error = build_trade_context(league_meta, period, simulation_mode, top_n_players)
+        if error:
+            errors.append(error)
+            return None
+        
+        keep_mask = categories_mask([cat for cat in CATEGORIES if cat not in punt_categories])
+        players_by_team = context.before['players_by_team']
+        my_players = [p['name'] for p in players_by_team.get(my_team_id, [])]
+        their_players = [p['name'] for p in players_by_team.get(their_team_id, [])]
+        
+        before_row = context.before['rows']['z_scores'].get(my_team_id) or {cat: 0.0 for cat in CATEGORIES}
+        base_z = row_z_total(before_row, [])
+        base_z_punt = row_z_total(before_row, punt_categories)
+        base_rank, base_rank_punt = _swap_rank_view(context.before, my_team_id, rank_mode, keep_mask)
+        
+        cells = []
+        for give in my_players:
+            row_cells = []
+            for receive in their_players:
+                state = context.apply_trade(
+                    {give: (my_team_id, their_team_id), receive: (their_team_id, my_team_id)},
+                    custom_team_players=None
+                )
+                after_row = state['rows']['z_scores'].get(my_team_id) or {cat: 0.0 for cat in CATEGORIES}
+                rank_after, rank_after_punt = _swap_rank_view(state, my_team_id, rank_mode, keep_mask)
+                row_cells.append({
+                    'category_deltas': {
+                        cat: round(after_row.get(cat, 0.0) - before_row.get(cat, 0.0), 2) for cat in CATEGORIES
+                    },
+                    'z_delta': round(row_z_total(after_row, []) - base_z, 2),
+                    'z_delta_punt': round(row_z_total(after_row, punt_categories) - base_z_punt, 2),
+                    'rank_after': rank_after,
+                    'rank_delta': rank_after - base_rank if rank_after is not None and base_rank is not None else None,
+                    'rank_after_punt': rank_after_punt,
+                    'rank_delta_punt': rank_after_punt - base_rank_punt if rank_after_punt is not None and base_rank_punt is not None else None
+                })
+            cells.append(row_cells)
+        
+        return {
+            'my_team': {'team_id': my_team_id, 'name': context.team_names.get(my_team_id, ''), 'players': my_players},
+            'their_team': {'team_id': their_team_id, 'name': context.team_names.get(their_team_id, ''), 'players': their_players},
+            'punt_categories': punt_categories,
+            'rank_mode': rank_mode,
+            'base': {
+                'z_total': round(base_z, 2),
+                'z_total_punt': round(base_z_punt, 2),
+                'rank': base_rank,
+                'rank_punt': base_rank_punt
+            },
+            'cells': cells
+        }, None
+    
+    # Ошибки не кэшируются: следующий запрос повторит расчет
+    value = _swap_matrix_cache.get_or_compute(league_meta, key, compute)
+    return value if value is not None else (None, errors[0])
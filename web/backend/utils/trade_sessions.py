@@ -0,0 +1,165 @@
+"""
+Сессии интерактивного конструктора трейдов.
+Сессия хранит текущий вариант трейда и базовое состояние лиги (TradeEvaluationContext),
+поэтому добавление/удаление игрока или смена пант-категорий пересчитывает только
+две команды трейда и их пары в симуляции, а не всю лигу.
+"""
+from collections import OrderedDict
+from utils.trade_search import build_trade_context
+from typing import Any, Dict, List, Optional, Tuple
+import threading
+import time
+import uuid
+
+
+# Количество одновременно хранимых сессий и время жизни сессии без обращений (секунды)
+DEFAULT_MAX_SESSIONS = 64
+DEFAULT_SESSION_TTL = 1800
+
+
+class TradeSessionStore:
+    """
+    Хранилище сессий трейдов с вытеснением по LRU и по времени жизни (TTL).
+    Контекст лиги сессии пересобирается, если данные лиги были обновлены.
+    """
+    
+    def __init__(self, maxsize: int = DEFAULT_MAX_SESSIONS, ttl: float = DEFAULT_SESSION_TTL):
+        """
+        Args:
+            maxsize: Максимальное количество сессий
+            ttl: Время жизни сессии без обращений в секундах
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+    
+    def _evict_expired(self, now: float) -> None:
+        """Удаляет просроченные сессии. Вызывается под блокировкой."""
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session['updated_at'] < self.ttl:
+                break
+            del self._sessions[session_id]
+            self.evicted += 1
+    
+    def create(self, league_meta, request) -> Tuple[Optional[str], Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Создает сессию для трейда (TradeAnalysisRequest) и строит базовое состояние лиги.
+        
+        Returns:
+            tuple: (session_id, сессия, текст ошибки или None)
+        """
+        context, error = build_trade_context(
+            league_meta, request.period, request.simulation_mode, request.top_n_players, request.custom_team_players
+        )
+        if error:
+            return None, None, error
+        
+        session_id = uuid.uuid4().hex
+        now = time.time()
+        session = {
+            'request': request,
+            'context': context,
+            'snapshot_version': league_meta.get_snapshot_version(),
+            'created_at': now,
+            'updated_at': now
+        }
+        with self._lock:
+            self._evict_expired(now)
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.maxsize:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+        return session_id, session, None
+    
+    def get(self, league_meta, session_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Получает сессию и продлевает ее время жизни.
+        Если данные лиги обновились, контекст сессии пересобирается для текущего варианта трейда.
+        
+        Returns:
+            tuple: (сессия, текст ошибки или None)
+        """
+        now = time.time()
+        with self._lock:
+            self._evict_expired(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None, "Trade session not found"
+            session['updated_at'] = now
+            self._sessions.move_to_end(session_id)
+        
+        version = league_meta.get_snapshot_version()
+        if session['snapshot_version'] != version:
+            request = session['request']
+            context, error = build_trade_context(
+                league_meta, request.period, request.simulation_mode, request.top_n_players, request.custom_team_players
+            )
+            if error:
+                return None, error
+            session['context'] = context
+            session['snapshot_version'] = version
+        return session, None
+    
+    def delete(self, session_id: str) -> bool:
+        """Удаляет сессию. Возвращает True, если сессия существовала."""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Получает статистику хранилища.
+        
+        Returns:
+            Словарь {'size': int, 'maxsize': int, 'ttl': float, 'evicted': int}
+        """
+        with self._lock:
+            self._evict_expired(time.time())
+            return {
+                'size': len(self._sessions),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'evicted': self.evicted
+            }
+
+
+def apply_session_update(session: Dict[str, Any], update) -> Optional[str]:
+    """
+    Применяет изменение (TradeSessionUpdate) к варианту трейда сессии.
+    Игроки проверяются по составам команд в базовом состоянии лиги.
+    
+    Returns:
+        Текст ошибки или None
+    """
+    request = session['request']
+    players_by_team = session['context'].before['players_by_team']
+    
+    def edit(current: List[str], add: List[str], remove: List[str], team_id: int) -> Tuple[Optional[List[str]], Optional[str]]:
+        roster_names = {p['name'] for p in players_by_team.get(team_id, [])}
+        unknown = [name for name in add if name not in roster_names]
+        if unknown:
+            return None, f"Players not found on team {team_id}: {', '.join(unknown)}"
+        names = [name for name in current if name not in remove]
+        for name in add:
+            if name not in names:
+                names.append(name)
+        return names, None
+    
+    i_give, error = edit(request.i_give, update.add_give, update.remove_give, request.my_team_id)
+    if error:
+        return error
+    i_receive, error = edit(request.i_receive, update.add_receive, update.remove_receive, request.their_team_id)
+    if error:
+        return error
+    
+    changes = {'i_give': i_give, 'i_receive': i_receive}
+    if update.punt_categories is not None:
+        changes['punt_categories'] = update.punt_categories
+    session['request'] = request.model_copy(update=changes)
+    return None
+
+
+# Сессии конструктора трейдов
+trade_session_store = TradeSessionStore()